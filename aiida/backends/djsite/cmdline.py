@@ -73,6 +73,7 @@ def get_log_messages(obj):
     Get the log messages for the object.
     """
     from aiida.backends.djsite.db.models import DbLog
+    from aiida.orm.log import decompress_text, decompress_metadata
     extra = get_dblogger_extra(obj)
     # convert to list, too
     log_messages = list(DbLog.objects.filter(**extra).order_by('time').values(
@@ -80,7 +81,9 @@ def get_log_messages(obj):
 
     # deserialize metadata
     for log in log_messages:
-        log.update({'metadata': json.loads(log['metadata'])})
+        log.update({'message': decompress_text(log['message']),
+                    'metadata': decompress_metadata(
+                        json.loads(log['metadata']))})
 
     return log_messages
 
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from aiida.backends.djsite.db.migrations import update_schema_version
+
+
+SCHEMA_VERSION = "1.0.5"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('db', '0004_add_daemon_and_uuid_indices'),
+    ]
+
+    operations = [
+        # Create the index used to look up nodes by their hash when caching
+        # calculations. The hash is stored in the '_aiida_hash' extra, so
+        # we only index the values of that key.
+        migrations.RunSQL("""
+        CREATE INDEX tval_idx_for_node_hash
+        ON db_dbextra (tval)
+        WHERE ("db_dbextra"."key" = '_aiida_hash')""",
+                          reverse_sql="DROP INDEX tval_idx_for_node_hash"),
+        update_schema_version(SCHEMA_VERSION)
+    ]
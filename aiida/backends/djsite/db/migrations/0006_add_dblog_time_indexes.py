@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import aiida.utils.timezone
+
+from aiida.backends.djsite.db.migrations import update_schema_version
+
+
+SCHEMA_VERSION = "1.0.6"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('db', '0005_add_node_hash_index'),
+    ]
+
+    operations = [
+        # Index the time of the log entries, to prune the old ones, and the
+        # time of the entries of each object, to show and prune them
+        migrations.AlterField(
+            model_name='dblog',
+            name='time',
+            field=models.DateTimeField(default=aiida.utils.timezone.now,
+                                       editable=False, db_index=True),
+            preserve_default=True,
+        ),
+        migrations.AlterIndexTogether(
+            name='dblog',
+            index_together=set([('objname', 'objpk', 'time')]),
+        ),
+        update_schema_version(SCHEMA_VERSION)
+    ]
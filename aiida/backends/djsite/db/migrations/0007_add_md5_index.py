@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from aiida.backends.djsite.db.migrations import update_schema_version
+
+
+SCHEMA_VERSION = "1.0.7"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('db', '0006_add_dblog_time_indexes'),
+    ]
+
+    operations = [
+        # Create the index used to look up the files of the SinglefileData
+        # nodes (e.g. CifData and UpfData) by their checksum. The checksum is
+        # stored in the 'md5' attribute, so we only index the values of that
+        # key.
+        migrations.RunSQL("""
+        CREATE INDEX tval_idx_for_md5
+        ON db_dbattribute (tval)
+        WHERE ("db_dbattribute"."key" = 'md5')""",
+                          reverse_sql="DROP INDEX tval_idx_for_md5"),
+        update_schema_version(SCHEMA_VERSION)
+    ]
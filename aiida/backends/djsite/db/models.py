@@ -567,6 +567,24 @@ def _deserialize_attribute(mainitem, subitems, sep, original_class=None,
             mainitem['datatype']))
 
 
+def _count_rows(value, limit):
+    """
+    Count the rows that are needed to store a value in an attribute table,
+    i.e. one for the value itself and one for each (recursive) element of
+    lists and dicts, stopping as soon as the count exceeds `limit`.
+    """
+    count = 0
+    to_visit = [value]
+    while to_visit and count <= limit:
+        item = to_visit.pop()
+        count += 1
+        if isinstance(item, (list, tuple)):
+            to_visit.extend(item)
+        elif isinstance(item, dict):
+            to_visit.extend(item.itervalues())
+    return count
+
+
 def deserialize_attributes(data, sep, original_class=None, original_pk=None):
     """
     Deserialize the attributes from the format internally stored in the DB
@@ -651,6 +669,11 @@ class DbMultipleValueAttributeBaseClass(m.Model):
     # separator for subfields
     _sep = "."
 
+    # Level-zero lists and dicts that would need more rows than this are
+    # stored in a single row of type 'json' instead (if they are
+    # json-serializable), see create_value. None to always unpack them.
+    _json_threshold = None
+
     class Meta:
         abstract = True
         unique_together = (('key',),)
@@ -833,6 +856,20 @@ class DbMultipleValueAttributeBaseClass(m.Model):
 
         list_to_return = [new_entry]
 
+        if (cls._json_threshold is not None and cls._sep not in key and
+                isinstance(value, (list, tuple, dict)) and
+                _count_rows(value, cls._json_threshold) >
+                cls._json_threshold):
+            jsondata = cls._get_json_data(value)
+            if jsondata is not None:
+                new_entry.datatype = 'json'
+                new_entry.tval = jsondata
+                new_entry.bval = None
+                new_entry.ival = None
+                new_entry.fval = None
+                new_entry.dval = None
+                return list_to_return
+
         if value is None:
             new_entry.datatype = 'none'
             new_entry.bval = None
@@ -944,6 +981,31 @@ class DbMultipleValueAttributeBaseClass(m.Model):
 
         return list_to_return
 
+    @classmethod
+    def _get_json_data(cls, value):
+        """
+        Serialize a list or dict that is stored in a single row, validating
+        the keys of the dicts as if the value was unpacked.
+
+        :return: the json string, or None if the value cannot be stored
+            as json without changing it (e.g. if it contains dates)
+        """
+        import json
+
+        to_visit = [value]
+        while to_visit:
+            item = to_visit.pop()
+            if isinstance(item, dict):
+                for subk in item:
+                    cls.validate_key(subk)
+                to_visit.extend(item.itervalues())
+            elif isinstance(item, (list, tuple)):
+                to_visit.extend(item)
+        try:
+            return json.dumps(value)
+        except (TypeError, ValueError):
+            return None
+
     @classmethod
     def get_query_dict(cls, value):
         """
@@ -1112,7 +1174,10 @@ class DbAttributeBaseClass(DbMultipleValueAttributeBaseClass):
     a datatype field to know the actual datatype.
 
     Moreover, this class unpacks dictionaries and lists when possible, so that
-    it is possible to query inside recursive lists and dicts.
+    it is possible to query inside recursive lists and dicts. Very large lists
+    and dicts (e.g. the sites of a large structure) are instead stored as
+    json in a single row, which makes storing and loading the node much
+    faster, but their elements cannot be queried.
     """
     # In this way, the related name for the DbAttribute inherited class will be
     # 'dbattributes' and for 'dbextra' will be 'dbextras'
@@ -1123,10 +1188,61 @@ class DbAttributeBaseClass(DbMultipleValueAttributeBaseClass):
 
     _subspecifier_field_name = 'dbnode'
 
+    _json_threshold = 1000
+
     class Meta:
         unique_together = (("dbnode", "key"))
         abstract = True
 
+    @classmethod
+    def store_large_values_as_json(cls, threshold=None):
+        """
+        Migrate the level-zero lists and dicts that were unpacked in more rows
+        than `threshold` to a single row of type 'json', as they are stored
+        now (see create_value). Each value is migrated in its own
+        transaction, so the migration can be interrupted and run again.
+
+        :param threshold: the maximum number of rows of an unpacked value,
+            by default the current threshold of the class
+        :return: an iterator over the (node pk, key) of the migrated values
+        """
+        from django.db import connection, transaction
+
+        if threshold is None:
+            threshold = cls._json_threshold
+
+        key_column = connection.ops.quote_name('key')
+        if connection.vendor == 'postgresql':
+            level_zero_key = "split_part({}, '{}', 1)"
+        elif connection.vendor == 'mysql':
+            level_zero_key = "SUBSTRING_INDEX({}, '{}', 1)"
+        else:
+            level_zero_key = "substr({0}, 1, instr({0}, '{1}') - 1)"
+        level_zero_key = level_zero_key.format(key_column, cls._sep)
+
+        cursor = connection.cursor()
+        # The children of a value are all the rows whose key starts with the
+        # key of the value and the separator
+        cursor.execute(
+            "SELECT dbnode_id, {level_zero_key} FROM {table} "
+            "WHERE {key} LIKE %s GROUP BY dbnode_id, {level_zero_key} "
+            "HAVING COUNT(*) >= %s".format(
+                level_zero_key=level_zero_key, key=key_column,
+                table=cls._meta.db_table),
+            ['%{}%'.format(cls._sep), threshold])
+
+        for dbnode_id, key in cursor.fetchall():
+            dbnode = DbNode(id=dbnode_id)
+            with transaction.atomic():
+                jsondata = cls._get_json_data(
+                    cls.get_value_for_node(dbnode, key))
+                if jsondata is None:
+                    continue
+                cls.del_value(key, subspecifier_value=dbnode)
+                cls.objects.create(dbnode=dbnode, key=key, datatype='json',
+                                   tval=jsondata)
+            yield dbnode_id, key
+
     @classmethod
     def list_all_node_elements(cls, dbnode):
         """
@@ -1616,7 +1732,8 @@ class DbComment(m.Model):
 @python_2_unicode_compatible
 class DbLog(m.Model):
     # Creation time
-    time = m.DateTimeField(default=timezone.now, editable=False)
+    time = m.DateTimeField(default=timezone.now, editable=False,
+                           db_index=True)
     loggername = m.CharField(max_length=255, db_index=True)
     levelname = m.CharField(max_length=50, db_index=True)
     # A string to know what is the referred object (e.g. a Calculation,
@@ -1628,6 +1745,13 @@ class DbLog(m.Model):
     message = m.TextField(blank=True)
     metadata = m.TextField(default="{}")  # Will store a json
 
+    class Meta:
+        # For the log messages of an object in order of time, used to show
+        # them and to prune them
+        index_together = [
+            ("objname", "objpk", "time"),
+        ]
+
     def __str__(self):
         return "[Log: {} for {} {}] {}".format(self.levelname,
                                                self.objname, self.objpk, self.message)
@@ -12,6 +12,7 @@ Tests for nodes, attributes and links
 """
 
 from aiida.backends.testbase import AiidaTestCase
+from aiida.orm import load_node
 from aiida.orm.node import Node
 
 
@@ -302,3 +303,151 @@ class TestNodeBasicDjango(AiidaTestCase):
             load_node()
 
 
+
+    def test_large_attributes_as_json(self):
+        """
+        Large lists and dicts are stored in a single json row
+        """
+        from aiida.backends.djsite.db.models import DbAttribute
+
+        threshold = DbAttribute._json_threshold
+        large = [[float(i), 1., 2.] for i in range(threshold)]
+        small = range(10)
+
+        a = Node()
+        a._set_attr('large', large)
+        a._set_attr('small', small)
+        a.store()
+
+        rows = DbAttribute.objects.filter(dbnode=a.dbnode)
+        self.assertEquals(rows.get(key='large').datatype, 'json')
+        self.assertEquals(rows.filter(key__startswith='large.').count(), 0)
+        self.assertEquals(rows.filter(key__startswith='small.').count(), 10)
+
+        b = load_node(a.pk)
+        self.assertEquals(b.get_attr('large'), large)
+        self.assertEquals(b.get_attr('small'), small)
+
+    def test_store_large_values_as_json(self):
+        """
+        Existing unpacked values are migrated to json rows
+        """
+        from aiida.backends.djsite.db.models import DbAttribute
+
+        a = Node()
+        a._set_attr('values', range(20))
+        a.store()
+
+        migrated = list(DbAttribute.store_large_values_as_json(threshold=10))
+        self.assertEquals(migrated, [(a.pk, 'values')])
+        self.assertEquals(DbAttribute.objects.get(
+            dbnode=a.dbnode, key='values').datatype, 'json')
+        self.assertEquals(load_node(a.pk).get_attr('values'), range(20))
+
+
+class TestJsonbMigrationDjango(AiidaTestCase):
+    """
+    Test the online migration of attributes and extras to JSONB columns
+    """
+
+    def tearDown(self):
+        from django.db import connection
+        from aiida.backends.djsite import jsonbmigration
+
+        cursor = connection.cursor()
+        cursor.execute("DROP TABLE IF EXISTS {}".format(
+            jsonbmigration.MIGRATION_TABLE_NAME))
+        for column in jsonbmigration.COLUMNS:
+            for name in [column, jsonbmigration.TEMPORARY_COLUMNS[column]]:
+                cursor.execute(
+                    "ALTER TABLE {} DROP COLUMN IF EXISTS {}".format(
+                        jsonbmigration.NODE_TABLE_NAME, name))
+        super(TestJsonbMigrationDjango, self).tearDown()
+
+    def _get_columns(self, node, finalized=False):
+        import json
+        from django.db import connection
+        from aiida.backends.djsite import jsonbmigration
+
+        if finalized:
+            columns = jsonbmigration.COLUMNS
+        else:
+            columns = [jsonbmigration.TEMPORARY_COLUMNS[_]
+                       for _ in jsonbmigration.COLUMNS]
+        cursor = connection.cursor()
+        cursor.execute("SELECT {}::text, {}::text FROM db_dbnode "
+                       "WHERE id = %s".format(*columns), [node.pk])
+        return [json.loads(_) for _ in cursor.fetchone()]
+
+    def _get_node_columns(self):
+        from django.db import connection
+        from aiida.backends.djsite import jsonbmigration
+
+        return jsonbmigration._get_column_names(
+            connection.cursor(), jsonbmigration.NODE_TABLE_NAME)
+
+    def test_migrate(self):
+        from aiida.backends.djsite import jsonbmigration
+
+        a = Node()
+        a._set_attr('list', [1, 2., 'x', {'a': None}])
+        a._set_attr('nan', float('nan'))
+        a.store()
+        a.set_extra('extra', True)
+        b = Node().store()
+
+        pending = len(jsonbmigration.get_pending_pks())
+        migrated, errors = jsonbmigration.migrate(batch_size=2)
+        self.assertEquals((migrated, errors), (pending, {}))
+        self.assertEquals(jsonbmigration.get_pending_pks(), [])
+        self.assertEquals(self._get_columns(a), [
+            {'list': [1, 2., 'x', {'a': None}], 'nan': 'NaN'},
+            a.get_extras()])
+        self.assertEquals(self._get_columns(a)[1]['extra'], True)
+        self.assertEquals(self._get_columns(b), [{}, b.get_extras()])
+
+        # Only the new and the changed nodes are migrated again
+        c = Node().store()
+        b.set_extra('extra', 1)
+        self.assertEquals(jsonbmigration.migrate(), (1, {}))
+        self.assertEquals(jsonbmigration.verify(), ([b.pk], {}))
+        self.assertEquals(self._get_columns(b), [{}, b.get_extras()])
+        self.assertEquals(self._get_columns(b)[1]['extra'], 1)
+        self.assertEquals(self._get_columns(c), [{}, c.get_extras()])
+
+        jsonbmigration.finalize()
+        self.assertEquals(jsonbmigration.get_statistics()['migrated_nodes'],
+                          0)
+        self.assertEquals(self._get_columns(c, finalized=True),
+                          [{}, c.get_extras()])
+
+    def test_partial_migration_before_transition(self):
+        """
+        The columns checked by the transition to SQLAlchemy to skip the
+        migration of the attributes and extras only exist once the online
+        migration is finalized, and the transition discards a partial one.
+        """
+        from aiida.backends.djsite import jsonbmigration
+        from aiida.backends.sqlalchemy import transition_06dj_to_07sqla
+
+        a = Node().store()
+        Node().store()
+
+        self.assertEquals(jsonbmigration.migrate(pks=[a.pk]), (1, {}))
+        self.assertTrue(jsonbmigration.get_pending_pks())
+        node_columns = self._get_node_columns()
+        self.assertNotIn(transition_06dj_to_07sqla.ATTR_COL_NAME,
+                         node_columns)
+        self.assertNotIn(transition_06dj_to_07sqla.EXTRAS_COL_NAME,
+                         node_columns)
+        with self.assertRaises(ValueError):
+            jsonbmigration.finalize()
+
+        jsonbmigration.discard()
+        node_columns = self._get_node_columns()
+        for column in jsonbmigration.COLUMNS:
+            self.assertNotIn(column, node_columns)
+            self.assertNotIn(jsonbmigration.TEMPORARY_COLUMNS[column],
+                             node_columns)
+        self.assertEquals(jsonbmigration.get_statistics()['migrated_nodes'],
+                          0)
@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Online migration of the attributes and extras of a Django database from the
+DbAttribute and DbExtra tables to the JSONB columns of the db_dbnode table
+that are used by the SQLAlchemy backend.
+
+Contrary to the offline transition in
+aiida.backends.sqlalchemy.transition_06dj_to_07sqla, this migration can be
+run while the daemon is running, and can be interrupted and resumed:
+
+* the attributes and extras are written to the temporary
+  'jsonbmigration_attributes' and 'jsonbmigration_extras' columns, added as
+  nullable columns without a default, which does not rewrite the table and
+  is ignored by Django;
+* the nodes are migrated in batches, each in its own transaction, and the
+  migrated nodes are recorded in the db_dbnode_jsonbmigration table
+  together with the number of rows and the hashes of their attributes and
+  extras, so that the next run only migrates the missing (e.g. new) nodes;
+* each batch is verified before it is committed, comparing the number of rows
+  read with the number of rows in the tables and the hashes of the values
+  read back from the JSONB columns with those of the deserialized rows;
+* the attributes and extras that were changed after their node was migrated
+  can be found and migrated again with :py:func:`verify`.
+
+When all nodes are migrated and verified with the daemon stopped,
+:py:func:`finalize` renames the columns to 'attributes' and 'extras', sets
+their defaults and drops the bookkeeping table: the transition to SQLAlchemy
+then skips the migration of the attributes and extras. Until then, the
+transition ignores the temporary columns and migrates all the nodes itself,
+discarding the partial online migration (see :py:func:`discard`).
+"""
+import datetime
+import json
+import math
+import time
+
+from aiida.common.exceptions import DbContentError
+from aiida.common.hashing import make_hash
+
+NODE_TABLE_NAME = 'db_dbnode'
+MIGRATION_TABLE_NAME = 'db_dbnode_jsonbmigration'
+COLUMNS = ['attributes', 'extras']
+# The columns where the values are written until the migration is finalized
+TEMPORARY_COLUMNS = {'attributes': 'jsonbmigration_attributes',
+                     'extras': 'jsonbmigration_extras'}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class _VerificationError(Exception):
+    pass
+
+
+def _get_models():
+    from aiida.backends.djsite.db.models import DbAttribute, DbExtra
+    return {'attributes': DbAttribute, 'extras': DbExtra}
+
+
+def _check_database():
+    from django.db import connection
+
+    if connection.vendor != 'postgresql':
+        raise ValueError("JSONB columns are only available with PostgreSQL, "
+                         "not with {}".format(connection.vendor))
+
+
+def _get_column_names(cursor, table):
+    cursor.execute("SELECT column_name FROM information_schema.columns "
+                   "WHERE table_name = %s", [table])
+    return [_[0] for _ in cursor.fetchall()]
+
+
+def prepare():
+    """
+    Add the temporary JSONB columns to the db_dbnode table and create the
+    table that records the migrated nodes, if they do not exist yet.
+    """
+    from django.db import connection, transaction
+
+    _check_database()
+    with transaction.atomic():
+        cursor = connection.cursor()
+        node_columns = _get_column_names(cursor, NODE_TABLE_NAME)
+        for column in COLUMNS:
+            if TEMPORARY_COLUMNS[column] not in node_columns:
+                cursor.execute("ALTER TABLE {} ADD COLUMN {} JSONB".format(
+                    NODE_TABLE_NAME, TEMPORARY_COLUMNS[column]))
+        if not _get_column_names(cursor, MIGRATION_TABLE_NAME):
+            cursor.execute(
+                "CREATE TABLE {} ("
+                "dbnode_id integer PRIMARY KEY REFERENCES {}(id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "nrows integer NOT NULL, "
+                "attributes_hash varchar(255) NOT NULL, "
+                "extras_hash varchar(255) NOT NULL, "
+                "time timestamp with time zone NOT NULL)".format(
+                    MIGRATION_TABLE_NAME, NODE_TABLE_NAME))
+
+
+def get_pending_pks():
+    """
+    Return the sorted list of the PKs of the nodes that were not migrated yet.
+    """
+    from django.db import connection
+
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT n.id FROM {} n LEFT JOIN {} m ON m.dbnode_id = n.id "
+        "WHERE m.dbnode_id IS NULL ORDER BY n.id".format(
+            NODE_TABLE_NAME, MIGRATION_TABLE_NAME))
+    return [_[0] for _ in cursor.fetchall()]
+
+
+def get_migrated_pks():
+    """
+    Return the sorted list of the PKs of the nodes that were migrated.
+    """
+    from django.db import connection
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT dbnode_id FROM {} ORDER BY dbnode_id".format(
+        MIGRATION_TABLE_NAME))
+    return [_[0] for _ in cursor.fetchall()]
+
+
+def _clean_value(value):
+    """
+    Convert a deserialized value to what is stored in the JSONB column: dates
+    are stored in ISO format (as done by the SQLAlchemy backend) and the
+    special floats as strings (as done by the offline transition), since JSON
+    cannot represent them.
+    """
+    if isinstance(value, (list, tuple)):
+        return [_clean_value(_) for _ in value]
+    elif isinstance(value, dict):
+        return {k: _clean_value(v) for k, v in value.iteritems()}
+    elif isinstance(value, datetime.datetime):
+        return value.isoformat()
+    elif isinstance(value, float) and (math.isnan(value) or
+                                       math.isinf(value)):
+        return str(value).replace('inf', 'Infinity').replace('nan', 'NaN')
+    return value
+
+
+def _read_values(cursor, pks):
+    """
+    Read and deserialize the attributes and extras of a set of nodes.
+
+    :return: a tuple (values, nrows, errors), where values maps each pk of a
+        node that could be deserialized to a dict with the cleaned
+        attributes and extras, nrows maps each pk to the number of rows
+        that were read, and errors maps the pk of the other nodes to the
+        error message.
+    """
+    from collections import defaultdict
+
+    from aiida.backends.djsite.db.models import deserialize_attributes
+
+    values = {pk: {} for pk in pks}
+    nrows = defaultdict(int)
+    errors = {}
+    for column, model in _get_models().iteritems():
+        data = defaultdict(dict)
+        for row in model.objects.filter(dbnode_id__in=pks).values_list(
+                'dbnode_id', 'key', 'datatype', 'tval', 'fval', 'ival',
+                'bval', 'dval').iterator():
+            data[row[0]][row[1]] = dict(zip(
+                ['datatype', 'tval', 'fval', 'ival', 'bval', 'dval'],
+                row[2:]))
+
+        cursor.execute("SELECT dbnode_id, COUNT(*) FROM {} "
+                       "WHERE dbnode_id IN %s GROUP BY dbnode_id".format(
+                           model._meta.db_table), [tuple(pks)])
+        for pk, count in cursor.fetchall():
+            if count != len(data[pk]):
+                raise _VerificationError(
+                    "{} rows of {} read for node {} instead of {}".format(
+                        len(data[pk]), model.__name__, pk, count))
+            nrows[pk] += count
+
+        for pk in pks:
+            if pk in errors:
+                continue
+            try:
+                values[pk][column] = _clean_value(deserialize_attributes(
+                    data[pk], sep=model._sep, original_class=model,
+                    original_pk=pk))
+            except DbContentError as e:
+                errors[pk] = e.message
+            except Exception as e:
+                errors[pk] = "{}: {}".format(e.__class__.__name__, e)
+
+    for pk in errors:
+        del values[pk]
+    return values, nrows, errors
+
+
+def _get_hashes(values):
+    return [make_hash(values[column]) for column in COLUMNS]
+
+
+def _migrate_batch(pks):
+    """
+    Migrate the attributes and extras of a batch of nodes in a single
+    transaction, replacing the values of the nodes that were already
+    migrated.
+
+    :return: a tuple (number of migrated nodes, dict of errors), where the
+        errors map the pks of the nodes that were not migrated to the reason
+    """
+    from django.db import connection, transaction, DatabaseError
+
+    try:
+        with transaction.atomic():
+            cursor = connection.cursor()
+            # All the rows of the batch must be read from the same snapshot
+            cursor.execute(
+                "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            values, nrows, errors = _read_values(cursor, pks)
+            if not values:
+                return 0, errors
+
+            migrated = sorted(values)
+            cursor.executemany(
+                "UPDATE {} SET {} = %s::jsonb, {} = %s::jsonb "
+                "WHERE id = %s".format(NODE_TABLE_NAME,
+                                       TEMPORARY_COLUMNS['attributes'],
+                                       TEMPORARY_COLUMNS['extras']),
+                [(json.dumps(values[pk]['attributes']),
+                  json.dumps(values[pk]['extras']), pk) for pk in migrated])
+
+            cursor.execute(
+                "SELECT id, {}::text, {}::text FROM {} "
+                "WHERE id IN %s".format(TEMPORARY_COLUMNS['attributes'],
+                                        TEMPORARY_COLUMNS['extras'],
+                                        NODE_TABLE_NAME), [tuple(migrated)])
+            stored = {pk: {'attributes': json.loads(attributes),
+                           'extras': json.loads(extras)}
+                      for pk, attributes, extras in cursor.fetchall()}
+            if len(stored) != len(migrated):
+                raise _VerificationError(
+                    "{} nodes updated instead of {}".format(
+                        len(stored), len(migrated)))
+
+            records = []
+            for pk in migrated:
+                hashes = _get_hashes(values[pk])
+                if _get_hashes(stored[pk]) != hashes:
+                    raise _VerificationError(
+                        "the stored values of node {} differ from the "
+                        "original ones".format(pk))
+                records.append([pk, nrows[pk]] + hashes)
+
+            cursor.execute("DELETE FROM {} WHERE dbnode_id IN %s".format(
+                MIGRATION_TABLE_NAME), [tuple(migrated)])
+            cursor.executemany(
+                "INSERT INTO {} (dbnode_id, nrows, attributes_hash, "
+                "extras_hash, time) VALUES (%s, %s, %s, %s, now())".format(
+                    MIGRATION_TABLE_NAME), records)
+    except (_VerificationError, DatabaseError) as e:
+        # The transaction was rolled back, the batch can be tried again
+        return 0, {pk: str(e) for pk in pks}
+
+    return len(migrated), errors
+
+
+def _verify_batch(pks):
+    """
+    Compare the attributes and extras of a batch of migrated nodes with the
+    values of their JSONB columns.
+
+    :return: the list of the pks of the nodes whose values differ
+    """
+    from django.db import connection, transaction
+
+    with transaction.atomic():
+        cursor = connection.cursor()
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        try:
+            values, _, errors = _read_values(cursor, pks)
+        except _VerificationError:
+            # Modified while reading, it will be migrated again
+            return list(pks)
+
+        cursor.execute(
+            "SELECT n.id, n.{}::text, n.{}::text, "
+            "m.attributes_hash, m.extras_hash FROM {} n JOIN {} m "
+            "ON m.dbnode_id = n.id WHERE n.id IN %s".format(
+                TEMPORARY_COLUMNS['attributes'], TEMPORARY_COLUMNS['extras'],
+                NODE_TABLE_NAME, MIGRATION_TABLE_NAME), [tuple(pks)])
+        stale = list(errors)
+        for pk, attributes, extras, attributes_hash, extras_hash in \
+                cursor.fetchall():
+            if pk not in values:
+                continue
+            hashes = _get_hashes(values[pk])
+            stored = {'attributes': json.loads(attributes or 'null'),
+                      'extras': json.loads(extras or 'null')}
+            if hashes != [attributes_hash, extras_hash] or \
+                    _get_hashes(stored) != hashes:
+                stale.append(pk)
+
+    return sorted(stale)
+
+
+def _run_batches(function, pks, batch_size, jobs):
+    """
+    Run the function on the batches of pks, in parallel if jobs > 1, and
+    return an iterator over the tuples (batch, result).
+    """
+    import itertools
+
+    batches = [pks[i:i + batch_size] for i in range(0, len(pks), batch_size)]
+    if jobs <= 1:
+        return itertools.izip(batches, itertools.imap(function, batches))
+
+    import multiprocessing
+
+    from django.db import connection
+
+    # The workers must not share the connection of this process: they open
+    # their own when they first use it
+    connection.close()
+    pool = multiprocessing.Pool(jobs)
+
+    def run():
+        try:
+            for result in pool.imap(function, batches):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+
+    return itertools.izip(batches, run())
+
+
+def migrate(pks=None, batch_size=DEFAULT_BATCH_SIZE, jobs=1, progress=None):
+    """
+    Migrate the attributes and extras of the nodes to the JSONB columns.
+
+    :param pks: the pks of the nodes to migrate, by default all the nodes that
+        were not migrated yet
+    :param batch_size: the number of nodes migrated in each transaction
+    :param jobs: the number of processes migrating batches in parallel
+    :param progress: if given, a function called after each batch with the
+        number of processed and total nodes
+    :return: a tuple (number of migrated nodes, dict of errors), where the
+        errors map the pks of the nodes that were not migrated to the reason
+    """
+    _check_database()
+    prepare()
+    if pks is None:
+        pks = get_pending_pks()
+
+    migrated = 0
+    errors = {}
+    done = 0
+    for batch, (count, batch_errors) in _run_batches(
+            _migrate_batch, pks, batch_size, jobs):
+        migrated += count
+        errors.update(batch_errors)
+        done += len(batch)
+        if progress is not None:
+            progress(done, len(pks))
+    return migrated, errors
+
+
+def verify(batch_size=DEFAULT_BATCH_SIZE, jobs=1, progress=None):
+    """
+    Find the migrated nodes whose attributes or extras were changed, or were
+    not stored correctly, and migrate them again.
+
+    :param batch_size: the number of nodes verified in each transaction
+    :param jobs: the number of processes verifying batches in parallel
+    :param progress: if given, a function called after each batch with the
+        number of processed and total nodes
+    :return: a tuple (list of the pks of the stale nodes, dict of errors),
+        where the errors map the pks of the stale nodes that could not be
+        migrated again to the reason
+    """
+    _check_database()
+    pks = get_migrated_pks()
+
+    stale = []
+    done = 0
+    for batch, batch_stale in _run_batches(
+            _verify_batch, pks, batch_size, jobs):
+        stale.extend(batch_stale)
+        done += len(batch)
+        if progress is not None:
+            progress(done, len(pks))
+
+    _, errors = migrate(pks=stale, batch_size=batch_size, jobs=jobs)
+    return stale, errors
+
+
+def finalize():
+    """
+    Rename the migrated columns to the names used by the SQLAlchemy backend,
+    make them ready to be used and drop the bookkeeping table. All nodes
+    must have been migrated.
+
+    :raise ValueError: if some nodes were not migrated
+    """
+    from django.db import connection, transaction
+
+    _check_database()
+    with transaction.atomic():
+        cursor = connection.cursor()
+        if not _get_column_names(cursor, MIGRATION_TABLE_NAME):
+            raise ValueError("The migration was not started")
+        pending = get_pending_pks()
+        if pending:
+            raise ValueError("{} nodes were not migrated".format(
+                len(pending)))
+        for column in COLUMNS:
+            cursor.execute(
+                "ALTER TABLE {table} RENAME COLUMN {temporary} TO {column}"
+                "".format(table=NODE_TABLE_NAME, column=column,
+                          temporary=TEMPORARY_COLUMNS[column]))
+            cursor.execute(
+                "ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT '{{}}'"
+                "".format(table=NODE_TABLE_NAME, column=column))
+        cursor.execute("DROP TABLE {}".format(MIGRATION_TABLE_NAME))
+
+
+def get_discard_statements():
+    """
+    Return the SQL statements that drop the temporary columns and the
+    bookkeeping table of a migration that was not finalized.
+    """
+    return (["ALTER TABLE {} DROP COLUMN IF EXISTS {}".format(
+        NODE_TABLE_NAME, TEMPORARY_COLUMNS[column]) for column in COLUMNS] +
+            ["DROP TABLE IF EXISTS {}".format(MIGRATION_TABLE_NAME)])
+
+
+def discard():
+    """
+    Discard a migration that was not finalized, dropping its temporary
+    columns and bookkeeping table. The offline transition to SQLAlchemy does
+    this before migrating all the nodes itself.
+    """
+    from django.db import connection, transaction
+
+    _check_database()
+    with transaction.atomic():
+        cursor = connection.cursor()
+        for statement in get_discard_statements():
+            cursor.execute(statement)
+
+
+def get_statistics():
+    """
+    Return a dictionary with the number of nodes, of migrated nodes and of
+    migrated rows of the DbAttribute and DbExtra tables.
+    """
+    from django.db import connection
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM {}".format(NODE_TABLE_NAME))
+    nodes = cursor.fetchone()[0]
+    if not _get_column_names(cursor, MIGRATION_TABLE_NAME):
+        return {'nodes': nodes, 'migrated_nodes': 0, 'migrated_rows': 0}
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(nrows), 0) FROM {}".format(
+        MIGRATION_TABLE_NAME))
+    migrated_nodes, migrated_rows = cursor.fetchone()
+    return {'nodes': nodes, 'migrated_nodes': migrated_nodes,
+            'migrated_rows': migrated_rows}
+
+
+class ProgressReporter(object):
+    """
+    Print the progress of a migration on a single line, with the rate and the
+    estimated remaining time.
+    """
+
+    def __init__(self, description, stream=None):
+        import sys
+
+        self._description = description
+        self._stream = stream if stream is not None else sys.stdout
+        self._start = time.time()
+
+    def __call__(self, done, total):
+        elapsed = time.time() - self._start
+        rate = done / elapsed if elapsed > 0 else 0.
+        remaining = (total - done) / rate if rate > 0 else 0.
+        self._stream.write("\r{}: {}/{} nodes ({:.0f} nodes/s, {} s "
+                           "remaining)".format(self._description, done, total,
+                                               rate, int(remaining)))
+        if done == total:
+            self._stream.write("\n")
+        self._stream.flush()
@@ -290,6 +290,10 @@ class QueryBuilderImplDjango(QueryBuilderInterface):
 
 
 
+    def defer_attributes(self, query, alias):
+        # The attributes are read from the DbAttribute table only when needed
+        return query
+
     def get_session(self):
         return dummy_model.get_aldjemy_session()
         # return dummy_model.session
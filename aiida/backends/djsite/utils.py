@@ -51,6 +51,7 @@ def _load_dbenv_noschemacheck(process, profile):
 
 def get_log_messages(obj):
     from aiida.backends.djsite.db.models import DbLog
+    from aiida.orm.log import decompress_text, decompress_metadata
     import json
 
     extra = get_dblogger_extra(obj)
@@ -60,7 +61,9 @@ def get_log_messages(obj):
 
     # deserialize metadata
     for log in log_messages:
-        log.update({'metadata': json.loads(log['metadata'])})
+        log.update({'message': decompress_text(log['message']),
+                    'metadata': decompress_metadata(
+                        json.loads(log['metadata']))})
 
     return log_messages
 
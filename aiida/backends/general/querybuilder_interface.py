@@ -102,6 +102,14 @@ class QueryBuilderInterface():
         """
         pass
     @abstractmethod
+    def defer_attributes(self, query, alias):
+        """
+        Return the query with the loading of the attributes of the nodes of
+        the alias deferred until they are accessed, if this is supported.
+        """
+        pass
+
+    @abstractmethod
     def get_session(self):
         """
         :returns: a valid session, an instance of sqlalchemy.orm.session.Session
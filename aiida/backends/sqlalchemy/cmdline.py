@@ -54,6 +54,7 @@ def get_log_messages(obj):
     """
     from aiida.backends.sqlalchemy.models.log import DbLog
     from aiida.backends.sqlalchemy import get_scoped_session
+    from aiida.orm.log import decompress_text, decompress_metadata
     session = get_scoped_session()
 
     extra = get_dblogger_extra(obj)
@@ -64,8 +65,8 @@ def get_log_messages(obj):
         updated_val_dict = {
             "loggername": val_dict["loggername"],
             "levelname": val_dict["levelname"],
-            "message": val_dict["message"],
-            "metadata": val_dict["_metadata"],
+            "message": decompress_text(val_dict["message"]),
+            "metadata": decompress_metadata(val_dict["_metadata"]),
             "time": val_dict["time"]}
         log_messages.append(updated_val_dict)
 
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Management of the indexes on paths of the attributes and extras of the nodes.
+
+The filters of the QueryBuilder on attributes and extras are translated to
+expressions on the JSONB columns (see
+:py:func:`aiida.backends.sqlalchemy.querybuilder_sqla.cast_according_to_type`)
+that cannot use the GIN index on the whole columns. The indexes created here
+are built from the same expressions, so that PostgreSQL can use them:
+
+* 'number', 'string' and 'boolean' indexes are B-tree indexes on the casted
+  value, for the comparison operators, restricted to the nodes where the value
+  has the right JSON type (which makes the cast safe);
+* 'gin' indexes are GIN indexes on the value, for the 'contains' and
+  'has_key' operators.
+
+Indexes can also be restricted to the nodes of a type, in the format used by
+the QueryBuilder type filters (e.g. 'data.parameter.%').
+
+The indexes in BUILTIN_INDEXES are defined with the models instead, and
+:py:func:`create_builtin_indexes` adds them to the databases that were created
+before they were introduced.
+"""
+import hashlib
+import json
+import re
+from collections import Counter
+
+from sqlalchemy import and_, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.schema import CreateIndex
+
+from aiida.backends.sqlalchemy import get_scoped_session
+
+INDEX_PREFIX = 'db_dbnode_qb_'
+
+INDEX_KINDS = ('number', 'string', 'boolean', 'gin')
+
+# Values of the type of each kind of B-tree index, to get the expressions
+# used by the QueryBuilder for the filters on values of this type
+_KIND_VALUES = {'number': 0., 'string': '', 'boolean': True}
+
+_VALUE_TYPE_KINDS = {
+    'int': 'number', 'long': 'number', 'float': 'number',
+    'str': 'string', 'unicode': 'string', 'bool': 'boolean',
+}
+
+_COMPARISON_OPERATORS = ('==', '>', '<', '>=', '=>', '<=', '=<', 'in',
+                         'like', 'ilike')
+
+# The indexes on paths of the attributes and extras that are defined with the
+# models of the nodes
+BUILTIN_INDEXES = ('db_dbnode_attributes_md5_idx',
+                   'db_dbnode_extras_aiida_hash_idx')
+
+
+def get_index_kind(operator, value_type):
+    """
+    Return the kind of index that can be used by a filter, or None.
+
+    :param operator: the operator of the filter, e.g. '<'
+    :param value_type: the name of the type of the value of the filter
+    """
+    if operator in ('contains', 'has_key'):
+        return 'gin'
+    if operator in _COMPARISON_OPERATORS:
+        return _VALUE_TYPE_KINDS.get(value_type, None)
+    return None
+
+
+def get_index_name(column, path, kind, node_type=None):
+    """
+    Return the name of the index for a path of a column. The name is
+    deterministic, so that the same index is not created twice.
+    """
+    readable = re.sub(r'\W+', '_', '_'.join([column] + list(path)))[:30]
+    digest = hashlib.md5(json.dumps(
+        [column, list(path), kind, node_type])).hexdigest()[:8]
+    return '{}{}_{}_{}'.format(INDEX_PREFIX, kind, readable, digest)
+
+
+def get_index(column, path, kind, node_type=None):
+    """
+    Return the index for a path of the attributes or extras of the nodes.
+
+    :param column: 'attributes' or 'extras'
+    :param path: the list of keys of the path
+    :param kind: one of INDEX_KINDS
+    :param node_type: if given, only index the nodes of this type (a LIKE
+        pattern if it contains '%')
+    :return: an sqlalchemy Index, not attached to the table
+    """
+    from aiida.backends.sqlalchemy.models.node import DbNode
+    from aiida.backends.sqlalchemy.querybuilder_sqla import \
+        cast_according_to_type
+
+    if column not in ('attributes', 'extras'):
+        raise ValueError("Indexes can only be created on the attributes or "
+                         "the extras, not on '{}'".format(column))
+    if kind not in INDEX_KINDS:
+        raise ValueError("Unknown index kind '{}', valid kinds are: "
+                         "{}".format(kind, ", ".join(INDEX_KINDS)))
+    if not path:
+        raise ValueError("The path of the index cannot be empty")
+
+    path_in_json = getattr(DbNode, column)[tuple(path)]
+    conditions = []
+    if kind == 'gin':
+        expression = path_in_json.cast(JSONB)
+        kwargs = {'postgresql_using': 'gin'}
+    else:
+        type_filter, expression = cast_according_to_type(
+            path_in_json, _KIND_VALUES[kind])
+        conditions.append(type_filter)
+        kwargs = {}
+
+    if node_type is not None:
+        if '%' in node_type:
+            conditions.append(DbNode.type.like(node_type))
+        else:
+            conditions.append(DbNode.type == node_type)
+    if conditions:
+        kwargs['postgresql_where'] = and_(*conditions)
+
+    index = Index(get_index_name(column, path, kind, node_type), expression,
+                  **kwargs)
+    # Building the index attaches it to the table: remove it, or it would be
+    # created together with the other tables
+    DbNode.__table__.indexes.discard(index)
+    return index
+
+
+def _execute_autocommit(sql):
+    """
+    Execute a statement that cannot run inside a transaction block.
+    """
+    session = get_scoped_session()
+    # Concurrent index operations wait for all the open transactions,
+    # including the one of the session of this process
+    session.commit()
+    connection = session.bind.connect().execution_options(
+        isolation_level='AUTOCOMMIT')
+    try:
+        connection.execute(sql)
+    finally:
+        connection.close()
+
+
+def create_index(column, path, kind, node_type=None):
+    """
+    Create an index on a path of the attributes or extras of the nodes (see
+    :py:func:`get_index`). The index is built concurrently, without locking
+    the table against writes.
+
+    :return: the name of the index
+    """
+    index = get_index(column, path, kind, node_type)
+    _create_concurrently(index)
+    return index.name
+
+
+def _create_concurrently(index):
+    sql = unicode(CreateIndex(index).compile(
+        dialect=get_scoped_session().bind.dialect))
+    _execute_autocommit(sql.replace('CREATE INDEX ',
+                                    'CREATE INDEX CONCURRENTLY ', 1))
+
+
+def create_builtin_indexes():
+    """
+    Create the indexes in BUILTIN_INDEXES that are missing in the database,
+    or that are invalid after a failed build. They are built concurrently, as
+    the indexes of :py:func:`create_index`.
+
+    :return: the names of the created indexes
+    """
+    from aiida.backends.sqlalchemy.models.node import DbNode
+
+    existing = dict((_['name'], _['valid']) for _ in list_indexes())
+    created = []
+    for index in sorted(DbNode.__table__.indexes, key=lambda _: _.name):
+        if index.name not in BUILTIN_INDEXES or existing.get(index.name):
+            continue
+        if index.name in existing:
+            _execute_autocommit('DROP INDEX CONCURRENTLY IF EXISTS {}'.format(
+                index.name))
+        _create_concurrently(index)
+        created.append(index.name)
+    return created
+
+
+def drop_index(name):
+    """
+    Drop an index created by :py:func:`create_index`.
+
+    :raise ValueError: if the index was not created by create_index
+    """
+    if not name.startswith(INDEX_PREFIX) or not re.match(r'^\w+$', name):
+        raise ValueError("Only the indexes whose name starts with '{}' can "
+                         "be dropped".format(INDEX_PREFIX))
+    _execute_autocommit('DROP INDEX CONCURRENTLY IF EXISTS {}'.format(name))
+
+
+def list_indexes():
+    """
+    Return the indexes of the nodes table, with their usage statistics since
+    the last reset of the statistics of the database.
+
+    :return: a list of dictionaries with the name, the definition, the
+        number of scans, the number of index entries read, the size in
+        bytes, whether the index is valid (a failed concurrent build leaves
+        an invalid index) and whether it was created by create_index
+    """
+    result = get_scoped_session().execute(
+        "SELECT s.indexrelname, pg_get_indexdef(s.indexrelid), s.idx_scan, "
+        "s.idx_tup_read, pg_relation_size(s.indexrelid), i.indisvalid "
+        "FROM pg_stat_user_indexes s "
+        "JOIN pg_index i ON i.indexrelid = s.indexrelid "
+        "WHERE s.relname = 'db_dbnode' ORDER BY s.indexrelname")
+    return [{'name': name, 'definition': definition, 'scans': scans,
+             'tuples_read': tuples_read, 'size': size, 'valid': valid,
+             'managed': name.startswith(INDEX_PREFIX)}
+            for name, definition, scans, tuples_read, size, valid
+            in result.fetchall()]
+
+
+def get_filter_statistics(log_path=None):
+    """
+    Count the filters logged by the QueryBuilder (see the
+    querybuilder.log_filters property) for each index that they can use.
+
+    :param log_path: the filter log, by default the one of the profile
+    :return: a list of tuples (count, column, path, kind, node type, index
+        name), the most frequent first
+    """
+    import os
+    from aiida.orm.querybuilder import get_filter_log_path
+
+    if log_path is None:
+        log_path = get_filter_log_path()
+    counts = Counter()
+    if os.path.exists(log_path):
+        with open(log_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Truncated line of a concurrent write
+                    continue
+                kind = get_index_kind(entry['operator'], entry['value_type'])
+                if kind is not None:
+                    counts[(entry['column'], tuple(entry['path']), kind,
+                            entry['node_type'])] += 1
+
+    return [(count, column, list(path), kind, node_type,
+             get_index_name(column, path, kind, node_type))
+            for (column, path, kind, node_type), count
+            in counts.most_common()]
@@ -8,7 +8,7 @@
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
 
-from sqlalchemy.schema import Column
+from sqlalchemy.schema import Column, Index
 from sqlalchemy.types import Integer, DateTime, String, Text
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -23,7 +23,7 @@ class DbLog(Base):
 
     id = Column(Integer, primary_key=True)
 
-    time = Column(DateTime(timezone=True), default=timezone.now)
+    time = Column(DateTime(timezone=True), default=timezone.now, index=True)
     loggername = Column(String(255), index=True)
     levelname = Column(String(255), index=True)
 
@@ -33,6 +33,12 @@ class DbLog(Base):
     message = Column(Text(), nullable=True)
     _metadata = Column('metadata', JSONB)
 
+    __table_args__ = (
+        # For the log messages of an object in order of time, used to show
+        # them and to prune them
+        Index('db_dblog_objname_objpk_time', 'objname', 'objpk', 'time'),
+    )
+
     def __init__(self, time, loggername="", levelname="", objname="", objpk=None,
                  message=None, metadata=None):
 
@@ -15,7 +15,7 @@ from sqlalchemy.orm import (
 )
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm.attributes import flag_modified
-from sqlalchemy.schema import Column, UniqueConstraint
+from sqlalchemy.schema import Column, UniqueConstraint, Index
 from sqlalchemy.types import Integer, String, Boolean, DateTime, Text
 # Specific to PGSQL. If needed to be agnostic
 # http://docs.sqlalchemy.org/en/rel_0_9/core/custom_types.html?highlight=guid#backend-agnostic-guid-type
@@ -328,6 +328,23 @@ class DbNode(Base):
             label('laststate')
 
 
+# Expression index on the hash of the nodes, used to find identical nodes when
+# caching calculations (see aiida.common.caching). It is built from the
+# expressions of the QueryBuilder filters on a string extra, so that PostgreSQL
+# can use it for them. Databases created before it was added get it with
+# 'verdi database index create-builtin'
+_aiida_hash = DbNode.extras[('_aiida_hash',)]
+Index('db_dbnode_extras_aiida_hash_idx', _aiida_hash.astext,
+      postgresql_where=func.jsonb_typeof(_aiida_hash) == 'string')
+
+# Expression index on the checksum of the files of the SinglefileData nodes,
+# used to find the existing CifData and UpfData nodes with the same file, built
+# in the same way
+_md5 = DbNode.attributes[('md5',)]
+Index('db_dbnode_attributes_md5_idx', _md5.astext,
+      postgresql_where=func.jsonb_typeof(_md5) == 'string')
+
+
 class DbLink(Base):
     __tablename__ = "db_dblink"
 
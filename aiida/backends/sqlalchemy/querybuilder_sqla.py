@@ -44,7 +44,7 @@ def compile(element, compiler, **kw):
     """
     Get length of array defined in a JSONB column
     """
-    return "jsonb_array_length(%s)" % compiler.process(element.clauses)
+    return "jsonb_array_length(%s)" % compiler.process(element.clauses, **kw)
 
 
 class array_length(FunctionElement):
@@ -55,7 +55,7 @@ def compile(element, compiler, **kw):
     """
     Get length of array defined in a JSONB column
     """
-    return "array_length(%s)" % compiler.process(element.clauses)
+    return "array_length(%s)" % compiler.process(element.clauses, **kw)
 
 
 
@@ -67,7 +67,50 @@ def compile(element, compiler, **kw):
     """
     Get length of array defined in a JSONB column
     """
-    return "jsonb_typeof(%s)" % compiler.process(element.clauses)
+    return "jsonb_typeof(%s)" % compiler.process(element.clauses, **kw)
+
+
+def cast_according_to_type(path_in_json, value):
+    """
+    Return the expressions filtering the JSON values at a path with the same
+    type as the value, and casting them to the type of the value.
+
+    :return: a tuple (type filter, casted entity)
+    """
+    if isinstance(value, bool):
+        type_filter = jsonb_typeof(path_in_json)=='boolean'
+        casted_entity = path_in_json.cast(Boolean)
+    elif isinstance(value, (int, float)):
+        type_filter = jsonb_typeof(path_in_json)=='number'
+        casted_entity = path_in_json.cast(Float)
+    elif isinstance(value, dict) or value is None:
+        type_filter = jsonb_typeof(path_in_json)=='object'
+        casted_entity = path_in_json.cast(JSONB) # BOOLEANS?
+    elif isinstance(value, dict):
+        type_filter = jsonb_typeof(path_in_json)=='array'
+        casted_entity = path_in_json.cast(JSONB) # BOOLEANS?
+    elif isinstance(value, (str, unicode)):
+        type_filter = jsonb_typeof(path_in_json)=='string'
+        casted_entity = path_in_json.astext
+    elif value is None:
+        type_filter = jsonb_typeof(path_in_json)=='null'
+        casted_entity = path_in_json.cast(JSONB) # BOOLEANS?
+    elif isinstance(value, datetime):
+        # type filter here is filter whether this attributes stores
+        # a string and a filter whether this string
+        # is compatible with a datetime (using a regex)
+        #  - What about historical values (BC, or before 1000AD)??
+        #  - Different ways to represent the timezone
+
+        type_filter = jsonb_typeof(path_in_json)=='string'
+        regex_filter = path_in_json.astext.op(
+                "SIMILAR TO"
+            )("\d\d\d\d-[0-1]\d-[0-3]\dT[0-2]\d:[0-5]\d:\d\d\.\d+((\+|\-)\d\d:\d\d)?")
+        type_filter =  and_(type_filter, regex_filter)
+        casted_entity = path_in_json.cast(DateTime)
+    else:
+        raise Exception('Unknown type {}'.format(type(value)))
+    return type_filter, casted_entity
 
 
 class QueryBuilderImplSQLA(QueryBuilderInterface):
@@ -148,6 +191,14 @@ class QueryBuilderImplSQLA(QueryBuilderInterface):
         from aiida.backends.sqlalchemy.models.node import DbPath
         self.Path = DbPath
 
+    def defer_attributes(self, query, alias):
+        from sqlalchemy import inspect
+        from sqlalchemy.orm import Load
+
+        if 'attributes' not in inspect(alias).mapper.column_attrs:
+            return query
+        return query.options(Load(alias).defer('attributes'))
+
     def get_session(self):
         return aiida.backends.sqlalchemy.get_scoped_session()
 
@@ -354,42 +405,6 @@ class QueryBuilderImplSQLA(QueryBuilderInterface):
             column=None, column_name=None,
             alias=None):
 
-        def cast_according_to_type(path_in_json, value):
-            if isinstance(value, bool):
-                type_filter = jsonb_typeof(path_in_json)=='boolean'
-                casted_entity = path_in_json.cast(Boolean)
-            elif isinstance(value, (int, float)):
-                type_filter = jsonb_typeof(path_in_json)=='number'
-                casted_entity = path_in_json.cast(Float)
-            elif isinstance(value, dict) or value is None:
-                type_filter = jsonb_typeof(path_in_json)=='object'
-                casted_entity = path_in_json.cast(JSONB) # BOOLEANS?
-            elif isinstance(value, dict):
-                type_filter = jsonb_typeof(path_in_json)=='array'
-                casted_entity = path_in_json.cast(JSONB) # BOOLEANS?
-            elif isinstance(value, (str, unicode)):
-                type_filter = jsonb_typeof(path_in_json)=='string'
-                casted_entity = path_in_json.astext
-            elif value is None:
-                type_filter = jsonb_typeof(path_in_json)=='null'
-                casted_entity = path_in_json.cast(JSONB) # BOOLEANS?
-            elif isinstance(value, datetime):
-                # type filter here is filter whether this attributes stores
-                # a string and a filter whether this string
-                # is compatible with a datetime (using a regex)
-                #  - What about historical values (BC, or before 1000AD)??
-                #  - Different ways to represent the timezone
-
-                type_filter = jsonb_typeof(path_in_json)=='string'
-                regex_filter = path_in_json.astext.op(
-                        "SIMILAR TO"
-                    )("\d\d\d\d-[0-1]\d-[0-3]\dT[0-2]\d:[0-5]\d:\d\d\.\d+((\+|\-)\d\d:\d\d)?")
-                type_filter =  and_(type_filter, regex_filter)
-                casted_entity = path_in_json.cast(DateTime)
-            else:
-                raise Exception('Unknown type {}'.format(type(value)))
-            return type_filter, casted_entity
-
         if column is None:
             column = _get_column(column_name, alias)
 
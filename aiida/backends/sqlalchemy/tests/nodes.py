@@ -212,6 +212,39 @@ class TestNodeBasicSQLA(AiidaTestCase):
         finally:
             session.rollback()
 
+    def test_deferred_attributes(self):
+        """
+        Test that only the requested attributes are fetched when loading the
+        attributes is deferred.
+        """
+        from sqlalchemy import inspect
+        from aiida.orm.querybuilder import QueryBuilder
+
+        a = Node()
+        a._set_attr('small', 1)
+        a._set_attr('large', {'values': range(1000), 'none': None})
+        a.store()
+
+        qb = QueryBuilder(defer_attributes=True)
+        qb.append(Node, filters={'id': a.pk})
+        node = qb.first()[0]
+
+        self.assertEquals(node.get_attr('small'), 1)
+        self.assertEquals(node.get_attr('large.values.2'), 2)
+        self.assertIsNone(node.get_attr('large.none'))
+        self.assertEquals(node.get_attr('missing', 'default'), 'default')
+        with self.assertRaises(AttributeError):
+            node.get_attr('large.missing')
+        self.assertIn('attributes', inspect(node.dbnode).unloaded)
+
+        # All the attributes are loaded when needed
+        self.assertEquals(node.get_attrs(), a.get_attrs())
+        node._set_attr('small', 2)
+        self.assertEquals(node.get_attr('small'), 2)
+
+        node = QueryBuilder().append(Node, filters={'id': a.pk}).first()[0]
+        self.assertNotIn('attributes', inspect(node.dbnode).unloaded)
+
     def test_multiple_node_creation(self):
         """
         This test checks that a node is not added automatically to the session
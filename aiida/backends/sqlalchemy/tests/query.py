@@ -63,3 +63,99 @@ class QueryBuilderLimitOffsetsTestSQLA(AiidaTestCase):
         res = list(zip(*qb.all())[0])
         self.assertEqual(res, range(5,8))
 
+
+
+class TestAttributeIndexesSQLA(AiidaTestCase):
+
+    def _explain(self, qb):
+        """
+        Return the query plan of a QueryBuilder query, without sequential
+        scans so that the indexes are used even on small tables.
+        """
+        from aiida.backends.sqlalchemy import get_scoped_session
+
+        query = qb.get_query()
+        compiled = query.statement.compile(dialect=query.session.bind.dialect)
+        cursor = get_scoped_session().connection().connection.cursor()
+        try:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("EXPLAIN {}".format(compiled), compiled.params)
+            return "\n".join(_[0] for _ in cursor.fetchall())
+        finally:
+            get_scoped_session().rollback()
+
+    def test_create_index(self):
+        from aiida.backends.sqlalchemy import indexes
+        from aiida.orm.data.parameter import ParameterData
+        from aiida.orm.querybuilder import QueryBuilder
+
+        for energy in [1., 2., 'unknown']:
+            ParameterData(dict={'energy': energy}).store()
+
+        name = indexes.create_index('attributes', ['energy'], 'number',
+                                    node_type='data.parameter.%')
+        try:
+            self.assertIn(name, [_['name'] for _ in indexes.list_indexes()])
+
+            qb = QueryBuilder().append(
+                ParameterData, filters={'attributes.energy': {'<': 1.5}},
+                project='attributes.energy')
+            self.assertEqual(qb.all(), [[1.]])
+            self.assertIn(name, self._explain(qb))
+        finally:
+            indexes.drop_index(name)
+        self.assertNotIn(name, [_['name'] for _ in indexes.list_indexes()])
+
+        with self.assertRaises(ValueError):
+            indexes.drop_index('db_dbnode_pkey')
+
+    def _check_builtin_index(self, name, qb):
+        """
+        Check that a built-in index is used by a query, also after it is
+        created for a database that does not have it.
+        """
+        from aiida.backends.sqlalchemy import indexes
+
+        self.assertIn(name, self._explain(qb))
+
+        indexes._execute_autocommit('DROP INDEX {}'.format(name))
+        self.assertNotIn(name, self._explain(qb))
+        self.assertEqual(indexes.create_builtin_indexes(), [name])
+        self.assertIn(name, self._explain(qb))
+        self.assertEqual(indexes.create_builtin_indexes(), [])
+
+    def test_md5_index(self):
+        from aiida.orm.node import Node
+        from aiida.orm.querybuilder import QueryBuilder
+
+        qb = QueryBuilder().append(
+            Node, filters={'attributes.md5': {'in': ['0' * 32, '1' * 32]}})
+        self._check_builtin_index('db_dbnode_attributes_md5_idx', qb)
+
+    def test_hash_index(self):
+        from aiida.orm.node import Node
+        from aiida.orm.querybuilder import QueryBuilder
+
+        qb = QueryBuilder().append(
+            Node, filters={'extras.{}'.format(Node._HASH_EXTRA_KEY): '0' * 32})
+        self._check_builtin_index('db_dbnode_extras_aiida_hash_idx', qb)
+
+    def test_filter_statistics(self):
+        import json
+        import tempfile
+        from aiida.backends.sqlalchemy import indexes
+
+        with tempfile.NamedTemporaryFile() as f:
+            for operator, value_type in [('<', 'float'), ('>', 'int'),
+                                         ('has_key', 'str'), ('of_type', 'str')]:
+                f.write(json.dumps({
+                    'column': 'attributes', 'path': ['energy'],
+                    'operator': operator, 'value_type': value_type,
+                    'node_type': None}) + '\n')
+            f.flush()
+            statistics = indexes.get_filter_statistics(f.name)
+
+        self.assertEqual(
+            [_[:4] for _ in statistics],
+            [(2, 'attributes', ['energy'], 'number'),
+             (1, 'attributes', ['energy'], 'gin')])
@@ -234,6 +234,32 @@ def transition_extras(profile=None, group_size=1000, delete_table=False):
     print("Migration of extras finished.")
 
 
+def discard_online_jsonb_migration(profile=None):
+    """
+    Drop the temporary columns and the bookkeeping table of an online
+    migration of the attributes and extras to JSONB columns (see
+    aiida.backends.djsite.jsonbmigration) that was not finalized: the
+    transition migrates all the nodes itself.
+    """
+    from aiida.backends.djsite import jsonbmigration
+
+    if not is_dbenv_loaded():
+        transition_load_db_env(profile=profile)
+
+    inspector = reflection.Inspector.from_engine(sa.get_scoped_session().bind)
+    if jsonbmigration.MIGRATION_TABLE_NAME not in \
+            inspector.get_table_names():
+        return
+
+    print("\nDiscarding the online migration of the attributes and extras "
+          "that was not finalized.")
+    session = sa.get_scoped_session()
+    with session.begin(subtransactions=True):
+        for statement in jsonbmigration.get_discard_statements():
+            session.execute(statement)
+    session.commit()
+
+
 def transition_attributes(profile=None, group_size=1000, debug=False,
                           delete_table=False):
     """
@@ -530,6 +556,8 @@ def transition_db(profile=None, group_size=1000, delete_table=False):
         print("Answered no. Exiting")
         sys.exit(0)
 
+    discard_online_jsonb_migration(profile=profile)
+
     transition_attributes(profile=profile, group_size=group_size,
                           delete_table=delete_table)
 
@@ -46,14 +46,24 @@ from aiida.backends.profile import (is_profile_loaded,
 #     """
 #     return sa.get_scoped_session() is not None
 
+# The connection pools and sessions inherited from the parent process, which
+# are kept so that they are never garbage collected in the child
+_inherited_after_fork = []
+
+
 def recreate_after_fork(engine):
     """
     :param engine: the engine that will be used by the sessionmaker
 
-    Callback called after a fork. Not only disposes the engine, but also recreates a new scoped session
-    to use independent sessions in the forked process.
+    Callback called after a fork. Not only replaces the connection pool of the engine, but also recreates
+    a new scoped session to use independent sessions in the forked process.
+
+    The connections inherited from the parent are not closed (as engine.dispose() would do): they share
+    their sockets with the parent, so closing or resetting them in the child would also break them
+    for the parent.
     """
-    sa.engine.dispose()
+    _inherited_after_fork.append((sa.engine.pool, sa.scopedsessionclass))
+    sa.engine.pool = sa.engine.pool.recreate()
     sa.scopedsessionclass = scoped_session(sessionmaker(bind=sa.engine, expire_on_commit=True))
 
 def reset_session(config):
@@ -45,6 +45,8 @@ db_test_list = {
         'query': ['aiida.backends.tests.query'],
         'workflows': ['aiida.backends.tests.workflows'],
         'calculation_node': ['aiida.backends.tests.calculation_node'],
+        'caching': ['aiida.backends.tests.caching'],
+        'objectstore': ['aiida.backends.tests.objectstore'],
         'backup_script': ['aiida.backends.tests.backup_script'],
         'backup_setup_script': ['aiida.backends.tests.backup_setup_script'],
         'restapi': ['aiida.backends.tests.restapi'],
@@ -54,6 +56,7 @@ db_test_list = {
         'orm.log': ['aiida.backends.tests.orm.log'],
         'work.class_loader': ['aiida.backends.tests.work.class_loader'],
         'work.daemon': ['aiida.backends.tests.work.daemon'],
+        'work.dependency_index': ['aiida.backends.tests.work.dependency_index'],
         'work.persistence': ['aiida.backends.tests.work.persistence'],
         'work.process': ['aiida.backends.tests.work.process'],
         'work.processSpec': ['aiida.backends.tests.work.processSpec'],
@@ -308,6 +308,46 @@ class TestBackupScriptUnit(AiidaTestCase):
         # Enable the logging messages
         logging.disable(logging.NOTSET)
 
+    def test_backup_pruned_checkout(self):
+        """
+        The files of a folder whose checkout was pruned are copied from the
+        object store.
+        """
+        import logging
+        import os
+        from aiida.orm.data.singlefile import SinglefileData
+
+        logging.disable(logging.INFO)
+        directory = tempfile.mkdtemp()
+        backup_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'file.txt')
+            with open(filename, 'w') as f:
+                f.write('content')
+            node = SinglefileData(file=filename).store()
+            node.folder.update_manifest(force=True)
+            source_dir = os.path.normpath(node.folder.abspath)
+            shutil.rmtree(source_dir)
+
+            self._backup_setup_inst._backup_dir = backup_dir
+            self._backup_setup_inst._backup_needed_files(
+                self._backup_setup_inst._get_query_sets(
+                    node.mtime - datetime.timedelta(minutes=1),
+                    node.mtime + datetime.timedelta(minutes=1)))
+
+            repository_path = os.path.normpath(
+                self._backup_setup_inst._get_repository_path())
+            backed_up = os.path.join(
+                backup_dir, source_dir[(len(repository_path) + 1):],
+                'path', 'file.txt')
+            with open(backed_up) as f:
+                self.assertEquals(f.read(), 'content')
+            self.assertEquals(os.stat(backed_up).st_nlink, 1)
+        finally:
+            shutil.rmtree(directory)
+            shutil.rmtree(backup_dir)
+            logging.disable(logging.NOTSET)
+
 
 class TestBackupScriptIntegration(AiidaTestCase):
 
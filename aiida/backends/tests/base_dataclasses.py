@@ -67,6 +67,25 @@ class TestList(AiidaTestCase):
         l.store()
         do_checks(l)
 
+    def test_flush(self):
+        l = base.List()
+        l.extend([1, 2, 3])
+        self.assertEqual(l.pop(), 3)
+        # The changes are only written to the attribute by flush()
+        self.assertIsNone(l.get_attr('list', None))
+        l.flush()
+        self.assertEqual(l.get_attr('list'), [1, 2])
+
+        l.append(4)
+        self.assertEqual(l.get_attr('list'), [1, 2])
+        l.store()
+        self.assertEqual(l.get_attr('list'), [1, 2, 4])
+        self.assertEqual(list(load_node(l.pk)), [1, 2, 4])
+
+        # Lists that were never used get an empty list
+        l = base.List().store()
+        self.assertEqual(l.get_attr('list'), [])
+
     def test_mutability(self):
         l = base.List()
         l.append(5)
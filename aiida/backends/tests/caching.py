@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Tests for the hashing of nodes and the caching of calculations
+"""
+import os
+import shutil
+import tempfile
+
+from aiida.backends.testbase import AiidaTestCase
+from aiida.common.caching import enable_caching, disable_caching, \
+    get_use_cache
+from aiida.common.datastructures import calc_states
+from aiida.common.folders import SandboxFolder
+from aiida.common.hashing import make_hash
+from aiida.common.links import LinkType
+from aiida.orm.data.base import Int
+from aiida.orm.data.parameter import ParameterData
+from aiida.work.workfunction import workfunction
+
+
+@workfunction
+def add(a, b):
+    return {'result': Int(a.value + b.value)}
+
+
+class TestNodeHashing(AiidaTestCase):
+    def test_identical_nodes(self):
+        a = ParameterData(dict={'a': 1, 'b': [1., 2.]})
+        b = ParameterData(dict={'b': [1., 2.], 'a': 1})
+        self.assertEquals(a.get_hash(), b.get_hash())
+
+        c = ParameterData(dict={'a': 1, 'b': [1., 3.]})
+        self.assertNotEquals(a.get_hash(), c.get_hash())
+
+    def test_hash_stored(self):
+        with enable_caching():
+            a = ParameterData(dict={'a': 1})
+            a.store()
+        self.assertEquals(a.get_extra(a._HASH_EXTRA_KEY), a.get_hash())
+
+        b = ParameterData(dict={'a': 1})
+        self.assertEquals(b._get_same_node().uuid, a.uuid)
+
+    def test_hash_not_stored_without_caching(self):
+        with disable_caching():
+            a = ParameterData(dict={'a': 2})
+            a.store()
+        self.assertIsNone(a.get_extra(a._HASH_EXTRA_KEY, None))
+
+    def test_folder(self):
+        with SandboxFolder() as folder:
+            with open(os.path.join(folder.abspath, 'file'), 'w') as f:
+                f.write('content')
+            first = make_hash(folder)
+
+            with open(os.path.join(folder.abspath, 'file'), 'w') as f:
+                f.write('other content')
+            self.assertNotEquals(make_hash(folder), first)
+
+    def test_repository_files(self):
+        from aiida.orm.data.singlefile import SinglefileData
+
+        hashes = []
+        for content in ['a', 'a', 'b']:
+            directory = tempfile.mkdtemp()
+            try:
+                filename = os.path.join(directory, 'file.txt')
+                with open(filename, 'w') as f:
+                    f.write(content)
+                hashes.append(SinglefileData(file=filename).get_hash())
+            finally:
+                shutil.rmtree(directory)
+
+        self.assertEquals(hashes[0], hashes[1])
+        self.assertNotEquals(hashes[0], hashes[2])
+
+
+class TestCalculationCaching(AiidaTestCase):
+    def setUp(self):
+        super(TestCalculationCaching, self).setUp()
+        from aiida.orm.code import Code
+
+        self.code = Code()
+        self.code.set_remote_computer_exec((self.computer, '/bin/true'))
+        self.code.store()
+
+    def _create_calc(self, value):
+        from aiida.orm.calculation.job.simpleplugins.templatereplacer import \
+            TemplatereplacerCalculation
+
+        calc = TemplatereplacerCalculation(
+            computer=self.computer,
+            resources={'num_machines': 1, 'num_mpiprocs_per_machine': 1})
+        calc.use_code(self.code)
+        calc.use_parameters(ParameterData(dict={'value': value}))
+        calc.store_all()
+        return calc
+
+    def test_calculation_hash(self):
+        self.assertEquals(self._create_calc(1).get_hash(),
+                          self._create_calc(1).get_hash())
+        self.assertNotEquals(self._create_calc(1).get_hash(),
+                             self._create_calc(2).get_hash())
+
+    def test_get_use_cache(self):
+        from aiida.orm.calculation.job import JobCalculation
+        from aiida.orm.calculation.job.simpleplugins.templatereplacer import \
+            TemplatereplacerCalculation
+
+        with enable_caching():
+            self.assertTrue(get_use_cache(TemplatereplacerCalculation))
+            with disable_caching(JobCalculation):
+                self.assertFalse(get_use_cache(TemplatereplacerCalculation))
+                self.assertTrue(get_use_cache(ParameterData))
+
+    def test_submit_cached(self):
+        with enable_caching():
+            finished = self._create_calc(1)
+        finished._set_state(calc_states.PARSING)
+        output = ParameterData(dict={'energy': -1.})
+        output.add_link_from(finished, 'output_parameters', LinkType.CREATE)
+        output.store()
+        finished._set_state(calc_states.FINISHED)
+
+        with disable_caching():
+            calc = self._create_calc(1)
+            calc.submit()
+            self.assertEquals(calc.get_state(), calc_states.TOSUBMIT)
+
+        with enable_caching():
+            calc = self._create_calc(2)
+            calc.submit()
+            self.assertEquals(calc.get_state(), calc_states.TOSUBMIT)
+
+            calc = self._create_calc(1)
+            calc.submit()
+            self.assertEquals(calc.get_state(), calc_states.FINISHED)
+            self.assertEquals(calc.get_cached_from().uuid, finished.uuid)
+
+            outputs = calc.get_outputs_dict(link_type=LinkType.CREATE)
+            cloned = outputs['output_parameters']
+            self.assertNotEquals(cloned.uuid, output.uuid)
+            self.assertEquals(cloned.get_dict(), {'energy': -1.})
+
+    def test_workfunction_fast_forward(self):
+        with enable_caching():
+            result = add(Int(1), Int(2))['result']
+            cached = add(Int(1), Int(2))['result']
+
+        self.assertEquals(cached.value, 3)
+        self.assertNotEquals(cached.uuid, result.uuid)
+
+        calc = cached.get_inputs_dict(link_type=LinkType.CREATE).values()[0]
+        self.assertEquals(calc.get_cached_from().uuid,
+                          result.get_inputs(link_type=LinkType.CREATE)[0].uuid)
@@ -234,6 +234,82 @@ class TestCifData(AiidaTestCase):
 
         self.assertEquals(a.values['test']['_cell_length_a'], '11(1)')
 
+    @unittest.skipIf(not has_pycifrw(), "Unable to import PyCifRW")
+    def test_from_md5_many(self):
+        import tempfile
+        import uuid
+
+        from aiida.orm.data.cif import CifData
+
+        cifs = []
+        for _ in range(2):
+            with tempfile.NamedTemporaryFile() as f:
+                f.write("data_test _publ_section_title '{}'".format(
+                    uuid.uuid4()))
+                f.flush()
+                cifs.append(CifData(file=f.name).store())
+        unknown_md5 = '0' * 32
+
+        nodes = CifData.from_md5_many([cif.get_attr('md5') for cif in cifs] +
+                                      [unknown_md5])
+        self.assertEquals(set(nodes.keys()),
+                          set([cif.get_attr('md5') for cif in cifs] +
+                              [unknown_md5]))
+        for cif in cifs:
+            self.assertEquals([_.uuid for _ in nodes[cif.get_attr('md5')]],
+                              [cif.uuid])
+        self.assertEquals(nodes[unknown_md5], [])
+        self.assertEquals([_.uuid for _ in CifData.from_md5(
+            cifs[0].get_attr('md5'))], [cifs[0].uuid])
+
+    @unittest.skipIf(not has_pycifrw(), "Unable to import PyCifRW")
+    def test_parse_cache(self):
+        import os
+        import tempfile
+
+        from aiida.common.utils import md5_file
+        from aiida.orm.data.cif import CifData, cache_cif_files, \
+            get_parse_cache_path
+
+        file_contents = ["data_test _chemical_formula_sum 'C O2' "
+                         "_symmetry_int_tables_number 205",
+                         "data_test _chemical_formula_sum 'H2 O' "
+                         "_space_group_it_number 194"]
+        filenames = []
+        for file_content in file_contents:
+            with tempfile.NamedTemporaryFile(delete=False) as f:
+                f.write(file_content)
+            filenames.append(f.name)
+
+        try:
+            a = CifData(file=filenames[0])
+            self.assertTrue(os.path.exists(
+                get_parse_cache_path(a.get_attr('md5'))))
+            self.assertEquals(a.get_attr('formulae'), ['C O2'])
+            self.assertEquals(a.get_attr('spacegroup_numbers'), [205])
+
+            # The metadata of a node with the same file are taken from the
+            # cache, without parsing the file
+            b = CifData(file=filenames[0])
+            self.assertIsNone(b._values)
+            self.assertEquals(b.get_attr('formulae'), ['C O2'])
+            self.assertEquals(b.get_datablocks(), a.get_datablocks())
+            self.assertEquals(b.values['test']['_chemical_formula_sum'],
+                              'C O2')
+
+            self.assertEquals(cache_cif_files(filenames, processes=2),
+                              [md5_file(_) for _ in filenames])
+            c = CifData(file=filenames[1])
+            self.assertIsNone(c._values)
+            self.assertEquals(c.get_attr('formulae'), ['H2 O'])
+            self.assertEquals(c.get_attr('spacegroup_numbers'), [194])
+        finally:
+            for filename in filenames:
+                cache_path = get_parse_cache_path(md5_file(filename))
+                if cache_path is not None and os.path.exists(cache_path):
+                    os.remove(cache_path)
+                os.remove(filename)
+
     @unittest.skipIf(not has_ase(), "Unable to import ase")
     @unittest.skipIf(not has_pycifrw(), "Unable to import PyCifRW")
     def test_get_aiida_structure(self):
@@ -642,6 +718,77 @@ _publ_section_title                     'Test CIF'
             parse_formula("H0.5.2 O")
 
 
+class TestUpfData(AiidaTestCase):
+    """
+    Tests for UpfData class.
+    """
+
+    def test_get_pseudos_for_structures(self):
+        import os
+        import shutil
+        import tempfile
+        import uuid
+
+        from aiida.common.exceptions import NotExistent
+        from aiida.orm.data.structure import StructureData
+        from aiida.orm.data import upf
+        from aiida.orm.data.upf import UpfData, get_pseudos_for_structures, \
+            get_pseudos_from_structure, upload_upf_family
+
+        def write_upf(folder, element):
+            filename = os.path.join(folder, '{}.upf'.format(element))
+            with open(filename, 'w') as f:
+                f.write('<UPF version="2.0.1">\n'
+                        '<!-- {} -->\n'
+                        '<PP_HEADER element="{}"/>\n'
+                        '</UPF>\n'.format(uuid.uuid4(), element))
+            return filename
+
+        folder = tempfile.mkdtemp()
+        try:
+            write_upf(folder, 'Ba')
+            write_upf(folder, 'Ti')
+            family_name = 'test_family_{}'.format(uuid.uuid4())
+            upload_upf_family(folder, family_name, 'Test family')
+            new_ti = UpfData(file=write_upf(folder, 'Ti')).store()
+        finally:
+            shutil.rmtree(folder)
+
+        cell = ((2., 0., 0.), (0., 2., 0.), (0., 0., 2.))
+        s1 = StructureData(cell=cell)
+        s1.append_atom(position=(0., 0., 0.), symbols=['Ba'])
+        s2 = StructureData(cell=cell)
+        s2.append_atom(position=(0., 0., 0.), symbols=['Ba'], name='Ba1')
+        s2.append_atom(position=(1., 1., 1.), symbols=['Ti'])
+
+        pseudos = get_pseudos_for_structures([s1, s2], family_name)
+        self.assertEquals(len(pseudos), 2)
+        self.assertEquals(set(pseudos[0].keys()), set(['Ba']))
+        self.assertEquals(set(pseudos[1].keys()), set(['Ba1', 'Ti']))
+        self.assertEquals(pseudos[0]['Ba'].pk, pseudos[1]['Ba1'].pk)
+        self.assertEquals(pseudos[1]['Ti'].element, 'Ti')
+        old_ti = pseudos[1]['Ti']
+
+        # Only the pks are cached, the nodes are loaded at each call
+        self.assertEquals(upf._family_pks_cache[family_name][1],
+                          {'Ba': pseudos[0]['Ba'].pk, 'Ti': old_ti.pk})
+        self.assertIsNot(get_pseudos_from_structure(s1, family_name)['Ba'],
+                         pseudos[0]['Ba'])
+
+        # Changes of the members of the family are taken into account
+        family = UpfData.get_upf_group(family_name)
+        family.remove_nodes(old_ti)
+        with self.assertRaises(NotExistent):
+            get_pseudos_from_structure(s2, family_name)
+        family.add_nodes(new_ti)
+        self.assertEquals(get_pseudos_from_structure(s2, family_name)[
+                              'Ti'].pk, new_ti.pk)
+
+        with self.assertRaises(NotExistent):
+            get_pseudos_for_structures([s1], 'test_family_{}'.format(
+                uuid.uuid4()))
+
+
 class TestKindValidSymbols(AiidaTestCase):
     """
     Tests the symbol validation of the
@@ -1552,6 +1699,102 @@ Ag 0 0
             with self.assertRaises(TypeError):
                 StructureData()._parse_xyz(xyz_string)
 
+    def test_from_arrays(self):
+        """
+        Tests setting all the sites at once
+        """
+        import numpy
+        from aiida.orm.data.structure import StructureData, Kind
+
+        cell = ((5., 0., 0.), (0., 5., 0.), (0., 0., 5.))
+        symbols = ['Ba', 'Ti', 'O', 'O', 'O']
+        positions = numpy.random.rand(5, 3) * 5.
+
+        appended = StructureData(cell=cell)
+        for symbol, position in zip(symbols, positions):
+            appended.append_atom(symbols=symbol, position=position)
+
+        s = StructureData.from_arrays(cell, symbols, positions)
+        self.assertEquals([k.get_raw() for k in s.kinds],
+                          [k.get_raw() for k in appended.kinds])
+        self.assertEquals([site.get_raw() for site in s.sites],
+                          [site.get_raw() for site in appended.sites])
+        self.assertEquals(s.get_formula(), 'BaO3Ti')
+
+        # Custom kinds, which must cover all the sites
+        kinds = [Kind(name='A', symbols='Ba'), Kind(name='B', symbols='O',
+                                                    mass=10.)]
+        s = StructureData.from_arrays(cell, ['A', 'B'], positions[:2],
+                                      pbc=(True, False, True), kinds=kinds)
+        self.assertEquals(s.pbc, (True, False, True))
+        self.assertEquals(s.get_kind('B').mass, 10.)
+        with self.assertRaises(ValueError):
+            s.set_sites_bulk(['A', 'C'], positions[:2], kinds=kinds)
+
+        with self.assertRaises(ValueError):
+            # Wrong number of positions
+            StructureData.from_arrays(cell, symbols, positions[:4])
+        with self.assertRaises(ValueError):
+            StructureData.from_arrays(cell, symbols, positions[:, :2])
+        with self.assertRaises(ValueError):
+            # Not a chemical symbol
+            StructureData.from_arrays(cell, ['Xx'], positions[:1])
+
+        s.store()
+        with self.assertRaises(ModificationNotAllowed):
+            s.set_sites_bulk(['A'], positions[:1], kinds=kinds)
+
+    def test_site_arrays(self):
+        """
+        Tests storing the sites in arrays
+        """
+        import numpy
+        from aiida.orm.data.structure import StructureData
+
+        cell = ((5., 0., 0.), (0., 5., 0.), (0., 0., 5.))
+        symbols = ['Ba', 'Ti', 'O', 'O', 'O']
+        positions = numpy.random.rand(5, 3) * 5.
+
+        in_attributes = StructureData.from_arrays(cell, symbols, positions)
+        in_arrays = StructureData.from_arrays(cell, symbols, positions,
+                                              site_storage='arrays')
+        self.assertEquals(in_arrays.get_site_storage(), 'arrays')
+        self.assertIsNone(in_arrays.get_attr('sites', None))
+        self.assertEquals(sorted(in_arrays.get_folder_list()),
+                          ['site_kinds.npy', 'site_positions.npy'])
+
+        # The sites are read-only
+        with self.assertRaises(AttributeError):
+            in_arrays.sites[0].position = (0., 0., 0.)
+
+        # Appending a site rewrites the arrays
+        in_arrays.append_atom(symbols='Ba', position=(1., 1., 1.))
+        in_attributes.append_atom(symbols='Ba', position=(1., 1., 1.))
+
+        for node in [in_arrays, in_arrays.store(), load_node(in_arrays.pk)]:
+            self.assertEquals([s.get_raw() for s in node.sites],
+                              [s.get_raw() for s in in_attributes.sites])
+            self.assertEquals(node.get_site_kindnames(),
+                              in_attributes.get_site_kindnames())
+            self.assertEquals(node.get_site_positions().tolist(),
+                              in_attributes.get_site_positions().tolist())
+            self.assertEquals(node.get_formula(), 'Ba2O3Ti')
+            self.assertEquals(node.get_composition(),
+                              in_attributes.get_composition())
+            self.assertEquals(node._prepare_xsf(),
+                              in_attributes._prepare_xsf())
+
+        with self.assertRaises(ModificationNotAllowed):
+            in_arrays.set_site_storage('attributes')
+
+        # Conversion back to the attributes
+        in_attributes.set_site_storage('arrays')
+        in_attributes.set_site_storage('attributes')
+        self.assertEquals(len(in_attributes.get_attr('sites')), 6)
+        self.assertEquals(in_attributes.get_folder_list(), [])
+        with self.assertRaises(ValueError):
+            in_attributes.set_site_storage('hdf5')
+
 
 class TestStructureDataLock(AiidaTestCase):
     """
@@ -2210,6 +2453,131 @@ class TestArrayData(AiidaTestCase):
             if name == 'third':
                 self.assertAlmostEquals(abs(third - array).max(), 0.)
 
+    def test_mmap_and_slices(self):
+        """
+        Check memory-mapped arrays, slices and the caching of the arrays of
+        stored nodes
+        """
+        from aiida.orm.data.array import ArrayData, array_cache
+        import numpy
+
+        values = numpy.arange(60.).reshape(3, 4, 5)
+        n = ArrayData()
+        n.set_array('values', values)
+        self.assertEquals(n.get_array_slice('values', 1).tolist(),
+                          values[1].tolist())
+        n.store()
+
+        mapped = n.get_array('values', mmap_mode='r')
+        self.assertIsInstance(mapped, numpy.memmap)
+        self.assertEquals(mapped.tolist(), values.tolist())
+        with self.assertRaises(ValueError):
+            n.get_array('values', mmap_mode='r+')
+
+        part = n.get_array_slice('values', numpy.s_[1:, 2, ::2])
+        self.assertEquals(part.tolist(), values[1:, 2, ::2].tolist())
+        # A view on the memory-mapped file, not a copy
+        self.assertTrue(numpy.may_share_memory(part, mapped))
+
+        with self.assertRaises(KeyError):
+            n.get_array_slice('nonexistent_array', 0)
+
+        # The arrays are cached for all the instances of the node, and are
+        # read-only since they are shared
+        array = n.get_array('values')
+        self.assertIs(ArrayData(dbnode=n.dbnode).get_array('values'), array)
+        with self.assertRaises(ValueError):
+            array[0, 0, 0] = 1.
+
+        n.clear_internal_cache()
+        self.assertIsNot(n.get_array('values'), array)
+        self.assertIsNot(n.get_array('values', mmap_mode='r'), mapped)
+
+    def test_chunked_storage(self):
+        """
+        Check arrays stored in compressed chunks, and their slices
+        """
+        import os
+        from aiida.orm.data.array import ArrayData
+        import numpy
+
+        values = numpy.arange(600.).reshape(30, 4, 5)
+        n = ArrayData(array_storage='chunked')
+        # Chunks of 4 rows
+        n.set_array('values', values, chunk_bytes=4 * 4 * 5 * 8)
+        n.set_array('zeros', numpy.zeros((1000, 3)))
+        n.set_array('scalar', numpy.array(3.5))
+        n.set_array('small', numpy.arange(3), storage='npy')
+
+        self.assertEquals(set(n.get_folder_list()),
+                          set(['values.chunks', 'zeros.chunks',
+                               'scalar.chunks', 'small.npy']))
+        self.assertEquals(len(n.get_folder_list('values.chunks')), 8)
+        # Compressed
+        self.assertLess(
+            os.path.getsize(n.get_abs_path('zeros.chunks/0')), 1000 * 3 * 8)
+
+        with self.assertRaises(ValueError):
+            n.set_array_storage('hdf5')
+        with self.assertRaises(ValueError):
+            n.get_array('values', mmap_mode='r')
+
+        indices = [3, -1, numpy.s_[5:17], numpy.s_[::7, 1],
+                   numpy.s_[[1, 29, 3], 2, ::2], numpy.s_[..., 1]]
+
+        for node in [n, n.store(), load_node(n.pk)]:
+            self.assertEquals(node.get_array('values').tolist(),
+                              values.tolist())
+            self.assertEquals(node.get_shape('values'), values.shape)
+            self.assertEquals(node.get_array('scalar').shape, ())
+            self.assertEquals(float(node.get_array('scalar')), 3.5)
+            self.assertEquals(node.get_array('small').tolist(), [0, 1, 2])
+            for index in indices:
+                self.assertEquals(
+                    node.get_array_slice('values', index).tolist(),
+                    values[index].tolist())
+
+        # Replacing an array in the other format removes the chunks
+        n2 = ArrayData(array_storage='chunked')
+        n2.set_array('values', values)
+        n2.set_array('values', values, storage='npy')
+        self.assertEquals(n2.get_folder_list(), ['values.npy'])
+        n2.delete_array('values')
+        self.assertEquals(n2.get_folder_list(), [])
+        self.assertEquals(n2.get_arraynames(), [])
+
+    def test_array_cache(self):
+        """
+        Check the eviction of the least recently used arrays of the cache
+        """
+        from aiida.orm.data.array import ArrayCache
+        import numpy
+
+        cache = ArrayCache(max_bytes=3 * 800, max_arrays=10)
+        for i in range(3):
+            cache.put(('uuid', str(i), None), numpy.zeros(100))
+        self.assertEquals(cache.nbytes, 3 * 800)
+
+        # Use the first array, so that the second one is evicted
+        self.assertIsNotNone(cache.get(('uuid', '0', None)))
+        cache.put(('other', '3', None), numpy.zeros(100))
+        self.assertIsNone(cache.get(('uuid', '1', None)))
+        self.assertIsNotNone(cache.get(('uuid', '0', None)))
+        self.assertEquals(len(cache), 3)
+
+        # Too large to be cached
+        cache.put(('uuid', 'large', None), numpy.zeros(1000))
+        self.assertIsNone(cache.get(('uuid', 'large', None)))
+
+        cache.max_arrays = 1
+        cache.put(('uuid', '4', None), numpy.zeros(10))
+        self.assertEquals(len(cache), 1)
+        self.assertEquals(cache.nbytes, 80)
+
+        cache.discard('uuid')
+        self.assertEquals(len(cache), 0)
+        self.assertEquals(cache.nbytes, 0)
+
 
 class TestTrajectoryData(AiidaTestCase):
     """
@@ -2491,6 +2859,90 @@ class TestTrajectoryData(AiidaTestCase):
             self.assertAlmostEqual(
                 struc.get_kind(struc.sites[1].kind_name).mass, 100.)
 
+    def test_step_structures(self):
+        """
+        Check the conversion of many steps at once to StructureData nodes,
+        and the iteration over the steps.
+        """
+        from aiida.orm.data.array import trajectory
+        from aiida.orm.data.array.trajectory import TrajectoryData
+        from aiida.orm.data.structure import StructureData
+        import numpy
+
+        numsteps = 30
+        stepids = numpy.arange(numsteps)
+        cells = numpy.random.rand(numsteps, 3, 3) + 3. * numpy.eye(3)
+        symbols = numpy.array(['H', 'O', 'H'])
+        positions = numpy.random.rand(numsteps, 3, 3)
+
+        n = TrajectoryData()
+        n.set_trajectory(stepids=stepids, cells=cells, symbols=symbols,
+                         positions=positions)
+
+        batch_bytes = trajectory.STEP_BATCH_BYTES
+        # Read the steps in batches of 4
+        trajectory.STEP_BATCH_BYTES = 4 * 3 * 3 * 8
+        try:
+            for node in [n, n.store()]:
+                structures = node.get_step_structures(numpy.s_[::10])
+                self.assertEqual(len(structures), 3)
+                for index, struc in zip([0, 10, 20], structures):
+                    self.assertAlmostEqual(
+                        abs(numpy.array(struc.cell) - cells[index]).sum(), 0)
+                    newpos = numpy.array([s.position for s in struc.sites])
+                    self.assertAlmostEqual(
+                        abs(newpos - positions[index]).sum(), 0)
+                    self.assertEqual([s.kind_name for s in struc.sites],
+                                     symbols.tolist())
+
+                # Same kinds and sites as when appending the atoms
+                struc = StructureData(cell=cells[7])
+                for symbol, position in zip(symbols, positions[7]):
+                    struc.append_atom(symbols=symbol, position=position)
+                from_step = node.get_step_structure(7)
+                self.assertEqual([k.get_raw() for k in from_step.kinds],
+                                 [k.get_raw() for k in struc.kinds])
+                self.assertEqual([s.get_raw() for s in from_step.sites],
+                                 [s.get_raw() for s in struc.sites])
+
+                self.assertEqual(
+                    [data[0] for data in node.iter_step_data()],
+                    stepids.tolist())
+                self.assertEqual(
+                    len(list(node.iter_step_structures(stepids % 2 == 0))),
+                    numsteps // 2)
+                with self.assertRaises(IndexError):
+                    node.get_step_structures([numsteps])
+        finally:
+            trajectory.STEP_BATCH_BYTES = batch_bytes
+
+    def test_heatmap_positions(self):
+        """
+        Check the conversion of positions in bohr to angstrom of a stored
+        trajectory, whose arrays are read-only.
+        """
+        from aiida.common.constants import bohr_to_ang
+        from aiida.orm.data.array.trajectory import TrajectoryData
+        import numpy
+
+        numsteps = 10
+        positions = numpy.random.rand(numsteps, 2, 3)
+        n = TrajectoryData()
+        n.set_trajectory(stepids=numpy.arange(numsteps),
+                         cells=numpy.array([numpy.eye(3)] * numsteps),
+                         symbols=numpy.array(['H', 'H']),
+                         positions=positions,
+                         times=numpy.arange(numsteps) * 0.1)
+        n._set_attr('units|positions', 'bohr')
+        n.store()
+        self.assertFalse(n.get_positions().flags.writeable)
+
+        heatmap_positions = n._get_heatmap_positions(stepsize=2)
+        self.assertAlmostEqual(
+            abs(heatmap_positions - positions[::2] * bohr_to_ang).max(), 0)
+        # The cached positions are not changed
+        self.assertAlmostEqual(abs(n.get_positions() - positions).max(), 0)
+
     def test_conversion_from_structurelist(self):
         """
         Check the method to create a TrajectoryData from list of AiiDA
@@ -2539,6 +2991,65 @@ class TestTrajectoryData(AiidaTestCase):
         with self.assertRaises(ValueError):
             td = TrajectoryData(structurelist=structurelist)
 
+    def test_trajectory_writer(self):
+        """
+        Check setting a trajectory one step at a time.
+        """
+        import numpy
+        from aiida.common.exceptions import ValidationError
+        from aiida.orm.data.array.trajectory import TrajectoryData
+
+        numsteps = 50
+        symbols = ['H', 'O', 'C']
+        stepids = numpy.arange(numsteps) * 10
+        times = stepids * 0.01
+        cells = numpy.random.rand(numsteps, 3, 3)
+        positions = numpy.random.rand(numsteps, 3, 3)
+
+        for storage in ['npy', 'chunked']:
+            td = TrajectoryData()
+            with td.get_trajectory_writer(symbols, times=True,
+                                          storage=storage) as writer:
+                for i in range(numsteps):
+                    writer.append_step(stepids[i], cells[i], positions[i],
+                                       time=times[i])
+                self.assertEqual(writer.numsteps, numsteps)
+
+                # Invalid steps are rejected without appending anything
+                with self.assertRaises(TypeError):
+                    writer.append_step(1.5, cells[0], positions[0], time=0.)
+                with self.assertRaises(ValueError):
+                    writer.append_step(1, cells[0], positions[0][:2], time=0.)
+                with self.assertRaises(ValueError):
+                    writer.append_step(1, cells[0], positions[0])
+                with self.assertRaises(ValueError):
+                    writer.append_step(1, cells[0], positions[0], time=0.,
+                                       velocities=positions[0])
+                self.assertEqual(writer.numsteps, numsteps)
+
+            td.store()
+            self.assertEqual(td.numsteps, numsteps)
+            self.assertEqual(td.get_stepids().tolist(), stepids.tolist())
+            self.assertEqual(td.get_times().tolist(), times.tolist())
+            self.assertEqual(td.get_cells().tolist(), cells.tolist())
+            self.assertEqual(td.get_positions().tolist(), positions.tolist())
+            self.assertEqual(td.get_symbols().tolist(), symbols)
+            self.assertIsNone(td.get_velocities())
+
+        # A writer that is not closed leaves a node that does not validate
+        td = TrajectoryData()
+        writer = td.get_trajectory_writer(symbols, velocities=True)
+        writer.append_step(0, cells[0], positions[0], velocities=positions[0])
+        with self.assertRaises(ValidationError):
+            td.store()
+
+        # An exception in the with block discards the steps
+        with self.assertRaises(RuntimeError):
+            with td.get_trajectory_writer(symbols) as writer:
+                writer.append_step(0, cells[0], positions[0])
+                raise RuntimeError
+        self.assertEqual(td.get_folder_list(), ['symbols.npy'])
+
 
 class TestKpointsData(AiidaTestCase):
     """
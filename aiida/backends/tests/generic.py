@@ -310,6 +310,50 @@ class TestGroups(AiidaTestCase):
         # Cleanup
         g.delete()
 
+    def test_bulk_membership(self):
+        """
+        Test adding and removing nodes by pk, with duplicates, and the
+        batched iteration over the nodes
+        """
+        from aiida.orm.implementation.general import group as group_module
+        from aiida.orm.group import Group
+
+        nodes = [Node().store() for _ in range(7)]
+        pks = [_.pk for _ in nodes]
+
+        g = Group(name='test_bulk_membership').store()
+
+        with self.assertRaises(TypeError):
+            g.add_nodes('1')
+        with self.assertRaises(TypeError):
+            g.add_nodes([True])
+
+        # Pks, nodes and duplicates can be mixed
+        g.add_nodes(pks[:3] + [nodes[0], nodes[3].dbnode, pks[1]])
+        self.assertEquals(g.count(), 4)
+        # Adding the same nodes again does not duplicate them
+        g.add_nodes(pks[2])
+        g.add_nodes(pks)
+        self.assertEquals(g.count(), 7)
+
+        # The nodes are loaded in batches, in order of pk
+        batch_size = group_module.GROUP_NODES_BATCH_SIZE
+        group_module.GROUP_NODES_BATCH_SIZE = 3
+        try:
+            iterator = g.nodes
+            self.assertEquals(len(iterator), 7)
+            self.assertEquals([_.pk for _ in iterator], sorted(pks))
+        finally:
+            group_module.GROUP_NODES_BATCH_SIZE = batch_size
+
+        g.remove_nodes(pks[:2] + [nodes[5], pks[0]])
+        self.assertEquals(g.count(), 4)
+        self.assertEquals([_.pk for _ in g.nodes],
+                          sorted(pks[2:5] + pks[6:]))
+
+        # Cleanup
+        g.delete()
+
     def test_creation_from_dbgroup(self):
         from aiida.orm.group import Group
 
@@ -531,6 +531,32 @@ class TestNodeBasic(AiidaTestCase):
         with open(c.get_abs_path('file4.txt')) as f:
             self.assertEquals(f.read(), file_content_different)
 
+    def test_no_files(self):
+        """
+        Nodes without files get no folder in the repository
+        """
+        import os
+
+        a = Node()
+        a._set_attr('k', 1)
+        self.assertEquals(a.get_folder_list(), [])
+        with self.assertRaises(OSError):
+            a.get_abs_path('file')
+        a.store()
+
+        self.assertFalse(os.path.exists(a._repository_folder.abspath))
+        self.assertEquals(a.get_folder_list(), [])
+        self.assertEquals(load_node(a.pk).get_folder_list(), [])
+
+        # A node whose sandbox was created but stayed empty is hashed in the
+        # same way
+        b = Node()
+        b._set_attr('k', 1)
+        b._get_folder_pathsubfolder.create()
+        self.assertEquals(a.get_hash(), b.get_hash())
+        b.store()
+        self.assertFalse(os.path.exists(b._repository_folder.abspath))
+
     def test_folders(self):
         """
         Similar as test_files, but I manipulate a tree of folders
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Tests for the content-addressed object store of the repository
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from aiida.backends.testbase import AiidaTestCase
+from aiida.common.objectstore import ObjectStore, get_file_key
+
+
+class TestObjectStore(AiidaTestCase):
+    def setUp(self):
+        super(TestObjectStore, self).setUp()
+        self.root = tempfile.mkdtemp()
+        self.store = ObjectStore(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        super(TestObjectStore, self).tearDown()
+
+    def _make_folder(self, uuid, files):
+        path = os.path.join(self.root, 'node', uuid[:2], uuid[2:4], uuid[4:])
+        for relpath, content in files.iteritems():
+            file_path = os.path.join(path, relpath)
+            if not os.path.isdir(os.path.dirname(file_path)):
+                os.makedirs(os.path.dirname(file_path))
+            with open(file_path, 'w') as f:
+                f.write(content)
+        return path
+
+    def test_deduplication(self):
+        first = self._make_folder('aaaa1', {'path/a': 'same', 'path/b': 'x'})
+        second = self._make_folder('bbbb2', {'path/a': 'same'})
+
+        manifest = self.store.add_folder(first)
+        self.store.add_folder(second)
+
+        self.assertEquals(manifest['files']['path/a'],
+                          get_file_key(os.path.join(first, 'path/a')))
+        self.assertEquals(manifest['directories'], ['path'])
+        self.assertTrue(os.path.samefile(os.path.join(first, 'path/a'),
+                                         os.path.join(second, 'path/a')))
+        self.assertEquals(len(list(self.store.iter_objects())), 2)
+
+    def test_migrate_and_statistics(self):
+        self._make_folder('aaaa1', {'a': 'same', 'b': 'x'})
+        self._make_folder('bbbb2', {'a': 'same'})
+
+        self.assertEquals(sorted(self.store.migrate_section('node')),
+                          ['aaaa1', 'bbbb2'])
+        stats = self.store.get_statistics()
+        self.assertEquals(stats['manifests'], 2)
+        self.assertEquals(stats['files'], 3)
+        self.assertEquals(stats['files_size'], 9)
+        self.assertEquals(stats['objects'], 2)
+        self.assertEquals(stats['objects_size'], 5)
+        self.assertEquals(stats['unreferenced_objects'], 0)
+
+    def test_checkout(self):
+        path = self._make_folder('aaaa1', {'path/a': 'content'})
+        os.makedirs(os.path.join(path, 'empty'))
+        os.symlink('a', os.path.join(path, 'path', 'link'))
+        self.store.set_manifest('node', 'aaaa1', self.store.add_folder(path))
+
+        shutil.rmtree(path)
+        self.store.checkout(self.store.get_manifest('node', 'aaaa1'), path)
+        with open(os.path.join(path, 'path', 'link')) as f:
+            self.assertEquals(f.read(), 'content')
+        self.assertTrue(os.path.isdir(os.path.join(path, 'empty')))
+
+    def test_repack(self):
+        path = self._make_folder('aaaa1', {'small': 'small', 'large': 'x' * 100})
+        list(self.store.migrate_section('node'))
+        manifest = self.store.get_manifest('node', 'aaaa1')
+
+        self.assertEquals(self.store.repack(max_object_size=10), 1)
+        self.assertFalse(os.path.exists(
+            self.store.get_object_path(manifest['files']['small'])))
+        self.assertEquals(self.store.get_statistics()['packed_objects'], 1)
+        for use_mmap in [True, False]:
+            store = ObjectStore(self.root, use_mmap=use_mmap)
+            self.assertEquals(
+                store.get_object_content(manifest['files']['small']), 'small')
+
+        self.assertEquals(self.store.prune_checkouts(min_age=0), 1)
+        self.assertFalse(os.path.exists(path))
+        self.store.checkout(manifest, path)
+        with open(os.path.join(path, 'small')) as f:
+            self.assertEquals(f.read(), 'small')
+
+        # Folders with files that are not in the manifest are kept
+        with open(os.path.join(path, 'new'), 'w') as f:
+            f.write('new')
+        self.assertEquals(self.store.prune_checkouts(min_age=0), 0)
+
+    def test_add_file_during_repack(self):
+        """
+        Files can be added while a repack in another process removes the
+        loose objects.
+        """
+        root = self.root
+
+        def repack(stop):
+            store = ObjectStore(root, use_mmap=False)
+            while not stop.is_set():
+                store.repack()
+
+        folder = os.path.join(root, 'files')
+        os.makedirs(folder)
+        stop = multiprocessing.Event()
+        process = multiprocessing.Process(target=repack, args=(stop,))
+        process.start()
+        try:
+            store = ObjectStore(root, use_mmap=False)
+            # Each content is added several times, so that the objects are
+            # also found as loose objects while they are being packed
+            for i in range(3000):
+                path = os.path.join(folder, str(i))
+                with open(path, 'w') as f:
+                    f.write('content {}'.format(i // 20))
+                key = store.add_file(path)
+                self.assertEquals(store.get_object_content(key),
+                                  'content {}'.format(i // 20))
+        finally:
+            stop.set()
+            process.join()
+
+        self.assertEquals(len(set(key for key, _ in store.iter_objects())),
+                          150)
+
+
+class TestRepositoryFolder(AiidaTestCase):
+    def test_node_files(self):
+        from aiida.orm import load_node
+        from aiida.orm.data.singlefile import SinglefileData
+
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'file.txt')
+            with open(filename, 'w') as f:
+                f.write('content')
+            nodes = [SinglefileData(file=filename).store() for _ in range(2)]
+        finally:
+            shutil.rmtree(directory)
+
+        for node in nodes:
+            node.folder.update_manifest(force=True)
+        paths = [node.get_file_abs_path() for node in nodes]
+        self.assertTrue(os.path.samefile(*paths))
+
+        # The folder is recreated from the manifest when it is missing
+        shutil.rmtree(nodes[0].folder.abspath)
+        reloaded = load_node(nodes[0].uuid)
+        with open(reloaded.get_file_abs_path()) as f:
+            self.assertEquals(f.read(), 'content')
+
+        # Erasing the folder also removes it from the object store
+        reloaded.folder.erase()
+        self.assertIsNone(ObjectStore().get_manifest('node', reloaded.uuid))
+
+    def test_read_without_checkout(self):
+        import numpy
+        from aiida.orm import load_node
+        from aiida.orm.data.array import ArrayData
+
+        node = ArrayData()
+        node.set_array('values', numpy.arange(3))
+        node.store()
+        node.folder.update_manifest(force=True)
+        shutil.rmtree(node.folder.abspath)
+
+        reloaded = load_node(node.uuid)
+        self.assertEquals(reloaded.get_folder_list(), ['values.npy'])
+        self.assertEquals(list(reloaded.get_array('values')), [0, 1, 2])
+        self.assertFalse(os.path.exists(ObjectStore().get_folder_path(
+            'node', node.uuid)))
@@ -165,3 +165,171 @@ class TestBackendLog(AiidaTestCase):
         # finally:
         #     if handler:
         #         handler.setLevel(original_level)
+
+    def test_create_entries(self):
+        """
+        Test creating many entries at once, skipping the ones that are not
+        attached to an object
+        """
+        records = [dict(self._record, message=str(i)) for i in range(3)]
+        records.append(dict(self._record, objpk=None))
+        self._backend.log.create_entries(records)
+
+        entries = self._backend.log.find(
+            order_by=[OrderSpecifier('message', ASCENDING)])
+        self.assertEquals([_.message for _ in entries], ['0', '1', '2'])
+        self.assertEquals(entries[0].metadata, self._record['metadata'])
+
+    def test_buffered_db_log_handler(self):
+        """
+        Verify that the buffered db log handler writes the messages only
+        when flushed, and summarizes the messages that do not fit the buffer
+        """
+        from aiida.utils.logger import (BufferedDBLogHandler,
+                                        get_dblogger_extra)
+
+        calc = Calculation().store()
+        logger = logging.getLogger('aiida.test_buffered_db_log_handler')
+        logger.propagate = False
+        adapter = logging.LoggerAdapter(logger, get_dblogger_extra(calc))
+        # Large buffer size and flush interval, so that the thread does not
+        # write the entries during the test
+        handler = BufferedDBLogHandler(buffer_size=100, flush_interval=3600,
+                                       max_buffered=3)
+        logger.addHandler(handler)
+        try:
+            for i in range(5):
+                adapter.critical('message {}'.format(i))
+            self.assertEquals(len(self._backend.log.find()), 0)
+
+            handler.flush()
+            logs = self._backend.log.find(
+                order_by=[OrderSpecifier('id', ASCENDING)])
+            self.assertEquals([_.message for _ in logs[:3]],
+                              ['message 0', 'message 1', 'message 2'])
+            self.assertEquals(len(logs), 4)
+            self.assertEquals(logs[3].objpk, calc.pk)
+            self.assertIn('2 log messages were dropped', logs[3].message)
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+    def test_buffered_db_log_handler_forked(self):
+        """
+        Verify that the messages buffered by a process forked by
+        multiprocessing are written when it exits
+        """
+        import multiprocessing
+        from aiida.utils.logger import (BufferedDBLogHandler,
+                                        get_dblogger_extra)
+
+        calc = Calculation().store()
+        logger = logging.getLogger('aiida.test_buffered_db_log_handler')
+        logger.propagate = False
+        adapter = logging.LoggerAdapter(logger, get_dblogger_extra(calc))
+        handler = BufferedDBLogHandler(buffer_size=100, flush_interval=3600)
+        logger.addHandler(handler)
+        try:
+            process = multiprocessing.Process(target=adapter.critical,
+                                              args=('forked',))
+            process.start()
+            process.join()
+            self.assertEquals([_.message for _ in self._backend.log.find()],
+                              ['forked'])
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+    def test_buffered_db_log_handler_forked_billiard(self):
+        """
+        Verify that the messages buffered by a process forked by billiard
+        (as the prefork workers of celery) are written when it exits
+        """
+        try:
+            import billiard
+        except ImportError:
+            self.skipTest("Unable to import billiard")
+        from aiida.utils.logger import (BufferedDBLogHandler,
+                                        get_dblogger_extra)
+
+        calc = Calculation().store()
+        logger = logging.getLogger('aiida.test_buffered_db_log_handler')
+        logger.propagate = False
+        adapter = logging.LoggerAdapter(logger, get_dblogger_extra(calc))
+        handler = BufferedDBLogHandler(buffer_size=100, flush_interval=3600)
+        logger.addHandler(handler)
+        try:
+            process = billiard.Process(target=adapter.critical,
+                                       args=('forked',))
+            process.start()
+            process.join()
+            self.assertEquals([_.message for _ in self._backend.log.find()],
+                              ['forked'])
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+    def test_prune(self):
+        """
+        Test deleting entries by age, level and number per object
+        """
+        import datetime
+
+        old = now() - datetime.timedelta(days=10)
+        for objpk, levelname, time in [
+                (1, 'INFO', old), (1, 'ERROR', old), (1, 'INFO', now()),
+                (2, 'INFO', old), (2, 'INFO', now()), (2, 'INFO', now()),
+                (2, 'WARNING', now())]:
+            self._backend.log.create_entry(**dict(
+                self._record, objpk=objpk, levelname=levelname, time=time))
+
+        with self.assertRaises(ValueError):
+            self._backend.log.prune()
+        with self.assertRaises(ValueError):
+            self._backend.log.prune(below_level='NOTALEVEL')
+
+        # The old INFO entries
+        self.assertEquals(self._backend.log.prune(
+            older_than=5, below_level='WARNING', batch_size=1), 2)
+        self.assertEquals(len(self._backend.log.find()), 5)
+
+        # The oldest entries of object 2
+        self.assertEquals(self._backend.log.prune(max_per_object=2), 1)
+        entries = self._backend.log.find(filter_by={'objpk': 2})
+        self.assertEquals(sorted(_.levelname for _ in entries),
+                          ['INFO', 'WARNING'])
+
+        # All the old entries
+        self.assertEquals(self._backend.log.prune(older_than=5), 1)
+        self.assertEquals(len(self._backend.log.find()), 3)
+
+    def test_compression(self):
+        """
+        Test that long messages and metadata values are stored compressed
+        and read back unchanged
+        """
+        from aiida.orm.log import compress_text, decompress_text
+
+        message = u'Traceback: ' + u'å line\n' * 1000
+        self.assertTrue(len(compress_text(message, 100)) < len(message))
+        self.assertEquals(decompress_text(compress_text(message, 100)),
+                          message)
+        # Short texts are not compressed
+        self.assertEquals(compress_text(u'short', 100), u'short')
+
+        self._backend.log.create_entry(**dict(
+            self._record, message=message,
+            metadata={'full_traceback': message, 'objpk': 0}))
+        self._backend.log.create_entry(**self._record)
+
+        self.assertEquals(
+            self._backend.log.compress_entries(threshold=100), 1)
+        entries = self._backend.log.find(
+            order_by=[OrderSpecifier('id', ASCENDING)])
+        self.assertEquals(entries[0].message, message)
+        self.assertEquals(entries[0].metadata,
+                          {'full_traceback': message, 'objpk': 0})
+        self.assertEquals(entries[1].message, self._record['message'])
+        # Already compressed
+        self.assertEquals(
+            self._backend.log.compress_entries(threshold=100), 0)
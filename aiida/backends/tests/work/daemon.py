@@ -8,6 +8,8 @@
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
 from aiida.backends.testbase import AiidaTestCase
+import fcntl
+import os
 import tempfile
 from shutil import rmtree
 
@@ -16,6 +18,7 @@ from plum.wait_ons import checkpoint
 from aiida.work.persistence import Persistence
 from aiida.orm.data.base import get_true_node
 import aiida.work.daemon as daemon
+import aiida.work.defaults as defaults
 from aiida.work.process import Process
 from aiida.work.process_registry import ProcessRegistry
 from aiida.work.run import submit
@@ -156,3 +159,65 @@ class TestDaemon(AiidaTestCase):
 
         self.assertTrue(registry.has_finished(dp_rinfo.pid))
         self.assertFalse(registry.has_finished(fail_rinfo.pid))
+
+    def test_waiting_process_is_indexed(self):
+        rinfo = submit(ProcessEventsTester, _jobs_store=self.storage)
+        self.assertTrue(
+            daemon.tick_workflow_engine(self.storage, print_exceptions=False))
+        # The process is waiting on a checkpoint, which is always ticked
+        self.assertIn(rinfo.pid, self.storage.dependency_index)
+        self.assertIn(rinfo.pid, self.storage.dependency_index.get_pids_to_tick(
+            self.storage.get_running_pids()))
+
+    def test_tick_locked_process(self):
+        rinfo = submit(DummyProcess, _jobs_store=self.storage)
+        lock_path = self.storage.get_lock_path(rinfo.pid)
+        os.makedirs(os.path.dirname(lock_path))
+        with open(lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            result = daemon.tick_process(self.storage, rinfo.pid)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+        self.assertEquals(result.status, daemon.LOCKED)
+
+        result = daemon.tick_process(self.storage, rinfo.pid)
+        self.assertEquals(result.status, daemon.FINISHED)
+        # The lock file is only removed by prune_lock_files
+        self.assertTrue(os.path.isfile(lock_path))
+
+    def test_prune_lock_files(self):
+        finished = submit(DummyProcess, _jobs_store=self.storage)
+        running = submit(DummyProcess, _jobs_store=self.storage)
+        locked = submit(DummyProcess, _jobs_store=self.storage)
+        self.assertEquals(daemon.tick_process(
+            self.storage, finished.pid).status, daemon.FINISHED)
+        self.assertEquals(daemon.tick_process(
+            self.storage, locked.pid).status, daemon.FINISHED)
+        lock_path = self.storage.get_lock_path(running.pid)
+        with open(lock_path, 'a'):
+            pass
+
+        with open(self.storage.get_lock_path(locked.pid), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.assertEquals(daemon.prune_lock_files(self.storage), 1)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+        self.assertEquals(sorted(self.storage.get_lock_paths()), sorted([
+            lock_path, self.storage.get_lock_path(locked.pid)]))
+
+        self.assertEquals(daemon.prune_lock_files(self.storage), 1)
+        self.assertEquals(self.storage.get_lock_paths(), [lock_path])
+
+    def test_process_pool(self):
+        workers = defaults.daemon_workers
+        defaults.daemon_workers = 2
+        try:
+            rinfos = [submit(DummyProcess, _jobs_store=self.storage)
+                      for _ in range(4)]
+            self.assertFalse(daemon.tick_workflow_engine(
+                self.storage, print_exceptions=False))
+        finally:
+            defaults.daemon_workers = workers
+            daemon._POOL_ENGINES.pop(self.storage.store_directory).shutdown()
+
+        registry = ProcessRegistry()
+        for rinfo in rinfos:
+            self.assertTrue(registry.has_finished(rinfo.pid))
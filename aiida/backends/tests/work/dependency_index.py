@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+import tempfile
+from shutil import rmtree
+
+from plum.wait_ons import Checkpoint, WaitOnAll, WaitOnProcess
+
+from aiida.backends.testbase import AiidaTestCase
+from aiida.work.dependency_index import DependencyIndex, get_dependencies, \
+    notify, NODE, WORKFLOW
+from aiida.work.legacy.wait_on import WaitOnJobCalculation, WaitOnWorkflow
+
+
+class TestDependencyIndex(AiidaTestCase):
+    def setUp(self):
+        super(TestDependencyIndex, self).setUp()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TestDependencyIndex, self).tearDown()
+        rmtree(self.directory)
+
+    def test_get_dependencies(self):
+        self.assertIsNone(get_dependencies(None))
+        self.assertIsNone(get_dependencies(Checkpoint('cb')))
+        self.assertEquals(get_dependencies(WaitOnJobCalculation('cb', 5)),
+                          {(NODE, 5)})
+        self.assertEquals(get_dependencies(WaitOnWorkflow('cb', 5)),
+                          {(WORKFLOW, 5)})
+        self.assertEquals(get_dependencies(WaitOnProcess('cb', 7)),
+                          {(NODE, 7)})
+
+        wait_on = WaitOnAll('cb', [WaitOnJobCalculation('cb', 5),
+                                   WaitOnProcess('cb', 7)])
+        self.assertEquals(get_dependencies(wait_on), {(NODE, 5), (NODE, 7)})
+
+        # One unknown child makes the whole wait on unknown
+        wait_on = WaitOnAll('cb', [WaitOnJobCalculation('cb', 5),
+                                   Checkpoint('cb')])
+        self.assertIsNone(get_dependencies(wait_on))
+
+    def test_notify(self):
+        index = DependencyIndex(self.directory, max_idle=None)
+        index.update(1, WaitOnJobCalculation('cb', 10))
+        index.update(2, WaitOnJobCalculation('cb', 11))
+        index.update(3, Checkpoint('cb'))
+
+        # Unknown dependencies and unregistered processes are always ticked
+        self.assertEquals(index.get_pids_to_tick([1, 2, 3, 4]), [3, 4])
+
+        notify(NODE, 11)
+        self.assertEquals(index.get_pids_to_tick([1, 2]), [2])
+        # The journal has been consumed
+        self.assertEquals(index.get_pids_to_tick([1, 2]), [])
+
+    def test_prune(self):
+        index = DependencyIndex(self.directory, max_idle=None)
+        index.update(1, WaitOnJobCalculation('cb', 10))
+        index.update(2, WaitOnJobCalculation('cb', 10))
+
+        index.get_pids_to_tick([2])
+        self.assertNotIn(1, index)
+        self.assertEquals(index.get_waiting_pids(NODE, 10), {2})
+
+        index.remove(2)
+        self.assertEquals(len(index), 0)
+        self.assertEquals(index.get_waiting_pids(NODE, 10), set())
+
+    def test_max_idle(self):
+        index = DependencyIndex(self.directory, max_idle=10)
+        index.update(1, WaitOnJobCalculation('cb', 10), now=100)
+
+        self.assertEquals(index.get_pids_to_tick([1], now=105), [])
+        self.assertEquals(index.get_pids_to_tick([1], now=111), [1])
+
+    def test_save_load(self):
+        index = DependencyIndex(self.directory)
+        index.update(1, WaitOnJobCalculation('cb', 10))
+        index.update(2, Checkpoint('cb'))
+        index.save()
+
+        loaded = DependencyIndex(self.directory)
+        self.assertEquals(len(loaded), 2)
+        self.assertEquals(loaded.get_waiting_pids(NODE, 10), {1})
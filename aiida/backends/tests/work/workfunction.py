@@ -11,7 +11,7 @@
 import plum.process_monitor
 from aiida.backends.testbase import AiidaTestCase
 from aiida.work.workfunction import workfunction
-from aiida.orm.data.base import get_true_node
+from aiida.orm.data.base import get_true_node, Int
 from aiida.work.run import async, run
 import aiida.work.util as util
 
@@ -27,6 +27,25 @@ def return_input(inp):
     return {'result': inp}
 
 
+@workfunction
+def add(a, b):
+    return a + b
+
+
+@workfunction
+def add_twice(a, b):
+    return add(add(a, b), b)
+
+
+_num_calls = []
+
+
+@workfunction(cache=True)
+def memoized_add(a, b):
+    _num_calls.append(None)
+    return {'result': Int(a.value + b.value)}
+
+
 class TestWf(AiidaTestCase):
     def setUp(self):
         super(TestWf, self).setUp()
@@ -49,3 +68,43 @@ class TestWf(AiidaTestCase):
     def test_run(self):
         self.assertTrue(run(simple_wf)['result'])
         self.assertTrue(run(return_input, get_true_node())['result'])
+
+    def test_memoized(self):
+        from aiida.common.links import LinkType
+        from aiida.utils.capturing import Capturing
+        from aiida.cmdline.commands.work import Work
+
+        del _num_calls[:]
+        result = memoized_add(Int(1), Int(2))['result']
+        self.assertEquals(len(_num_calls), 1)
+
+        # Same input values, so the existing output is returned
+        cached = memoized_add(Int(1), Int(2))['result']
+        self.assertEquals(len(_num_calls), 1)
+        self.assertEquals(cached.uuid, result.uuid)
+        self.assertEquals(
+            len(result.get_inputs(link_type=LinkType.RETURN)), 2)
+
+        self.assertEquals(memoized_add(Int(1), Int(3))['result'].value, 4)
+        self.assertEquals(len(_num_calls), 2)
+
+        calc = result.get_inputs(link_type=LinkType.CREATE)[0]
+        with Capturing() as output:
+            Work().cache(str(calc.pk))
+        self.assertIn('memoized_add', ''.join(output))
+
+        # Invalidate all the runs, including the one that was reused
+        with Capturing():
+            Work().cache('--invalidate', '-p', 'memoized_add')
+        memoized_add(Int(1), Int(2))
+        self.assertEquals(len(_num_calls), 3)
+
+    def test_ephemeral(self):
+        from aiida.orm import Node
+        from aiida.orm.querybuilder import QueryBuilder
+
+        num_nodes = QueryBuilder().append(Node).count()
+        # Plain values go through the ports, also for the nested calls
+        self.assertEquals(add(1, 2, _ephemeral=True), 3)
+        self.assertEquals(add_twice(1, 2, _ephemeral=True), 5)
+        self.assertEquals(QueryBuilder().append(Node).count(), num_nodes)
@@ -815,7 +815,8 @@ class _Bands(VerdiCommandWithSubcommands, Listable, Visualizable, Exportable):
         from aiida.backends.utils import get_automatic_user
         from aiida.orm.implementation import User
         from aiida.orm.implementation import Group
-        from aiida.orm.data.structure import (get_formula, get_symbols_string)
+        from aiida.orm.data.structure import (get_formula, get_symbols_string,
+                                              SITES_IN_ARRAYS)
         from aiida.orm.data.array.bands import BandsData
         from aiida.orm.data.structure import StructureData
 
@@ -842,7 +843,8 @@ class _Bands(VerdiCommandWithSubcommands, Listable, Visualizable, Exportable):
 
         qb.append(StructureData, tag="sdata", ancestor_of="bdata",
                   # We don't care about the creator of StructureData
-                  project=["id", "attributes.kinds", "attributes.sites"])
+                  project=["id", "attributes.kinds", "attributes.sites",
+                           "attributes.site_storage"])
 
         qb.order_by({StructureData: {'ctime': 'desc'}})
 
@@ -851,7 +853,8 @@ class _Bands(VerdiCommandWithSubcommands, Listable, Visualizable, Exportable):
         entry_list = []
         already_visited_bdata = set()
         if list_data.count() > 0:
-            for [bid, blabel, bdate, sid, akinds, asites] in list_data.all():
+            for [bid, blabel, bdate, sid, akinds, asites,
+                 astorage] in list_data.all():
 
                 # We process only one StructureData per BandsData.
                 # We want to process the closest StructureData to
@@ -878,26 +881,32 @@ class _Bands(VerdiCommandWithSubcommands, Listable, Visualizable, Exportable):
                         continue
 
                 # We want only the StructureData that have attributes
-                if akinds is None or asites is None:
+                if akinds is None or (asites is None and
+                                      astorage != SITES_IN_ARRAYS):
                     continue
 
-                symbol_dict = {}
-                for k in akinds:
-                    symbols = k['symbols']
-                    weights = k['weights']
-                    symbol_dict[k['name']] = get_symbols_string(symbols,
-                                                                weights)
-
-                try:
-                    symbol_list = []
-                    for s in asites:
-                        symbol_list.append(symbol_dict[s['kind_name']])
-                    formula = get_formula(symbol_list,
-                                          mode=args.formulamode)
-                # If for some reason there is no kind with the name
-                # referenced by the site
-                except KeyError:
-                    formula = "<<UNKNOWN>>"
+                if asites is None:
+                    # The sites are stored in arrays in the repository
+                    formula = load_node(sid).get_formula(
+                        mode=args.formulamode)
+                else:
+                    symbol_dict = {}
+                    for k in akinds:
+                        symbols = k['symbols']
+                        weights = k['weights']
+                        symbol_dict[k['name']] = get_symbols_string(symbols,
+                                                                    weights)
+
+                    try:
+                        symbol_list = []
+                        for s in asites:
+                            symbol_list.append(symbol_dict[s['kind_name']])
+                        formula = get_formula(symbol_list,
+                                              mode=args.formulamode)
+                    # If for some reason there is no kind with the name
+                    # referenced by the site
+                    except KeyError:
+                        formula = "<<UNKNOWN>>"
                 entry_list.append([str(bid), str(formula),
                                    bdate.strftime('%d %b %Y'), blabel])
 
@@ -1048,7 +1057,8 @@ class _Structure(VerdiCommandWithSubcommands,
         from aiida.backends.utils import get_automatic_user
         from aiida.orm.implementation import User
         from aiida.orm.implementation import Group
-        from aiida.orm.data.structure import (get_formula, get_symbols_string)
+        from aiida.orm.data.structure import (get_formula, get_symbols_string,
+                                              SITES_IN_ARRAYS)
 
         qb = QueryBuilder()
         if args.all_users is False:
@@ -1063,7 +1073,7 @@ class _Structure(VerdiCommandWithSubcommands,
         qb.append(StructureData, tag="struc", created_by="creator",
                   filters=st_data_filters,
                   project=["id", "label", "attributes.kinds",
-                           "attributes.sites"])
+                           "attributes.sites", "attributes.site_storage"])
 
         group_filters = {}
         self.query_group_qb(group_filters, args)
@@ -1075,7 +1085,8 @@ class _Structure(VerdiCommandWithSubcommands,
 
         entry_list = []
         if struc_list_data.count() > 0:
-            for [id, label, akinds, asites] in struc_list_data.all():
+            for [id, label, akinds, asites,
+                 astorage] in struc_list_data.all():
 
                 # If symbols are defined there is a filtering of the structures
                 # based on the element
@@ -1092,26 +1103,32 @@ class _Structure(VerdiCommandWithSubcommands,
                         sys.exit(1)
 
                 # We want only the StructureData that have attributes
-                if akinds is None or asites is None:
+                if akinds is None or (asites is None and
+                                      astorage != SITES_IN_ARRAYS):
                     continue
 
-                symbol_dict = {}
-                for k in akinds:
-                    symbols = k['symbols']
-                    weights = k['weights']
-                    symbol_dict[k['name']] = get_symbols_string(symbols,
-                                                                weights)
-
-                try:
-                    symbol_list = []
-                    for s in asites:
-                        symbol_list.append(symbol_dict[s['kind_name']])
-                    formula = get_formula(symbol_list,
-                                          mode=args.formulamode)
-                # If for some reason there is no kind with the name
-                # referenced by the site
-                except KeyError:
-                    formula = "<<UNKNOWN>>"
+                if asites is None:
+                    # The sites are stored in arrays in the repository
+                    formula = load_node(id).get_formula(
+                        mode=args.formulamode)
+                else:
+                    symbol_dict = {}
+                    for k in akinds:
+                        symbols = k['symbols']
+                        weights = k['weights']
+                        symbol_dict[k['name']] = get_symbols_string(symbols,
+                                                                    weights)
+
+                    try:
+                        symbol_list = []
+                        for s in asites:
+                            symbol_list.append(symbol_dict[s['kind_name']])
+                        formula = get_formula(symbol_list,
+                                              mode=args.formulamode)
+                    # If for some reason there is no kind with the name
+                    # referenced by the site
+                    except KeyError:
+                        formula = "<<UNKNOWN>>"
                 entry_list.append([str(id), str(formula), label])
 
         return entry_list
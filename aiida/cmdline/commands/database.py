@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+This allows to manage the database from command line.
+"""
+import sys
+
+from aiida.cmdline.baseclass import VerdiCommandWithSubcommands
+from aiida.backends.utils import load_dbenv, is_dbenv_loaded
+
+
+class Database(VerdiCommandWithSubcommands):
+    """
+    Manage the database
+
+    Manage the indexes on the attributes and extras of the nodes.
+    """
+
+    def __init__(self):
+        """
+        A dictionary with valid commands and functions to be called.
+        """
+        self.valid_subcommands = {
+            'index': (self.database_index, self.complete_none),
+        }
+
+    def database_index(self, *args):
+        """
+        List, suggest, create and drop indexes on paths of the attributes and
+        extras of the nodes (SQLAlchemy backend only).
+        """
+        import argparse
+
+        from aiida.backends.sqlalchemy import indexes
+
+        parser = argparse.ArgumentParser(
+            prog=self.get_full_command_name(),
+            description='Manage the indexes on paths of the attributes and '
+                        'extras of the nodes, used by the QueryBuilder '
+                        'filters on these paths.')
+        subparsers = parser.add_subparsers(dest='action')
+
+        subparsers.add_parser(
+            'list', help='List the indexes on the nodes with their usage '
+                         'statistics')
+
+        suggest_parser = subparsers.add_parser(
+            'suggest', help='Count the logged QueryBuilder filters for each '
+                            'index that they could use (set the '
+                            'querybuilder.log_filters property with '
+                            "'verdi devel setproperty' to log them)")
+        suggest_parser.add_argument('-n', '--number', type=int, default=10,
+                                    help='The number of indexes to show '
+                                         '(default: %(default)s)')
+        suggest_parser.add_argument('--clear', action='store_true',
+                                    help='Clear the filter log afterwards')
+
+        subparsers.add_parser(
+            'create-builtin', help='Create the indexes used by AiiDA that '
+                                   'are missing in databases created with '
+                                   'older versions')
+
+        for action, help_text in [('create', 'Create an index'),
+                                  ('drop', 'Drop an index created with '
+                                           'create')]:
+            subparser = subparsers.add_parser(action, help=help_text)
+            subparser.add_argument('path',
+                                   help="The path of the attribute or extra, "
+                                        "e.g. 'attributes.energy' or "
+                                        "'extras.tag', or the name of the "
+                                        "index to drop")
+            subparser.add_argument('-k', '--kind', choices=indexes.INDEX_KINDS,
+                                   help="The type of the values compared "
+                                        "in the filters, or 'gin' for the "
+                                        "'contains' and 'has_key' filters")
+            subparser.add_argument('-t', '--node-type', default=None,
+                                   help="Only index the nodes of this type, "
+                                        "as in the QueryBuilder filters, e.g. "
+                                        "'data.parameter.%%'")
+        parsed_args = parser.parse_args(args)
+
+        if not is_dbenv_loaded():
+            load_dbenv()
+
+        from aiida.backends.settings import BACKEND
+        from aiida.backends.profile import BACKEND_SQLA
+
+        if BACKEND != BACKEND_SQLA:
+            print >> sys.stderr, ("Indexes on attributes and extras are only "
+                                  "available with the {} backend".format(
+                                      BACKEND_SQLA))
+            sys.exit(1)
+
+        if parsed_args.action == 'list':
+            for index in indexes.list_indexes():
+                print "{}{}{}".format(
+                    index['name'], ' (created with verdi)'
+                    if index['managed'] else '',
+                    '' if index['valid'] else ' INVALID')
+                print "  {}".format(index['definition'])
+                print "  scans: {}, entries read: {}, size: {} bytes".format(
+                    index['scans'], index['tuples_read'], index['size'])
+
+        elif parsed_args.action == 'suggest':
+            existing = set(_['name'] for _ in indexes.list_indexes())
+            statistics = indexes.get_filter_statistics()
+            if not statistics:
+                print "No filters on attributes or extras were logged"
+            for count, column, path, kind, node_type, name in \
+                    statistics[:parsed_args.number]:
+                print "{:8d} {}.{} ({}{}){}".format(
+                    count, column, '.'.join(path), kind,
+                    ', {}'.format(node_type) if node_type else '',
+                    ' [{}]'.format(name) if name in existing else '')
+            if parsed_args.clear:
+                from aiida.orm.querybuilder import get_filter_log_path
+                open(get_filter_log_path(), 'w').close()
+
+        elif parsed_args.action == 'create-builtin':
+            created = indexes.create_builtin_indexes()
+            for name in created:
+                print "Index {} created".format(name)
+            if not created:
+                print "All the indexes used by AiiDA exist"
+
+        else:
+            if parsed_args.action == 'drop' and parsed_args.kind is None:
+                name = parsed_args.path
+            else:
+                column, _, path = parsed_args.path.partition('.')
+                if parsed_args.kind is None or not path:
+                    print >> sys.stderr, ("Specify the path as "
+                                          "COLUMN.KEY[.KEY...] and its kind")
+                    sys.exit(1)
+                name = indexes.get_index_name(column, path.split('.'),
+                                              parsed_args.kind,
+                                              parsed_args.node_type)
+            try:
+                if parsed_args.action == 'create':
+                    name = indexes.create_index(
+                        column, path.split('.'), parsed_args.kind,
+                        parsed_args.node_type)
+                    print "Index {} created".format(name)
+                else:
+                    indexes.drop_index(name)
+                    print "Index {} dropped".format(name)
+            except ValueError as e:
+                print >> sys.stderr, e.message
+                sys.exit(1)
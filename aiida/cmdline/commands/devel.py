@@ -111,7 +111,13 @@ class Devel(VerdiCommandWithSubcommands):
             'listislands': (self.run_listislands, self.complete_none),
             'play': (self.run_play, self.complete_none),
             'getresults': (self.calculation_getresults, self.complete_none),
-            'tickd': (self.tick_daemon, self.complete_none)
+            'tickd': (self.tick_daemon, self.complete_none),
+            'repository': (self.run_repository, self.complete_none),
+            'attributestojson': (self.run_attributes_to_json,
+                                 self.complete_none),
+            'attributestojsonb': (self.run_attributes_to_jsonb,
+                                  self.complete_none),
+            'prunelogs': (self.run_prune_logs, self.complete_none),
         }
 
         # The content of the dict is:
@@ -372,6 +378,275 @@ class Devel(VerdiCommandWithSubcommands):
         from aiida.daemon.tasks import manual_tick_all
         manual_tick_all()
 
+    def run_repository(self, *args):
+        """
+        Report the space saved by the object store of the repository, migrate
+        the existing repository folders to the object store, or move the
+        loose objects to the pack files.
+        """
+        import argparse
+
+        from aiida.common import objectstore
+        from aiida.common.folders import _valid_sections
+        from aiida.common.objectstore import get_object_store
+        from aiida.common.setup import get_property
+
+        parser = argparse.ArgumentParser(
+            prog=self.get_full_command_name(),
+            description='Manage the content-addressed object store of the '
+                        'file repository.')
+        parser.add_argument('action', choices=['stats', 'migrate', 'repack'],
+                            help="'stats' reports the deduplication savings, "
+                                 "'migrate' moves all the existing folders "
+                                 "of the repository to the object store, "
+                                 "'repack' moves the small loose objects to "
+                                 "the pack files and removes the folders "
+                                 "that can be checked out again from the "
+                                 "object store")
+        parser.add_argument('--max-object-size', type=int,
+                            default=objectstore.DEFAULT_MAX_PACKED_OBJECT_SIZE,
+                            help="The size in bytes of the largest objects "
+                                 "that are packed (default: %(default)s)")
+        parser.add_argument('--min-age', type=int,
+                            default=objectstore.DEFAULT_MIN_CHECKOUT_AGE,
+                            help="Only remove the folders that did not "
+                                 "change for this number of seconds "
+                                 "(default: %(default)s)")
+        parsed_args = parser.parse_args(args)
+
+        store = get_object_store()
+        backend = get_property('repository.backend')
+
+        if parsed_args.action == 'migrate':
+            if backend == 'folder':
+                print >> sys.stderr, (
+                    "Warning: the repository.backend property is set to "
+                    "'folder', new nodes will not use the object store")
+            for section in _valid_sections:
+                count = 0
+                for _ in store.migrate_section(section):
+                    count += 1
+                    if count % 1000 == 0:
+                        print "{} {} folders migrated...".format(count, section)
+                print "{} {} folders migrated".format(count, section)
+
+        elif parsed_args.action == 'repack':
+            if backend != 'packed':
+                print >> sys.stderr, (
+                    "The repository.backend property must be set to 'packed' "
+                    "to use pack files")
+                sys.exit(1)
+            print "{} objects packed".format(store.repack(
+                max_object_size=parsed_args.max_object_size))
+            print "{} folders removed".format(store.prune_checkouts(
+                min_age=parsed_args.min_age))
+
+        stats = store.get_statistics()
+        saved = stats['files_size'] - stats['objects_size']
+        print "Folders in the object store: {}".format(stats['manifests'])
+        print "Files:   {} ({} bytes)".format(
+            stats['files'], stats['files_size'])
+        print "Objects: {} ({} bytes)".format(
+            stats['objects'], stats['objects_size'])
+        print "Saved:   {} files, {} bytes ({:.1f}%)".format(
+            stats['files'] - stats['objects'], saved,
+            100. * saved / stats['files_size'] if stats['files_size'] else 0.)
+        print "Packed objects: {}".format(stats['packed_objects'])
+        if stats['unreferenced_objects']:
+            print "Unreferenced objects: {}".format(
+                stats['unreferenced_objects'])
+
+    def run_attributes_to_json(self, *args):
+        """
+        Store the large lists and dicts of the attributes and extras of the
+        existing nodes in a single json row (Django backend only).
+        """
+        import argparse
+
+        if not is_dbenv_loaded():
+            load_dbenv()
+
+        from aiida.backends.settings import BACKEND
+        from aiida.backends.profile import BACKEND_DJANGO
+
+        parser = argparse.ArgumentParser(
+            prog=self.get_full_command_name(),
+            description='Store the level-zero lists and dicts of attributes '
+                        'and extras that were unpacked in more than THRESHOLD '
+                        'rows as a single json row, as is done for new nodes.')
+        parser.add_argument('-t', '--threshold', type=int, default=None,
+                            help="The maximum number of rows of an unpacked "
+                                 "value (default: the current threshold)")
+        parsed_args = parser.parse_args(args)
+
+        if BACKEND != BACKEND_DJANGO:
+            print >> sys.stderr, ("Attributes are already stored as json "
+                                  "with the {} backend".format(BACKEND))
+            sys.exit(1)
+
+        from aiida.backends.djsite.db.models import DbAttribute, DbExtra
+
+        for cls in [DbAttribute, DbExtra]:
+            count = 0
+            for pk, key in cls.store_large_values_as_json(
+                    threshold=parsed_args.threshold):
+                count += 1
+                print "{} of node {}: '{}' stored as json".format(
+                    cls.__name__, pk, key)
+            print "{} {} values migrated".format(count, cls.__name__)
+
+    def run_prune_logs(self, *args):
+        """
+        Delete old log entries from the DbLog table according to a retention
+        policy, and compress the long messages of the remaining ones.
+        """
+        import argparse
+        from aiida.utils.logger import LOG_LEVELS
+
+        parser = argparse.ArgumentParser(
+            prog=self.get_full_command_name(),
+            description='Delete log entries in small batches, so that the '
+                        'daemon can keep logging. The entries older than '
+                        'the given age and below the given level are '
+                        'deleted (if only one of the two is given, only that '
+                        'condition is used); then, only the newest entries '
+                        'of each object are kept.')
+        parser.add_argument('-a', '--older-than', type=int, default=None,
+                            metavar='DAYS',
+                            help="Delete the entries older than DAYS days")
+        parser.add_argument('-l', '--below-level', default=None,
+                            choices=sorted(LOG_LEVELS, key=LOG_LEVELS.get),
+                            help="Delete the entries with a level lower than "
+                                 "this one")
+        parser.add_argument('-n', '--max-per-object', type=int, default=None,
+                            help="Keep only the newest MAX_PER_OBJECT entries "
+                                 "of each object")
+        parser.add_argument('-c', '--compress', action='store_true',
+                            help="Also compress the long messages and "
+                                 "metadata of the remaining entries (see the "
+                                 "logging.db_compress_threshold property)")
+        parser.add_argument('-b', '--batch-size', type=int, default=1000,
+                            help="The number of entries deleted or "
+                                 "compressed in each transaction (default: "
+                                 "%(default)s)")
+        parsed_args = parser.parse_args(args)
+
+        if (parsed_args.older_than is None and
+                parsed_args.below_level is None and
+                parsed_args.max_per_object is None and
+                not parsed_args.compress):
+            print >> sys.stderr, ("Specify a retention policy, or --compress "
+                                  "to only compress the entries")
+            sys.exit(1)
+
+        if not is_dbenv_loaded():
+            load_dbenv()
+
+        from aiida.orm.backend import construct
+
+        log = construct().log
+        if (parsed_args.older_than is not None or
+                parsed_args.below_level is not None or
+                parsed_args.max_per_object is not None):
+            deleted = log.prune(older_than=parsed_args.older_than,
+                                below_level=parsed_args.below_level,
+                                max_per_object=parsed_args.max_per_object,
+                                batch_size=parsed_args.batch_size)
+            print "{} log entries deleted".format(deleted)
+        if parsed_args.compress:
+            compressed = log.compress_entries(
+                batch_size=parsed_args.batch_size)
+            print "{} log entries compressed".format(compressed)
+
+    def run_attributes_to_jsonb(self, *args):
+        """
+        Migrate the attributes and extras of the nodes of a Django database
+        to JSONB columns in batches, while the daemon is running.
+        """
+        import argparse
+
+        if not is_dbenv_loaded():
+            load_dbenv()
+
+        from aiida.backends.djsite import jsonbmigration
+        from aiida.backends.settings import BACKEND
+        from aiida.backends.profile import BACKEND_DJANGO
+        from aiida.common.utils import query_yes_no
+
+        parser = argparse.ArgumentParser(
+            prog=self.get_full_command_name(),
+            description='Migrate the attributes and extras of a Django '
+                        'database to the JSONB columns used by the '
+                        'SQLAlchemy backend. The migration can run while '
+                        'the daemon is running, and can be interrupted and '
+                        'run again to migrate the remaining nodes.')
+        parser.add_argument('action', nargs='?', default='migrate',
+                            choices=['migrate', 'verify', 'finalize',
+                                     'status'],
+                            help="'migrate' migrates the nodes that were not "
+                                 "migrated yet, 'verify' migrates again the "
+                                 "nodes that changed after their migration, "
+                                 "'finalize' migrates and verifies all the "
+                                 "nodes with the daemon stopped and prepares "
+                                 "the columns for the transition to "
+                                 "SQLAlchemy, 'status' reports the progress "
+                                 "(default: %(default)s)")
+        parser.add_argument('-b', '--batch-size', type=int,
+                            default=jsonbmigration.DEFAULT_BATCH_SIZE,
+                            help="The number of nodes migrated in each "
+                                 "transaction (default: %(default)s)")
+        parser.add_argument('-j', '--jobs', type=int, default=1,
+                            help="The number of processes migrating batches "
+                                 "in parallel (default: %(default)s)")
+        parsed_args = parser.parse_args(args)
+
+        if BACKEND != BACKEND_DJANGO:
+            print >> sys.stderr, ("Attributes are already stored in JSONB "
+                                  "columns with the {} backend".format(BACKEND))
+            sys.exit(1)
+
+        kwargs = {'batch_size': parsed_args.batch_size,
+                  'jobs': parsed_args.jobs}
+        failed = {}
+        try:
+            if parsed_args.action == 'finalize':
+                if not query_yes_no("The daemon must be stopped and the "
+                                    "database backed up. Do you want to "
+                                    "continue?", "no"):
+                    sys.exit(0)
+
+            if parsed_args.action in ['migrate', 'finalize']:
+                migrated, failed = jsonbmigration.migrate(
+                    progress=jsonbmigration.ProgressReporter('Migrating'),
+                    **kwargs)
+                print "{} nodes migrated".format(migrated)
+
+            if parsed_args.action in ['verify', 'finalize'] and not failed:
+                stale, failed = jsonbmigration.verify(
+                    progress=jsonbmigration.ProgressReporter('Verifying'),
+                    **kwargs)
+                print "{} nodes changed and migrated again".format(
+                    len(stale) - len(failed))
+
+            if parsed_args.action == 'finalize' and not failed:
+                jsonbmigration.finalize()
+                print ("Migration finalized, the transition to SQLAlchemy "
+                       "will keep the migrated attributes and extras")
+        except ValueError as e:
+            print >> sys.stderr, e.message
+            sys.exit(1)
+
+        for pk, reason in sorted(failed.iteritems()):
+            print >> sys.stderr, "Node {} not migrated: {}".format(pk, reason)
+
+        if parsed_args.action != 'finalize':
+            stats = jsonbmigration.get_statistics()
+            print "Migrated nodes: {}/{} ({} rows)".format(
+                stats['migrated_nodes'], stats['nodes'],
+                stats['migrated_rows'])
+        if failed:
+            sys.exit(1)
+
     def run_listproperties(self, *args):
         """
         List all found global AiiDA properties.
@@ -29,6 +29,7 @@ class Work(VerdiCommandWithSubcommands):
             self.report.__name__: (self.report, self.complete_none),
             self.tree.__name__: (self.tree, self.complete_none),
             self.checkpoint.__name__: (self.checkpoint, self.complete_none),
+            self.cache.__name__: (self.cache, self.complete_none),
         }
 
     def list(self, *args):
@@ -51,6 +52,11 @@ class Work(VerdiCommandWithSubcommands):
         with ctx:
             do_checkpoint.invoke(ctx)
 
+    def cache(self, *args):
+        ctx = do_cache.make_context('cache', list(args))
+        with ctx:
+            do_cache.invoke(ctx)
+
 
 @click.command('list', context_settings=CONTEXT_SETTINGS)
 @click.option('-p', '--past-days', type=int,
@@ -187,6 +193,84 @@ def do_checkpoint(pks):
             print("Unable to show checkpoint for calculation '{}'".format(pk))
 
 
+@click.command('cache', context_settings=CONTEXT_SETTINGS)
+@click.option('-p', '--process-label', type=str, default=None,
+              help="Only select the runs of the workfunction or process with "
+                   "this name")
+@click.option('--invalidate', is_flag=True, default=False,
+              help="Invalidate the selected runs, so that they are not "
+                   "reused anymore")
+@click.argument('pks', nargs=-1, type=int)
+def do_cache(process_label, invalidate, pks):
+    """
+    List the finished runs whose outputs can be reused by memoized
+    workfunctions (or cached processes), or invalidate them
+    """
+    import collections
+    from aiida.backends.utils import load_dbenv, is_dbenv_loaded
+    if not is_dbenv_loaded():
+        load_dbenv()
+    from aiida.common.utils import str_timedelta
+    from aiida.orm import Node
+    from aiida.orm.calculation.work import WorkCalculation
+    from aiida.orm.querybuilder import QueryBuilder
+    from aiida.work.util import PROCESS_LABEL_ATTR
+    import aiida.utils.timezone as timezone
+
+    hash_key = 'extras.{}'.format(WorkCalculation._HASH_EXTRA_KEY)
+    cached_from_key = 'extras.{}'.format(
+        WorkCalculation._CACHED_FROM_EXTRA_KEY)
+    label_key = 'attributes.{}'.format(PROCESS_LABEL_ATTR)
+
+    filters = {
+        hash_key: {'like': '%'},
+        'attributes.{}'.format(WorkCalculation.FINISHED_KEY): True,
+    }
+    if process_label is not None:
+        filters[label_key] = process_label
+    if pks:
+        filters['id'] = {'in': list(pks)}
+
+    if invalidate:
+        qb = QueryBuilder()
+        qb.append(WorkCalculation, filters=filters, project=['*'])
+        count = 0
+        for calc, in qb.all():
+            calc.del_extra(WorkCalculation._HASH_EXTRA_KEY)
+            count += 1
+        print "Invalidated {} cached run(s)".format(count)
+        return
+
+    # Count how many times the outputs of each run were reused
+    qb = QueryBuilder()
+    qb.append(Node, filters={cached_from_key: {'like': '%'}},
+              project=[cached_from_key])
+    reused = collections.Counter(uuid for uuid, in qb.iterall())
+
+    qb = QueryBuilder()
+    qb.append(WorkCalculation, filters=filters, tag='calculation',
+              project=['id', 'uuid', 'ctime', label_key, hash_key])
+    qb.order_by({'calculation': ['id']})
+
+    now = timezone.now()
+    table = []
+    for res in qb.iterdict():
+        calc = res['calculation']
+        creation_time = str_timedelta(
+            timezone.delta(calc['ctime'], now), negative_to_zero=True,
+            max_num_fields=1)
+        table.append([
+            calc['id'],
+            creation_time,
+            calc[label_key],
+            reused[str(calc['uuid'])],
+            calc[hash_key][:12],
+        ])
+
+    print(tabulate(table, headers=["PID", "Creation time", "ProcessLabel",
+                                   "Reused", "Hash"]))
+
+
 def _build_query(order_by=None, limit=None, past_days=None):
     from aiida.orm.querybuilder import QueryBuilder
     from aiida.orm.calculation.work import WorkCalculation
@@ -40,6 +40,7 @@ from aiida.cmdline.commands.code import Code
 from aiida.cmdline.commands.computer import Computer
 from aiida.cmdline.commands.daemon import Daemon
 from aiida.cmdline.commands.data import Data
+from aiida.cmdline.commands.database import Database
 from aiida.cmdline.commands.devel import Devel
 from aiida.cmdline.commands.exportfile import Export
 from aiida.cmdline.commands.group import Group
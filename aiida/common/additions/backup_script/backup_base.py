@@ -335,9 +335,28 @@ class AbstractBackup(object):
 
         return REPOSITORY_PATH
 
+    @staticmethod
+    def _get_manifest(object_store, source_dir):
+        """
+        Return the manifest of a repository folder from the object store, or
+        None if the folder is not in the store.
+
+        :param object_store: the ObjectStore of the repository
+        :param source_dir: the absolute path of the folder
+        """
+        parts = os.path.relpath(source_dir, object_store.root).split(os.sep)
+        if len(parts) < 2 or parts[0] == os.pardir:
+            return None
+        return object_store.get_manifest(parts[0], ''.join(parts[1:]))
+
     def _backup_needed_files(self, query_sets):
+        from aiida.common.objectstore import ObjectStore
+
         REPOSITORY_PATH = self._get_repository_path()
         repository_path = os.path.normpath(REPOSITORY_PATH)
+        # The checkouts of the folders that are in the object store may have
+        # been pruned, in which case the files are copied from their manifest
+        object_store = ObjectStore(os.path.join(repository_path, 'repository'))
 
         parent_dir_set = set()
         copy_counter = 0
@@ -363,13 +382,31 @@ class AbstractBackup(object):
                 relative_dir = source_dir[(len(repository_path) + 1):]
                 destination_dir = os.path.join(self._backup_dir, relative_dir)
 
+                manifest = None
+                if not os.path.isdir(source_dir):
+                    manifest = self._get_manifest(object_store, source_dir)
+                    # Nodes without files have no folder in the repository
+                    if manifest is None:
+                        copy_counter += 1
+                        continue
+
                 # Remove the destination directory if it already exists
                 if os.path.exists(destination_dir):
                     shutil.rmtree(destination_dir)
 
                 # Copy the needed directory
                 try:
-                    shutil.copytree(source_dir, destination_dir, True, None)
+                    if manifest is None:
+                        shutil.copytree(source_dir, destination_dir, True,
+                                        None)
+                    else:
+                        object_store.checkout(manifest, destination_dir,
+                                              link=False)
+                except KeyError as e:
+                    self._logger.warning(
+                        "Problem copying directory {} ".format(source_dir) +
+                        "to {}. ".format(destination_dir) +
+                        "More information: {}".format(e.message))
                 except EnvironmentError as e:
                     self._logger.warning(
                         "Problem copying directory {} ".format(source_dir) +
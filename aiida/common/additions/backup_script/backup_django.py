@@ -74,14 +74,16 @@ class Backup(AbstractBackup):
         :param item:
         :return:
         """
+        # The folder_limit is the path of the folder, without checking out
+        # the folders of the object store whose checkout was pruned
         if type(item) == DbWorkflow:
             source_dir = os.path.normpath(RepositoryFolder(
                 section=Workflow._section_name,
-                uuid=item.uuid).abspath)
+                uuid=item.uuid).folder_limit)
         elif type(item) == DbNode:
             source_dir = os.path.normpath(RepositoryFolder(
                 section=Node._section_name,
-                uuid=item.uuid).abspath)
+                uuid=item.uuid).folder_limit)
         else:
             # Raise exception
             self._logger.error(
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Configuration of the caching of calculations.
+
+When caching is enabled for a calculation (or process) class, a new
+calculation whose hash is identical to the one of a calculation that already
+finished is not run: the outputs of the finished calculation are cloned
+instead. Caching is configured with the ``caching.default_enabled``,
+``caching.enabled_for`` and ``caching.disabled_for`` properties (see
+``verdi devel setproperty``).
+"""
+import contextlib
+import inspect
+
+from aiida.common.setup import get_property
+from aiida.common.utils import get_class_string
+
+# Overrides of the configuration, keyed by class string (None for the
+# default), set with the enable_caching and disable_caching context managers
+_overrides = {}
+
+# Cached values of the caching.* properties, read once rather than every time
+# a calculation is submitted or a node is stored
+_config = None
+
+
+def _get_class_strings(property_name):
+    """
+    Return the set of class strings in a colon-separated property.
+    """
+    value = get_property(property_name)
+    if not value:
+        return set()
+    return set(s.strip() for s in value.split(':') if s.strip())
+
+
+def _get_config():
+    """
+    Return a dictionary with the sets of the class strings for which caching
+    is enabled and disabled, and whether it is enabled by default.
+    """
+    global _config
+    if _config is None:
+        _config = {
+            'enabled_for': _get_class_strings('caching.enabled_for'),
+            'disabled_for': _get_class_strings('caching.disabled_for'),
+            'default_enabled': get_property('caching.default_enabled'),
+        }
+    return _config
+
+
+def get_use_cache(node_class):
+    """
+    Return whether caching is enabled for a class.
+
+    The first class in the method resolution order of `node_class` that is
+    explicitly enabled or disabled decides; if none is, the default applies.
+
+    :param node_class: a calculation or process class
+    :return: a boolean
+    """
+    config = _get_config()
+    enabled = config['enabled_for']
+    disabled = config['disabled_for']
+
+    for cls in inspect.getmro(node_class):
+        class_string = get_class_string(cls)
+        if class_string in _overrides:
+            return _overrides[class_string]
+        if class_string in disabled:
+            return False
+        if class_string in enabled:
+            return True
+
+    if None in _overrides:
+        return _overrides[None]
+    return config['default_enabled']
+
+
+@contextlib.contextmanager
+def _override(node_class, value):
+    key = None if node_class is None else get_class_string(node_class)
+    missing = object()
+    old_value = _overrides.get(key, missing)
+    _overrides[key] = value
+    try:
+        yield
+    finally:
+        if old_value is missing:
+            del _overrides[key]
+        else:
+            _overrides[key] = old_value
+
+
+def enable_caching(node_class=None):
+    """
+    Context manager to enable caching, regardless of the configuration.
+
+    :param node_class: the class to enable caching for, or None to enable it
+        for all the classes that are not explicitly configured
+    """
+    return _override(node_class, True)
+
+
+def disable_caching(node_class=None):
+    """
+    Context manager to disable caching, regardless of the configuration.
+
+    :param node_class: the class to disable caching for, or None to disable
+        it for all the classes that are not explicitly configured
+    """
+    return _override(node_class, False)
@@ -7,11 +7,14 @@
 # For further information on the license, see the LICENSE.txt file        #
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
+import errno
 import os
 import shutil
 import fnmatch
 import tempfile
 
+from aiida.common import objectstore
+from aiida.common.objectstore import get_object_store
 from aiida.common.utils import get_repository_folder
 
 # If True, tries to make everything (dirs, files) group-writable.
@@ -23,6 +26,9 @@ group_writable = True
 
 _valid_sections = ['node', 'workflow']
 
+# Marks values that have not been computed yet
+_UNKNOWN = object()
+
 
 class Folder(object):
     """
@@ -490,6 +496,8 @@ class RepositoryFolder(Folder):
 
         # Internal variable of this class
         self._subfolder = subfolder
+        # The manifest of the folder in the object store, read when needed
+        self._manifest = _UNKNOWN
 
         # This will also do checks on the folder limits
         super(RepositoryFolder, self).__init__(
@@ -522,6 +530,130 @@ class RepositoryFolder(Folder):
         """
         return RepositoryFolder(self.section, self.uuid)
 
+    @property
+    def abspath(self):
+        """
+        The absolute path of the folder.
+
+        If the folder is in the object store but its checkout is missing
+        (e.g. it was pruned after a repack), it is recreated from the
+        manifest.
+        """
+        if self.get_manifest() is not None and \
+                not os.path.isdir(self.folder_limit):
+            get_object_store().checkout(self.get_manifest(),
+                                        self.folder_limit,
+                                        mode_dir=self.mode_dir)
+        return self._abspath
+
+    def get_manifest(self):
+        """
+        Return the manifest of the section/uuid folder in the object store,
+        or None if the folder is not in the object store.  The manifest is
+        read only once.
+        """
+        if self._manifest is _UNKNOWN:
+            self._manifest = get_object_store().get_manifest(self.section,
+                                                             self.uuid)
+        return self._manifest
+
+    def _get_manifest_relpath(self, path):
+        return os.path.normpath(os.path.join(self.subfolder, path))
+
+    def get_content_list_from_manifest(self, path=os.curdir):
+        """
+        List the content of a directory of this folder from the manifest,
+        without accessing the checkout.
+
+        :param path: the relative path of the directory
+        :return: a sorted list of names, or None if the folder is not in the
+            object store
+        :raise OSError: if the directory does not exist
+        """
+        manifest = self.get_manifest()
+        if manifest is None:
+            return None
+
+        relpath = self._get_manifest_relpath(path)
+        if relpath == os.curdir:
+            prefix = ''
+        elif relpath in manifest['directories']:
+            prefix = relpath + os.sep
+        else:
+            raise OSError(errno.ENOENT, "No such directory", relpath)
+
+        names = set()
+        for entries in (manifest['files'], manifest['directories'],
+                        manifest['symlinks']):
+            for entry in entries:
+                if entry.startswith(prefix) and \
+                        os.sep not in entry[len(prefix):]:
+                    names.add(entry[len(prefix):])
+        return sorted(names)
+
+    def open_from_manifest(self, path):
+        """
+        Open a file of this folder for reading, in binary mode, directly from
+        the object store (possibly from a pack file) without accessing the
+        checkout.
+
+        :param path: the relative path of the file
+        :return: a file-like object, or None if the folder or the file is not
+            in the object store
+        """
+        manifest = self.get_manifest()
+        if manifest is None:
+            return None
+        key = manifest['files'].get(self._get_manifest_relpath(path))
+        if key is None:
+            return None
+        return get_object_store().open_object(key)
+
+    def erase(self, create_empty_folder=False):
+        """
+        Erases the folder, see :meth:`Folder.erase`. Erasing the top directory
+        also removes its manifest from the object store.
+        """
+        if os.path.normpath(self.subfolder) == os.curdir:
+            get_object_store().delete_manifest(self.section, self.uuid)
+            self._manifest = None
+        super(RepositoryFolder, self).erase(
+            create_empty_folder=create_empty_folder)
+
+    def replace_with_folder(self, srcdir, move=False, overwrite=False):
+        """
+        Copies or moves the source folder to this folder, see
+        :meth:`Folder.replace_with_folder`, and then stores the files in the
+        object store if needed (see :meth:`update_manifest`).
+        """
+        super(RepositoryFolder, self).replace_with_folder(
+            srcdir, move=move, overwrite=overwrite)
+        self.update_manifest()
+
+    def update_manifest(self, force=False):
+        """
+        Add the files of the whole section/uuid folder to the object store,
+        replacing them with hard links to the stored objects, and update the
+        manifest of the folder.
+
+        This has to be called after files are added to a folder that is
+        already stored. It does nothing if the object store is not enabled
+        (see the ``repository.backend`` property) and the folder is not in
+        the object store yet.
+
+        :param force: if True, store the files even if the object store is not
+            enabled
+        """
+        store = get_object_store()
+        if not (force or objectstore.is_enabled() or
+                os.path.exists(store.get_manifest_path(self.section,
+                                                       self.uuid))):
+            return
+        # Make sure that the folder is checked out
+        folder_path = self.get_topdir().abspath
+        self._manifest = store.add_folder(folder_path)
+        store.set_manifest(self.section, self.uuid, self._manifest)
+
 
         # NOTE! The get_subfolder method will return a Folder object, and not a RepositoryFolder object
 
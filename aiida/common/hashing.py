@@ -11,9 +11,12 @@ from passlib.context import CryptContext
 import random
 import hashlib
 import time
+import os
 import numpy as np
 from datetime import datetime
 
+from aiida.common.folders import Folder
+
 """
 Here we define a single password hashing instance for the full AiiDA.
 """
@@ -239,7 +242,31 @@ def make_hash(object_to_hash, float_precision=12):
 
     elif isinstance(object_to_hash, datetime):
         return make_hash_with_type('d', str(object_to_hash))
+
+    elif isinstance(object_to_hash, Folder):
+        return make_hash_with_type('F', make_hash(
+            _get_folder_contents(object_to_hash),
+            float_precision=float_precision))
     # Possibly add more types here, as needed
     else:
         raise ValueError("Value of type {} cannot be hashed".format(
                 type(object_to_hash)))
+
+
+def _get_folder_contents(folder):
+    """
+    Return a sorted list of (relative path, content) pairs of all the files
+    in a folder and its subfolders, where the content is the sha224 digest of
+    the file, so that files don't have to be kept in memory.
+    """
+    contents = []
+    for dirpath, _, filenames in os.walk(folder.abspath):
+        for filename in filenames:
+            filepath = os.path.join(dirpath, filename)
+            digest = hashlib.sha224()
+            with open(filepath, 'rb') as f:
+                for chunk in iter(lambda: f.read(65536), b''):
+                    digest.update(chunk)
+            contents.append((os.path.relpath(filepath, folder.abspath),
+                             digest.hexdigest()))
+    return sorted(contents)
@@ -0,0 +1,697 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+A content-addressed object store for the files of the repository.
+
+Every file is stored once, as an object named after the SHA-256 of its
+content, in ``repository/objects/<2 chars>/<62 chars>``.  The files of a
+stored node are recorded in a manifest (a JSON file in
+``repository/manifests/<section>/<uuid shards>.json``) mapping each relative
+path to the key of its object.  The folder of the node is a checkout of the
+manifest in which every file is a hard link to its object, so that identical
+files of different nodes share the same data and inode, while code that opens
+files through ``get_abs_path`` keeps working unchanged.
+
+The store is used when the ``repository.backend`` property is set to
+``objectstore`` or ``packed``; existing repositories are converted with
+``verdi devel repository migrate``.
+
+With the ``packed`` backend, ``verdi devel repository repack`` moves the small
+loose objects into a few large pack files, indexed by an SQLite database that
+gives the pack, offset and length of each object, and removes the checkouts of
+the folders that are identical to their manifest.  Objects are then read from
+the packs (through mmap, unless ``repository.pack_use_mmap`` is disabled) and
+folders are checked out again only when a path in them is needed.  This keeps
+the number of inodes of the repository close to the number of pack files.
+
+.. note:: as for any stored node, the files of the repository must never be
+    modified in place: with the object store the same data may be shared by
+    many nodes.
+"""
+import errno
+import fcntl
+import hashlib
+import io
+import json
+import mmap
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from aiida.common.utils import get_repository_folder
+
+# The version of the format of the manifests
+MANIFEST_VERSION = 1
+
+_OBJECTS_SUBFOLDER = 'objects'
+_MANIFESTS_SUBFOLDER = 'manifests'
+_PACKS_SUBFOLDER = 'packs'
+_PACK_INDEX_FILENAME = 'index.sqlite'
+_PACK_LOCK_FILENAME = 'repack.lock'
+
+_CHUNK_SIZE = 65536
+
+# Loose objects larger than this are not moved to the pack files by default
+DEFAULT_MAX_PACKED_OBJECT_SIZE = 1024 * 1024
+# A new pack file is started when the current one grows beyond this size
+DEFAULT_PACK_SIZE = 1024 ** 3
+# Folders whose checkout or manifest changed more recently than this number
+# of seconds are not pruned by default, as they may still be written to
+DEFAULT_MIN_CHECKOUT_AGE = 3600
+# Number of objects added to the index of the packs in one transaction
+_PACK_BATCH_SIZE = 1000
+
+# The stores of the repositories used in this interpreter, by root
+_stores = {}
+
+
+def is_enabled():
+    """
+    Return whether new repository folders are stored in the object store.
+    """
+    from aiida.common.setup import get_property
+
+    return get_property('repository.backend') in ('objectstore', 'packed')
+
+
+def get_object_store():
+    """
+    Return the object store of the repository of the current profile.  The
+    instance is reused, so that the index and the maps of the pack files are
+    only opened once.
+    """
+    root = get_repository_folder('repository')
+    try:
+        return _stores[root]
+    except KeyError:
+        store = _stores[root] = ObjectStore(root)
+        return store
+
+
+def get_file_key(path):
+    """
+    Compute the key of the object for a file, i.e. the SHA-256 of its
+    content, reading the file in chunks.
+
+    :param path: the absolute path of the file
+    :return: the hexdigest of the hash
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+
+def _walk_folder(path):
+    """
+    Walk a folder without following symlinks.
+
+    :return: an iterator over (kind, relative path, absolute path) tuples,
+        where kind is either 'file', 'directory' or 'symlink'
+    """
+    for dirpath, dirnames, filenames in os.walk(path, followlinks=False):
+        relpath = os.path.relpath(dirpath, path)
+        if relpath != os.curdir:
+            yield 'directory', relpath, dirpath
+        # Symlinks to directories are listed with the directories
+        for name in filenames + dirnames:
+            abs_path = os.path.join(dirpath, name)
+            if os.path.islink(abs_path):
+                yield 'symlink', os.path.normpath(
+                    os.path.join(relpath, name)), abs_path
+            elif name in filenames:
+                yield 'file', os.path.normpath(
+                    os.path.join(relpath, name)), abs_path
+
+
+def _write_atomically(content, dest):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest), prefix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.rename(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _link_or_copy(src, dest):
+    """
+    Atomically create or replace `dest` with a hard link to `src`, falling
+    back to a copy if hard links are not supported (e.g. on another
+    filesystem).
+
+    :return: True if a hard link was created
+    """
+    dirname = os.path.dirname(dest)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix='.tmp')
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        try:
+            os.link(src, tmp_path)
+            linked = True
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK,
+                               errno.ENOTSUP):
+                raise
+            shutil.copyfile(src, tmp_path)
+            linked = False
+        os.rename(tmp_path, dest)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return linked
+
+
+class ObjectStore(object):
+    """
+    The content-addressed store of the repository files.
+    """
+
+    def __init__(self, root=None, use_mmap=None):
+        """
+        :param root: the directory of the repository in which the objects and
+            manifests are stored, by default the repository of the current
+            profile
+        :param use_mmap: whether to read the pack files through mmap, by
+            default the value of the ``repository.pack_use_mmap`` property
+        """
+        if root is None:
+            root = get_repository_folder('repository')
+        self._root = os.path.abspath(root)
+        self._use_mmap = use_mmap
+        # The connection to the index of the packs and the maps of the packs,
+        # which can't be shared with forked processes
+        self._pid = None
+        self._index = None
+        self._mmaps = {}
+
+    @property
+    def root(self):
+        return self._root
+
+    @property
+    def objects_folder(self):
+        return os.path.join(self._root, _OBJECTS_SUBFOLDER)
+
+    @property
+    def manifests_folder(self):
+        return os.path.join(self._root, _MANIFESTS_SUBFOLDER)
+
+    @property
+    def packs_folder(self):
+        return os.path.join(self._root, _PACKS_SUBFOLDER)
+
+    def get_folder_path(self, section, uuid):
+        """
+        Return the absolute path of the checkout of a repository folder.
+        """
+        uuid = unicode(uuid)
+        return os.path.join(self._root, unicode(section), uuid[:2],
+                            uuid[2:4], uuid[4:])
+
+    def get_pack_path(self, pack):
+        """
+        Return the absolute path of a pack file.
+
+        :param pack: the integer identifier of the pack
+        """
+        return os.path.join(self.packs_folder, "{}.pack".format(pack))
+
+    def get_object_path(self, key):
+        """
+        Return the absolute path of an object.
+
+        :param key: the key of the object
+        """
+        return os.path.join(self.objects_folder, key[:2], key[2:])
+
+    def has_object(self, key):
+        return os.path.isfile(self.get_object_path(key)) or \
+            self._get_packed_location(key) is not None
+
+    def _get_index(self, create=False):
+        """
+        Return the connection to the index of the packs.
+
+        :param create: create the index if it doesn't exist yet, otherwise
+            None is returned in that case
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._index = None
+            self._mmaps = {}
+
+        if self._index is None:
+            index_path = os.path.join(self.packs_folder, _PACK_INDEX_FILENAME)
+            if not create and not os.path.exists(index_path):
+                return None
+            _makedirs(self.packs_folder)
+            self._index = sqlite3.connect(index_path, check_same_thread=False)
+            self._index.execute(
+                "CREATE TABLE IF NOT EXISTS packed (key TEXT PRIMARY KEY, "
+                "pack INTEGER NOT NULL, offset INTEGER NOT NULL, "
+                "length INTEGER NOT NULL)")
+            self._index.commit()
+        return self._index
+
+    def _get_packed_location(self, key):
+        """
+        Return the (pack, offset, length) of a packed object, or None if the
+        object is not in a pack.
+        """
+        index = self._get_index()
+        if index is None:
+            return None
+        return index.execute(
+            "SELECT pack, offset, length FROM packed WHERE key = ?",
+            (key,)).fetchone()
+
+    def _read_packed(self, pack, offset, length):
+        if self._use_mmap is None:
+            from aiida.common.setup import get_property
+
+            self._use_mmap = get_property('repository.pack_use_mmap')
+
+        if not self._use_mmap:
+            with open(self.get_pack_path(pack), 'rb') as f:
+                f.seek(offset)
+                return f.read(length)
+
+        pack_map = self._mmaps.get(pack)
+        if pack_map is None or offset + length > len(pack_map):
+            # The pack was not mapped yet, or it grew since it was mapped
+            if pack_map is not None:
+                pack_map.close()
+            with open(self.get_pack_path(pack), 'rb') as f:
+                pack_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmaps[pack] = pack_map
+        return pack_map[offset:offset + length]
+
+    def get_object_content(self, key):
+        """
+        Return the content of an object.  Packed objects are read from their
+        pack by offset and length.
+
+        :param key: the key of the object
+        :raise KeyError: if the object is not in the store
+        """
+        with self.open_object(key) as f:
+            return f.read()
+
+    def open_object(self, key):
+        """
+        Open an object for reading.  Loose objects are opened directly, packed
+        objects are read into memory.
+
+        :param key: the key of the object
+        :return: a file-like object
+        :raise KeyError: if the object is not in the store
+        """
+        try:
+            return open(self.get_object_path(key), 'rb')
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+        # Objects are only removed from the loose objects once they are in
+        # the index, so if the object exists it is found here
+        location = self._get_packed_location(key)
+        if location is None:
+            raise KeyError("Object {} is not in the store".format(key))
+        return io.BytesIO(self._read_packed(*location))
+
+    def add_file(self, path):
+        """
+        Add a file to the store, if an identical one is not there yet, and
+        replace it with a hard link to the stored object.
+
+        :param path: the absolute path of the file
+        :return: the key of the object
+        """
+        key = get_file_key(path)
+        object_path = self.get_object_path(key)
+        try:
+            if not os.path.isfile(object_path):
+                if self._get_packed_location(key) is not None:
+                    # The file is left as it is, it's a copy of the packed
+                    # object
+                    return key
+                _makedirs(os.path.dirname(object_path))
+                # Renaming is atomic, so another process adding the same
+                # content concurrently will at worst replace the object with
+                # an identical one
+                _link_or_copy(path, object_path)
+            elif not os.path.samefile(path, object_path):
+                _link_or_copy(object_path, path)
+        except OSError as e:
+            # A concurrent repack removes the loose objects once they are in
+            # the index, in which case the file is left as it is
+            if e.errno != errno.ENOENT or \
+                    self._get_packed_location(key) is None:
+                raise
+        return key
+
+    def add_folder(self, path):
+        """
+        Add all the files in a folder to the store, replacing them with hard
+        links to the stored objects.  Symlinks are not followed: they are
+        recorded in the manifest with their target.
+
+        :param path: the absolute path of the folder
+        :return: the manifest of the folder
+        """
+        files = {}
+        symlinks = {}
+        directories = []
+        for kind, relpath, abs_path in _walk_folder(path):
+            if kind == 'directory':
+                directories.append(relpath)
+            elif kind == 'symlink':
+                symlinks[relpath] = os.readlink(abs_path)
+            else:
+                files[relpath] = self.add_file(abs_path)
+        return {
+            'version': MANIFEST_VERSION,
+            'files': files,
+            'symlinks': symlinks,
+            'directories': sorted(directories),
+        }
+
+    def checkout(self, manifest, path, mode_dir=None, link=True):
+        """
+        Recreate a folder from its manifest, linking the files to the objects.
+
+        :param manifest: the manifest, as returned by :meth:`add_folder`
+        :param path: the absolute path of the folder to create
+        :param mode_dir: the mode of the created directories
+        :param link: if False, the files are written as copies of the objects
+            instead of hard links, e.g. for a folder outside of the store
+        """
+        makedirs = (lambda p: os.makedirs(p, mode_dir)) if mode_dir else \
+            os.makedirs
+        if not os.path.isdir(path):
+            makedirs(path)
+        for relpath in manifest['directories']:
+            dirpath = os.path.join(path, relpath)
+            if not os.path.isdir(dirpath):
+                makedirs(dirpath)
+        for relpath, key in manifest['files'].iteritems():
+            dest = os.path.join(path, relpath)
+            if link:
+                try:
+                    _link_or_copy(self.get_object_path(key), dest)
+                    continue
+                except (IOError, OSError) as e:
+                    if e.errno != errno.ENOENT:
+                        raise
+            # The object is packed, or a copy was requested
+            _write_atomically(self.get_object_content(key), dest)
+        for relpath, target in manifest['symlinks'].iteritems():
+            if not os.path.lexists(os.path.join(path, relpath)):
+                os.symlink(target, os.path.join(path, relpath))
+
+    def get_manifest_path(self, section, uuid):
+        """
+        Return the path of the manifest of a repository folder, sharded in the
+        same way as the folders themselves.
+        """
+        uuid = unicode(uuid)
+        return os.path.join(
+            self.manifests_folder, unicode(section), uuid[:2], uuid[2:4],
+            u"{}.json".format(uuid[4:]))
+
+    def get_manifest(self, section, uuid):
+        """
+        Return the manifest of a repository folder, or None if the folder is
+        not in the store.
+        """
+        try:
+            with open(self.get_manifest_path(section, uuid)) as f:
+                return json.load(f)
+        except IOError as e:
+            if e.errno == errno.ENOENT:
+                return None
+            raise
+
+    def set_manifest(self, section, uuid, manifest):
+        """
+        Atomically write the manifest of a repository folder.
+        """
+        manifest_path = self.get_manifest_path(section, uuid)
+        _makedirs(os.path.dirname(manifest_path))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(manifest_path),
+                                        prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f)
+            os.rename(tmp_path, manifest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete_manifest(self, section, uuid):
+        try:
+            os.remove(self.get_manifest_path(section, uuid))
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def migrate_section(self, section):
+        """
+        Add the existing folders of a section of the repository to the store,
+        replacing their files with hard links to the objects and writing
+        their manifests.  Folders that are already in the store are updated.
+
+        :param section: the section of the repository, e.g. 'node'
+        :return: an iterator over the uuids of the migrated folders
+        """
+        section_folder = os.path.join(self._root, section)
+        if not os.path.isdir(section_folder):
+            return
+        for first in sorted(os.listdir(section_folder)):
+            first_folder = os.path.join(section_folder, first)
+            for second in sorted(os.listdir(first_folder)):
+                second_folder = os.path.join(first_folder, second)
+                for rest in sorted(os.listdir(second_folder)):
+                    uuid = first + second + rest
+                    self.set_manifest(section, uuid, self.add_folder(
+                        os.path.join(second_folder, rest)))
+                    yield uuid
+
+    def repack(self, max_object_size=DEFAULT_MAX_PACKED_OBJECT_SIZE,
+               pack_size=DEFAULT_PACK_SIZE):
+        """
+        Move the loose objects that are not larger than `max_object_size`
+        into the pack files.
+
+        Objects are appended to the last pack file until it grows beyond
+        `pack_size`, and are removed from the loose objects only after the
+        pack is synced to disk and the index is committed, so that an
+        interrupted repack loses nothing.  Only one repack can run at a time,
+        while the store can be used concurrently.
+
+        :return: the number of objects that were packed
+        """
+        _makedirs(self.packs_folder)
+        with open(os.path.join(self.packs_folder, _PACK_LOCK_FILENAME),
+                  'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            index = self._get_index(create=True)
+            pack = index.execute("SELECT MAX(pack) FROM packed").fetchone()[0]
+            pack = 0 if pack is None else pack
+
+            count = 0
+            batch = []
+            pack_file = self._open_pack_for_append(pack)
+            try:
+                for key, size in list(self._iter_loose_objects()):
+                    if size > max_object_size:
+                        continue
+                    if self._get_packed_location(key) is None:
+                        if pack_file.tell() >= pack_size:
+                            self._commit_packed(pack_file, batch)
+                            batch = []
+                            pack_file.close()
+                            pack += 1
+                            pack_file = self._open_pack_for_append(pack)
+                        with open(self.get_object_path(key), 'rb') as f:
+                            content = f.read()
+                        batch.append((key, pack, pack_file.tell(),
+                                      len(content)))
+                        pack_file.write(content)
+                        count += 1
+                    else:
+                        # Added again as a loose object after being packed
+                        batch.append((key, None, None, None))
+                    if len(batch) >= _PACK_BATCH_SIZE:
+                        self._commit_packed(pack_file, batch)
+                        batch = []
+                self._commit_packed(pack_file, batch)
+            finally:
+                pack_file.close()
+        return count
+
+    def _open_pack_for_append(self, pack):
+        pack_file = open(self.get_pack_path(pack), 'ab')
+        # In append mode the position is only defined after a seek
+        pack_file.seek(0, os.SEEK_END)
+        return pack_file
+
+    def _commit_packed(self, pack_file, batch):
+        """
+        Sync a pack file, add the objects written to it to the index and
+        remove them from the loose objects.
+
+        :param batch: a list of (key, pack, offset, length) tuples, where pack
+            is None for objects that were already in the index
+        """
+        pack_file.flush()
+        os.fsync(pack_file.fileno())
+        index = self._get_index(create=True)
+        index.executemany("INSERT OR IGNORE INTO packed VALUES (?, ?, ?, ?)",
+                          [entry for entry in batch if entry[1] is not None])
+        index.commit()
+        for entry in batch:
+            try:
+                os.remove(self.get_object_path(entry[0]))
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+
+    def prune_checkouts(self, min_age=DEFAULT_MIN_CHECKOUT_AGE):
+        """
+        Remove the checkouts of the repository folders that are identical to
+        their manifest, i.e. that contain no file that is not in the store.
+        They are checked out again when a path in them is needed.
+
+        :param min_age: the folders whose checkout or manifest changed less
+            than this number of seconds ago are not removed
+        :return: the number of checkouts that were removed
+        """
+        now = time.time()
+        count = 0
+        for section, uuid, manifest in self.iter_manifests():
+            path = self.get_folder_path(section, uuid)
+            try:
+                mtime = max(os.path.getmtime(path), os.path.getmtime(
+                    self.get_manifest_path(section, uuid)))
+            except OSError:
+                # No checkout
+                continue
+            if now - mtime < min_age:
+                continue
+
+            contents = {'file': set(), 'directory': set(), 'symlink': set()}
+            for kind, relpath, _ in _walk_folder(path):
+                contents[kind].add(relpath)
+            if contents['file'] == set(manifest['files']) and \
+                    contents['directory'] == set(manifest['directories']) and \
+                    contents['symlink'] == set(manifest['symlinks']):
+                shutil.rmtree(path)
+                count += 1
+        return count
+
+    def iter_manifests(self):
+        """
+        Iterate over all the manifests in the store.
+
+        :return: an iterator over (section, uuid, manifest) tuples
+        """
+        if not os.path.isdir(self.manifests_folder):
+            return
+        for section in sorted(os.listdir(self.manifests_folder)):
+            section_folder = os.path.join(self.manifests_folder, section)
+            for dirpath, _, filenames in os.walk(section_folder):
+                shards = os.path.relpath(dirpath, section_folder).split(
+                    os.sep)
+                for filename in filenames:
+                    if not filename.endswith('.json') or \
+                            filename.startswith('.tmp'):
+                        continue
+                    uuid = ''.join(shards) + filename[:-len('.json')]
+                    with open(os.path.join(dirpath, filename)) as f:
+                        yield section, uuid, json.load(f)
+
+    def iter_objects(self):
+        """
+        Iterate over all the objects in the store, loose and packed.
+
+        :return: an iterator over (key, size) tuples
+        """
+        for key_size in self._iter_loose_objects():
+            yield key_size
+        for key_size in self._iter_packed_objects():
+            yield key_size
+
+    def _iter_packed_objects(self):
+        index = self._get_index()
+        if index is None:
+            return
+        for key, length in index.execute("SELECT key, length FROM packed"):
+            yield str(key), length
+
+    def _iter_loose_objects(self):
+        if not os.path.isdir(self.objects_folder):
+            return
+        for prefix in sorted(os.listdir(self.objects_folder)):
+            prefix_folder = os.path.join(self.objects_folder, prefix)
+            for name in os.listdir(prefix_folder):
+                if name.startswith('.tmp'):
+                    continue
+                yield prefix + name, os.path.getsize(
+                    os.path.join(prefix_folder, name))
+
+    def get_statistics(self):
+        """
+        Compute how much space is saved by the deduplication.
+
+        :return: a dictionary with the number of files referenced by the
+            manifests and their total size (i.e. what a repository without
+            deduplication would contain), the number and total size of the
+            objects actually stored, how many of these are in pack files, and
+            the number of objects that are not referenced by any manifest
+        """
+        sizes = dict(self.iter_objects())
+        referenced = set()
+        num_manifests = 0
+        num_files = 0
+        files_size = 0
+        for _, _, manifest in self.iter_manifests():
+            num_manifests += 1
+            for key in manifest['files'].itervalues():
+                num_files += 1
+                files_size += sizes.get(key, 0)
+                referenced.add(key)
+
+        return {
+            'manifests': num_manifests,
+            'files': num_files,
+            'files_size': files_size,
+            'objects': len(sizes),
+            'objects_size': sum(sizes.itervalues()),
+            'packed_objects': sum(1 for _ in self._iter_packed_objects()),
+            'unreferenced_objects': len(set(sizes) - referenced),
+        }
@@ -922,6 +922,43 @@ _property_table = {
         "Minimum level to log to the DbLog table",
         "REPORT",
         ["CRITICAL", "ERROR", "WARNING", "REPORT", "INFO", "DEBUG"]),
+    "logging.db_buffered": (
+        "logging_db_buffered",
+        "bool",
+        "Whether the daemon writes the DbLog entries in batches from a "
+        "background thread, instead of with one transaction per message",
+        True,
+        None),
+    "logging.db_buffer_size": (
+        "logging_db_buffer_size",
+        "int",
+        "Number of buffered DbLog entries that triggers a write to the "
+        "database (see logging.db_buffered)",
+        100,
+        None),
+    "logging.db_flush_interval": (
+        "logging_db_flush_interval",
+        "int",
+        "Maximum time in seconds that an entry stays in the DbLog buffer "
+        "before being written to the database (see logging.db_buffered)",
+        5,
+        None),
+    "logging.db_max_buffered": (
+        "logging_db_max_buffered",
+        "int",
+        "Maximum number of entries in the DbLog buffer; further messages are "
+        "dropped and replaced by a summary entry for each object (see "
+        "logging.db_buffered)",
+        10000,
+        None),
+    "logging.db_compress_threshold": (
+        "logging_db_compress_threshold",
+        "int",
+        "Length in characters above which the messages and metadata values "
+        "(e.g. tracebacks) of the DbLog entries are stored compressed; 0 to "
+        "never compress them",
+        2048,
+        None),
     "tcod.depositor_username": (
         "tcod_depositor_username",
         "string",
@@ -957,7 +994,70 @@ _property_table = {
         "bool",
         "Boolean whether to print deprecation warnings",
         False,
-        None)
+        None),
+    "caching.default_enabled": (
+        "caching_default_enabled",
+        "bool",
+        "Whether calculations reuse the outputs of an identical calculation "
+        "that already finished, instead of being run again, for the classes "
+        "that are not listed in caching.enabled_for or caching.disabled_for",
+        False,
+        None),
+    "caching.enabled_for": (
+        "caching_enabled_for",
+        "string",
+        "The calculation and process classes for which caching is enabled; "
+        "it should be a string with the full paths of the classes separated "
+        "by colons, e.g. 'aiida.orm.calculation.job.quantumespresso.pw."
+        "PwCalculation'",
+        "",
+        None),
+    "caching.disabled_for": (
+        "caching_disabled_for",
+        "string",
+        "The calculation and process classes for which caching is disabled, "
+        "in the same format as caching.enabled_for",
+        "",
+        None),
+    "repository.backend": (
+        "repository_backend",
+        "string",
+        "How the files of stored nodes are kept in the repository: 'folder' "
+        "stores them in a separate folder for each node, 'objectstore' "
+        "stores identical files only once in a content-addressed object "
+        "store, 'packed' also allows to move the small files of the object "
+        "store into a few large pack files (see 'verdi devel repository')",
+        "folder",
+        ["folder", "objectstore", "packed"]),
+    "repository.pack_use_mmap": (
+        "repository_pack_use_mmap",
+        "bool",
+        "Whether to read the files in the pack files of the repository "
+        "through mmap rather than with a read per file",
+        True,
+        None),
+    "arraydata.cache_size_mb": (
+        "arraydata_cache_size_mb",
+        "int",
+        "Maximum size in MB of the arrays of the stored ArrayData nodes kept "
+        "in memory by each process after they are read from disk",
+        512,
+        None),
+    "cifdata.parse_cache": (
+        "cifdata_parse_cache",
+        "bool",
+        "Whether the datablocks parsed from the files of the CifData nodes "
+        "are cached on disk, by MD5 checksum of the file, so that the same "
+        "file is parsed only once",
+        True,
+        None),
+    "querybuilder.log_filters": (
+        "querybuilder_log_filters",
+        "bool",
+        "Whether to log the attribute and extra filters of the QueryBuilder "
+        "queries on nodes, to suggest indexes with 'verdi database index'",
+        False,
+        None),
 }
 
 
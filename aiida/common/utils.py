@@ -101,6 +101,8 @@ def get_repository_folder(subfolder=None):
         elif subfolder == "repository":
             retval = os.path.abspath(
                 os.path.join(REPOSITORY_PATH, 'repository'))
+        elif subfolder == "cache":
+            retval = os.path.abspath(os.path.join(REPOSITORY_PATH, 'cache'))
         else:
             raise ValueError("Invalid 'subfolder' passed to "
                              "get_repository_folder: {}".format(subfolder))
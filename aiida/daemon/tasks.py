@@ -20,6 +20,10 @@ from aiida.common.setup import AIIDA_CONFIG_FOLDER, DAEMON_SUBDIR
 if not is_dbenv_loaded():
     load_dbenv(process="daemon")
 
+from aiida.utils.logger import enable_db_log_buffering
+
+enable_db_log_buffering()
+
 from aiida.common.setup import get_profile_config
 from aiida.common.exceptions import ConfigurationError
 from aiida.daemon.timestamps import set_daemon_timestamp,get_last_daemon_timestamp
@@ -29,6 +33,7 @@ DAEMON_INTERVALS_RETRIEVE = 30
 DAEMON_INTERVALS_UPDATE = 30
 DAEMON_INTERVALS_WFSTEP = 30
 DAEMON_INTERVALS_TICK_WORKFLOWS = 30
+DAEMON_INTERVALS_PRUNE_WORK_LOCKS = 3600
 
 config = get_profile_config(settings.AIIDADB_PROFILE)
 
@@ -104,6 +109,17 @@ def tick_work():
     print "aiida.daemon.tasks.tick_workflows:  Ticking workflows"
     tick_workflow_engine()
 
+@periodic_task(
+    run_every=timedelta(
+        seconds=config.get("DAEMON_INTERVALS_PRUNE_WORK_LOCKS",
+                           DAEMON_INTERVALS_PRUNE_WORK_LOCKS)
+    )
+)
+def prune_work_locks():
+    from aiida.work.daemon import prune_lock_files
+    print "aiida.daemon.tasks.prune_work_locks:  Pruning the lock files of finished processes"
+    prune_lock_files()
+
 @periodic_task(run_every=timedelta(seconds=config.get("DAEMON_INTERVALS_WFSTEP",
                                                       DAEMON_INTERVALS_WFSTEP
                                                       )
@@ -7,8 +7,128 @@
 # For further information on the license, see the LICENSE.txt file        #
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
 from aiida.orm import Data
 
+# The formats in which the arrays can be stored in the folder of the node
+NPY_STORAGE = 'npy'
+CHUNKED_STORAGE = 'chunked'
+
+# Uncompressed size in bytes of the chunks of the arrays stored in chunks
+DEFAULT_CHUNK_BYTES = 1024 ** 2
+# zlib compression level of the chunks
+DEFAULT_COMPRESSION_LEVEL = 6
+
+
+class ArrayCache(object):
+    """
+    A cache of the arrays read from the repository, shared by all the
+    ArrayData nodes of the process, that keeps the most recently used arrays
+    within a total size in bytes and a number of arrays.
+
+    Memory-mapped arrays are counted with a size of zero, since their data
+    is in the page cache of the operating system rather than in the memory
+    of the process.
+    """
+
+    def __init__(self, max_bytes=None, max_arrays=1024):
+        """
+        :param max_bytes: the maximum total size of the cached arrays, by
+            default the arraydata.cache_size_mb property
+        :param max_arrays: the maximum number of cached arrays
+        """
+        self._max_bytes = max_bytes
+        self.max_arrays = max_arrays
+        self._arrays = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            from aiida.common.setup import get_property
+
+            self._max_bytes = get_property('arraydata.cache_size_mb') * 1024 ** 2
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        with self._lock:
+            self._max_bytes = value
+            self._evict()
+
+    @property
+    def nbytes(self):
+        """
+        The total size in bytes of the cached arrays that are not
+        memory-mapped.
+        """
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._arrays)
+
+    @staticmethod
+    def _get_size(array):
+        import numpy
+
+        if isinstance(array, numpy.memmap):
+            return 0
+        return array.nbytes
+
+    def _evict(self):
+        while self._arrays and (len(self._arrays) > self.max_arrays or
+                                self._nbytes > self.max_bytes):
+            _, array = self._arrays.popitem(last=False)
+            self._nbytes -= self._get_size(array)
+
+    def get(self, key):
+        """
+        Return the array cached with a key, or None.
+        """
+        with self._lock:
+            array = self._arrays.pop(key, None)
+            if array is not None:
+                # Move it to the end, as the most recently used
+                self._arrays[key] = array
+            return array
+
+    def put(self, key, array):
+        """
+        Cache an array, evicting the least recently used ones if needed.
+        Arrays larger than the whole cache are not cached.
+        """
+        size = self._get_size(array)
+        with self._lock:
+            if key in self._arrays:
+                self._nbytes -= self._get_size(self._arrays.pop(key))
+            if size > self.max_bytes:
+                return
+            self._arrays[key] = array
+            self._nbytes += size
+            self._evict()
+
+    def discard(self, uuid):
+        """
+        Remove the arrays of a node from the cache.
+        """
+        with self._lock:
+            for key in [k for k in self._arrays if k[0] == uuid]:
+                self._nbytes -= self._get_size(self._arrays.pop(key))
+
+    def clear(self):
+        with self._lock:
+            self._arrays.clear()
+            self._nbytes = 0
+
+
+# The cache of the arrays of all the stored ArrayData nodes of the process,
+# keyed by (uuid, array name, mmap mode)
+array_cache = ArrayCache()
 
 
 class ArrayData(Data):
@@ -18,20 +138,56 @@ class ArrayData(Data):
     installed).
 
     Each array is stored within the Node folder as a different .npy file.
+    Alternatively (see :py:meth:`.set_array_storage`), an array can be
+    stored in chunks: the array is split along its first axis in chunks of
+    about 1 MB, each compressed with zlib in its own file of a name.chunks
+    folder, and reading a slice of the array (see
+    :py:meth:`.get_array_slice`) only reads the chunks that contain it.
+    This is convenient for large arrays that compress well (e.g.
+    trajectories) or that are mostly read in parts.
 
     :note: Before storing, no caching is done: if you perform a
       :py:meth:`.get_array` call, the array will be re-read from disk.
       If instead the ArrayData node has already been stored,
       the array is cached in memory after the first read, and the cached array
-      is used thereafter.
-      If too much RAM memory is used, you can clear the
-      cache with the :py:meth:`.clear_internal_cache` method.
+      (which is read-only) is used thereafter. The cache is shared by all the
+      nodes of the process and keeps the most recently used arrays within
+      the size given by the arraydata.cache_size_mb property; the arrays of a
+      node can be removed from it with :py:meth:`.clear_internal_cache`.
+      Large arrays can instead be memory-mapped (see :py:meth:`.get_array`),
+      so that only the parts that are used are read from disk.
     """
     array_prefix = "array|"
+    # Prefix of the attributes with the layout of the arrays stored in chunks
+    chunks_prefix = "array_chunks|"
+
+    # The format of the arrays set with set_array, see set_array_storage
+    _array_storage = NPY_STORAGE
+
+    def set_array_storage(self, storage):
+        """
+        Set the format in which the arrays of this node are stored by
+        :py:meth:`.set_array`, unless specified otherwise. Can also be
+        passed when creating the node, e.g.
+        ``ArrayData(array_storage='chunked')``.
 
-    def __init__(self, *args, **kwargs):
-        super(ArrayData, self).__init__(*args, **kwargs)
-        self._cached_arrays = {}
+        :param storage: 'npy' (the default) to store each array in a .npy
+          file, or 'chunked' to store each array in compressed chunks
+        """
+        if storage not in (NPY_STORAGE, CHUNKED_STORAGE):
+            raise ValueError("Unknown array storage '{}', valid values are "
+                             "'{}' and '{}'".format(storage, NPY_STORAGE,
+                                                    CHUNKED_STORAGE))
+        self._array_storage = storage
+
+    def _remove_array_files(self, name):
+        """
+        Remove the .npy file or the chunks of an array, if they exist.
+        """
+        folder = self._get_folder_pathsubfolder
+        for path in ['{}.npy'.format(name), '{}.chunks'.format(name)]:
+            if os.path.exists(folder.get_abs_path(path)):
+                self.remove_path(path)
 
     def delete_array(self, name):
         """
@@ -39,22 +195,20 @@ class ArrayData(Data):
 
         :param name: The name of the array to delete from the node.
         """
-        import numpy
-
-        fname = '{}.npy'.format(name)
-        if fname not in self.get_folder_list():
+        if name not in self._arraynames_from_files():
             raise KeyError(
                 "Array with name '{}' not found in node pk= {}".format(
                     name, self.pk))
 
         # remove both file and attribute
-        self.remove_path(fname)
-        try:
-            self._del_attr("{}{}".format(self.array_prefix, name))
-        except (KeyError, AttributeError):
-            # Should not happen, but do not crash if for some reason the
-            # property was not set.
-            pass
+        self._remove_array_files(name)
+        for prefix in [self.array_prefix, self.chunks_prefix]:
+            try:
+                self._del_attr("{}{}".format(prefix, name))
+            except (KeyError, AttributeError):
+                # Should not happen for the shape, but do not crash if for
+                # some reason the property was not set.
+                pass
 
     def arraynames(self):
         """
@@ -85,7 +239,9 @@ class ArrayData(Data):
         Return a list of all arrays stored in the node, listing the files (and
         not relying on the properties).
         """
-        return [i[:-4] for i in self.get_folder_list() if i.endswith('.npy')]
+        names = self.get_folder_list()
+        return ([i[:-len('.npy')] for i in names if i.endswith('.npy')] +
+                [i[:-len('.chunks')] for i in names if i.endswith('.chunks')])
 
     def _arraynames_from_properties(self):
         """
@@ -104,6 +260,33 @@ class ArrayData(Data):
         """
         return tuple(self.get_attr("{}{}".format(self.array_prefix, name)))
 
+    def get_array_dtype(self, name):
+        """
+        Return the data type of an array, reading only the header of its
+        .npy file (or the layout of its chunks) rather than the whole array.
+
+        :param name: The name of the array.
+        """
+        import numpy
+
+        if self.get_attr("{}{}".format(self.array_prefix, name),
+                         None) is None:
+            raise KeyError(
+                "Array with name '{}' not found in node pk= {}".format(
+                    name, self.pk))
+
+        layout = self._get_chunks_layout(name)
+        if layout is not None:
+            return self._get_chunks_dtype(layout)
+
+        with self._open_file('{}.npy'.format(name)) as f:
+            version = numpy.lib.format.read_magic(f)
+            if version == (1, 0):
+                _, _, dtype = numpy.lib.format.read_array_header_1_0(f)
+            else:
+                _, _, dtype = numpy.lib.format.read_array_header_2_0(f)
+        return dtype
+
     def iterarrays(self):
         """
         Iterator that returns tuples (name, array) for each array stored in the
@@ -112,58 +295,230 @@ class ArrayData(Data):
         for name in self.get_arraynames():
             yield (name, self.get_array(name))
 
-    def get_array(self, name):
+    def get_array(self, name, mmap_mode=None):
         """
         Return an array stored in the node
 
         :param name: The name of the array to return.
+        :param mmap_mode: If not None, memory-map the file of the array with
+          this mode (only 'r' or 'c' for stored nodes, see numpy.load), so
+          that only the parts of the array that are accessed are read from
+          disk.
+        :return: for stored nodes, a read-only array shared by all the
+          instances of the node (except with mmap_mode='c'): copy it, e.g.
+          with numpy.array(), before changing it in place.
         """
         import numpy
 
         # raw function used only internally
         def get_array_from_file(self, name):
             fname = '{}.npy'.format(name)
-            if fname not in self.get_folder_list():
+            # The attribute is checked rather than the folder, to avoid
+            # listing the folder at every call
+            if self.get_attr("{}{}".format(self.array_prefix, name),
+                             None) is None:
                 raise KeyError(
                     "Array with name '{}' not found in node pk= {}".format(
                         name, self.pk))
 
-            array = numpy.load(self.get_abs_path(fname))
+            layout = self._get_chunks_layout(name)
+            if layout is not None:
+                if mmap_mode is not None:
+                    raise ValueError("Arrays stored in chunks cannot be "
+                                     "memory-mapped, use get_array_slice to "
+                                     "read a part of them")
+                return self._read_chunked_array(name, layout)
+
+            if mmap_mode is not None:
+                return numpy.load(self.get_abs_path(fname),
+                                  mmap_mode=mmap_mode)
+            with self._open_file(fname) as f:
+                array = numpy.load(f)
             return array
 
         # Return with proper caching, but only after storing. Before, instead,
         # always re-read from disk
         if not self.is_stored:
             return get_array_from_file(self, name)
-        else:
-            if name not in self._cached_arrays:
-                self._cached_arrays[name] = get_array_from_file(self, name)
-            return self._cached_arrays[name]
+
+        if mmap_mode not in (None, 'r', 'c'):
+            raise ValueError("The files of stored nodes can only be "
+                             "memory-mapped with mode 'r' or 'c'")
+
+        key = (self.uuid, name, mmap_mode)
+        array = array_cache.get(key)
+        if array is None:
+            array = get_array_from_file(self, name)
+            if mmap_mode is None:
+                # The cached array is shared by all the nodes of the process
+                array.flags.writeable = False
+            array_cache.put(key, array)
+        return array
+
+    def get_array_slice(self, name, index):
+        """
+        Return a part of an array stored in the node, reading only that part
+        from disk: a .npy file is memory-mapped, and for stored nodes the
+        slice is a view on it when index is a basic index (integers, slices);
+        for arrays stored in chunks, only the chunks that contain the
+        selected elements of the first axis are read and decompressed.
+
+        :param name: The name of the array.
+        :param index: Anything that can index a numpy array, e.g. 10 or
+          numpy.s_[100:200, :, 0]
+        """
+        import numpy
+
+        layout = self._get_chunks_layout(name)
+        if layout is None:
+            try:
+                array = self.get_array(name, mmap_mode='r')
+            except ValueError:
+                # Arrays of objects cannot be memory-mapped
+                return self.get_array(name)[index]
+            if self.is_stored:
+                return array[index]
+            # The file of an unstored node can still be replaced, so the
+            # slice is copied rather than left as a view on the file
+            return numpy.array(array[index])
+
+        shape = self.get_shape(name)
+        if not isinstance(index, tuple):
+            index = (index,)
+        if not shape or not index or index[0] is Ellipsis or index[0] is None:
+            return self.get_array(name)[index]
+
+        rows = numpy.arange(shape[0])[index[0]]
+        if rows.ndim > 1:
+            return self.get_array(name)[index]
+
+        chunk_rows = layout['chunk_rows']
+        selected = numpy.atleast_1d(rows)
+        result = numpy.empty((len(selected),) + shape[1:],
+                             dtype=self._get_chunks_dtype(layout))
+        chunk_indices = selected // chunk_rows
+        for chunk_index in numpy.unique(chunk_indices):
+            mask = chunk_indices == chunk_index
+            chunk = self._read_chunk(name, layout, shape, int(chunk_index))
+            result[mask] = chunk[selected[mask] - chunk_index * chunk_rows]
+
+        if rows.ndim == 0:
+            return result[0][index[1:]]
+        return result[(slice(None),) + index[1:]]
+
+    def _get_chunks_layout(self, name):
+        """
+        Return the layout of an array stored in chunks, or None if the array
+        is stored in a .npy file.
+        """
+        return self.get_attr("{}{}".format(self.chunks_prefix, name), None)
+
+    @staticmethod
+    def _get_chunks_dtype(layout):
+        import numpy
+
+        descr = layout['dtype']
+        if isinstance(descr, list):
+            # The tuples of structured types are stored as lists
+            descr = [tuple(field) for field in descr]
+        return numpy.dtype(descr)
+
+    def _read_chunk(self, name, layout, shape, chunk_index, cache=True):
+        """
+        Return a chunk of an array, as a read-only array whose first axis
+        has at most layout['chunk_rows'] elements. The chunks of the arrays
+        of stored nodes are cached with the arrays.
+        """
+        import numpy
+
+        key = (self.uuid, name, 'chunk{}'.format(chunk_index))
+        if self.is_stored and cache:
+            chunk = array_cache.get(key)
+            if chunk is not None:
+                return chunk
+
+        with self._open_file('{}.chunks/{}'.format(name, chunk_index)) as f:
+            data = zlib.decompress(f.read())
+        chunk = numpy.frombuffer(data, dtype=self._get_chunks_dtype(
+            layout)).reshape((-1,) + shape[1:])
+
+        if self.is_stored and cache:
+            array_cache.put(key, chunk)
+        return chunk
+
+    def _read_chunked_array(self, name, layout):
+        """
+        Return a whole array stored in chunks.
+        """
+        import numpy
+
+        shape = self.get_shape(name)
+        num_rows = shape[0] if shape else 1
+        chunk_rows = layout['chunk_rows']
+        array = numpy.empty((num_rows,) + shape[1:],
+                            dtype=self._get_chunks_dtype(layout))
+        for chunk_index, start in enumerate(xrange(0, num_rows, chunk_rows)):
+            array[start:start + chunk_rows] = self._read_chunk(
+                name, layout, shape, chunk_index, cache=False)
+        return array.reshape(shape)
+
+    def _write_chunks(self, name, array, chunk_bytes, compression_level):
+        """
+        Write an array in compressed chunks directly in the folder of the
+        node, and return the number of elements of the first axis in each
+        chunk.
+        """
+        import numpy
+
+        rows = array.reshape((1,)) if array.ndim == 0 else array
+        row_bytes = rows[0].nbytes if len(rows) else rows.itemsize
+        chunk_rows = max(1, chunk_bytes // max(1, row_bytes))
+
+        folder = self._get_folder_pathsubfolder.get_subfolder(
+            '{}.chunks'.format(name), create=True)
+        for chunk_index, start in enumerate(
+                xrange(0, len(rows), chunk_rows)):
+            chunk = numpy.ascontiguousarray(rows[start:start + chunk_rows])
+            with folder.open(str(chunk_index), 'wb') as f:
+                f.write(zlib.compress(chunk.tostring(), compression_level))
+        return chunk_rows
 
     def clear_internal_cache(self):
         """
-        Clear the internal memory cache where the arrays are stored after being
-        read from disk (used in order to reduce at minimum the readings from
-        disk).
+        Remove the arrays of this node from the memory cache where the arrays
+        are stored after being read from disk (used in order to reduce at
+        minimum the readings from disk).
         This function is useful if you want to keep the node in memory, but you
         do not want to waste memory to cache the arrays in RAM.
         """
-        self._cached_arrays = {}
+        if self.is_stored:
+            array_cache.discard(self.uuid)
 
-    def set_array(self, name, array):
+    def set_array(self, name, array, storage=None,
+                  chunk_bytes=DEFAULT_CHUNK_BYTES,
+                  compression_level=DEFAULT_COMPRESSION_LEVEL):
         """
         Store a new numpy array inside the node. Possibly overwrite the array
         if it already existed.
 
-        Internally, it stores a name.npy file in numpy format.
+        Internally, it stores a name.npy file in numpy format, or the
+        compressed chunks of the array in a name.chunks folder.
 
         :param name: The name of the array.
         :param array: The numpy array to store.
+        :param storage: 'npy' or 'chunked', by default the format set with
+          :py:meth:`.set_array_storage`
+        :param chunk_bytes: The uncompressed size in bytes of the chunks
+        :param compression_level: The zlib compression level of the chunks
         """
         import re
-        import tempfile
 
         import numpy
+        from aiida.common.exceptions import ModificationNotAllowed
+
+        if self.is_stored:
+            raise ModificationNotAllowed(
+                "Cannot set an array after storing the node")
 
         if not (isinstance(array, numpy.ndarray)):
             raise TypeError("ArrayData can only store numpy arrays. Convert "
@@ -174,20 +529,99 @@ class ArrayData(Data):
             raise ValueError("The name assigned to the array ({}) is not valid,"
                              "it can only contain digits, letters or underscores")
 
-        fname = "{}.npy".format(name)
-
-        with tempfile.NamedTemporaryFile() as f:
-            # Store in a temporary file, and then add to the node
-            numpy.save(f, array)
-            f.flush()  # Important to flush here, otherwise the next copy command
-            # will just copy an empty file
-            self.add_path(f.name, fname)
+        if storage is None:
+            storage = self._array_storage
+        if storage not in (NPY_STORAGE, CHUNKED_STORAGE):
+            raise ValueError("Unknown array storage '{}', valid values are "
+                             "'{}' and '{}'".format(storage, NPY_STORAGE,
+                                                    CHUNKED_STORAGE))
+        if storage == CHUNKED_STORAGE and array.dtype.hasobject:
+            raise TypeError("Arrays of objects cannot be stored in chunks")
+
+        # Replace the array, possibly stored in the other format
+        self._remove_array_files(name)
+
+        # The files are written directly in the folder of the node, rather
+        # than in a temporary file copied afterwards
+        if storage == NPY_STORAGE:
+            with self._get_folder_pathsubfolder.open(
+                    "{}.npy".format(name), 'wb') as f:
+                numpy.save(f, array)
+            try:
+                self._del_attr("{}{}".format(self.chunks_prefix, name))
+            except AttributeError:
+                pass
+        else:
+            chunk_rows = self._write_chunks(name, array, chunk_bytes,
+                                            compression_level)
+            self._set_attr("{}{}".format(self.chunks_prefix, name), {
+                'dtype': numpy.lib.format.dtype_to_descr(array.dtype),
+                'chunk_rows': chunk_rows,
+                'compression': 'zlib',
+            })
 
         # Mainly for convenience, for querying purposes (both stores the fact
         # that there is an array with that name, and its shape)
         self._set_attr("{}{}".format(self.array_prefix, name),
                        list(array.shape))
 
+    def get_array_appender(self, name, row_shape, dtype, storage=None,
+                           chunk_bytes=DEFAULT_CHUNK_BYTES,
+                           compression_level=DEFAULT_COMPRESSION_LEVEL):
+        """
+        Return an :py:class:`ArrayAppender` to write a new array element by
+        element along its first axis (e.g. one step of a trajectory at a
+        time), without having the whole array in memory. Possibly overwrite
+        the array if it already existed. The array is added to the node
+        when the appender is closed, e.g.::
+
+            with node.get_array_appender('energies', (), float) as appender:
+                for energy in parse_energies():
+                    appender.append(energy)
+
+        :param name: The name of the array.
+        :param row_shape: The shape of each element of the first axis.
+        :param dtype: The numpy data type of the array.
+        :param storage: 'npy' or 'chunked', by default the format set with
+          :py:meth:`.set_array_storage`
+        :param chunk_bytes: The uncompressed size in bytes of the chunks,
+          and of the buffer of the elements not yet written to disk
+        :param compression_level: The zlib compression level of the chunks
+        """
+        import re
+
+        import numpy
+        from aiida.common.exceptions import ModificationNotAllowed
+
+        if self.is_stored:
+            raise ModificationNotAllowed(
+                "Cannot set an array after storing the node")
+
+        if not (name) or re.sub('[0-9a-zA-Z_]', '', name):
+            raise ValueError("The name assigned to the array ({}) is not valid,"
+                             "it can only contain digits, letters or underscores")
+
+        if storage is None:
+            storage = self._array_storage
+        if storage not in (NPY_STORAGE, CHUNKED_STORAGE):
+            raise ValueError("Unknown array storage '{}', valid values are "
+                             "'{}' and '{}'".format(storage, NPY_STORAGE,
+                                                    CHUNKED_STORAGE))
+        if numpy.dtype(dtype).hasobject:
+            raise TypeError("Arrays of objects cannot be appended to")
+
+        # The previous array, if any, is removed rather than left in the
+        # node with a shape that does not match its file
+        self._remove_array_files(name)
+        for prefix in [self.array_prefix, self.chunks_prefix]:
+            try:
+                self._del_attr("{}{}".format(prefix, name))
+            except AttributeError:
+                pass
+
+        return ArrayAppender(self, name, row_shape, dtype, storage,
+                             chunk_bytes, compression_level)
+
     def _validate(self):
         """
         Check if the list of .npy files stored inside the node and the
@@ -206,3 +640,189 @@ class ArrayData(Data):
                 " node (pk= {}): {} vs. {}".format(self.pk,
                                                    files, properties))
         super(ArrayData, self)._validate()
+
+
+class ArrayAppender(object):
+    """
+    Write an array of an unstored ArrayData node element by element along
+    its first axis, keeping in memory only a buffer of about chunk_bytes
+    (see :py:meth:`ArrayData.get_array_appender`).
+
+    The elements are written directly in the folder of the node: for the
+    'npy' storage, after space reserved for the header of the .npy file,
+    which is written when the appender is closed and the final shape is
+    known; for the 'chunked' storage, one compressed chunk whenever the
+    buffer is full. The array (and its shape attribute) is only added to
+    the node by :py:meth:`.close`.
+    """
+
+    def __init__(self, node, name, row_shape, dtype, storage, chunk_bytes,
+                 compression_level):
+        import numpy
+
+        self._node = node
+        self._name = name
+        self.row_shape = tuple(int(i) for i in row_shape)
+        self.dtype = numpy.dtype(dtype)
+        self._storage = storage
+        self._compression_level = compression_level
+        self._num_rows = 0
+        self._num_chunks = 0
+        self._closed = False
+
+        row_bytes = max(1, int(numpy.prod(self.row_shape)) *
+                        self.dtype.itemsize)
+        self._buffer = numpy.empty(
+            (max(1, chunk_bytes // row_bytes),) + self.row_shape,
+            dtype=self.dtype)
+        self._chunk_rows = len(self._buffer)
+        self._buffered = 0
+
+        folder = node._get_folder_pathsubfolder
+        if storage == NPY_STORAGE:
+            self._chunks_folder = None
+            # The largest header, with a first dimension of 20 digits
+            self._header_size = len(self._get_npy_header(10 ** 19))
+            self._file = folder.open('{}.npy'.format(name), 'wb')
+            self._file.write(' ' * self._header_size)
+        else:
+            self._file = None
+            self._chunks_folder = folder.get_subfolder(
+                '{}.chunks'.format(name), create=True)
+
+    def __len__(self):
+        return self._num_rows + self._buffered
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _get_npy_header(self, num_rows, size=None):
+        """
+        Return the header of the .npy file, padded to the given size (by
+        default, to a multiple of 64 bytes as numpy does).
+        """
+        import struct
+
+        import numpy
+
+        header = "{{'descr': {!r}, 'fortran_order': False, 'shape': {!r}, }}".format(
+            numpy.lib.format.dtype_to_descr(self.dtype),
+            (int(num_rows),) + self.row_shape)
+        # magic string, version, header length, header, padding and newline
+        if size is None:
+            size = 10 + len(header) + 1
+            size += -size % 64
+        padding = size - 10 - len(header) - 1
+        if padding < 0 or size - 10 > 65535:
+            raise ValueError("The header of the .npy file of array '{}' does "
+                             "not fit in the space reserved".format(self._name))
+        return (numpy.lib.format.magic(1, 0) + struct.pack('<H', size - 10) +
+                header + ' ' * padding + '\n')
+
+    def append(self, row):
+        """
+        Append an element along the first axis of the array.
+
+        :param row: an array (or anything that numpy can convert to an array)
+          with shape row_shape, whose type can be safely cast to the type of
+          the array (e.g. integers to floats, but not floats to integers)
+        :raise ValueError: if the shape of row is not row_shape
+        :raise TypeError: if the type of row cannot be cast
+        """
+        row = self.check_row(row)
+        self._buffer[self._buffered] = row
+        self._buffered += 1
+        if self._buffered == len(self._buffer):
+            self.flush()
+
+    def check_row(self, row):
+        """
+        Check that an element can be appended (see :py:meth:`.append`),
+        without appending it.
+
+        :return: row, converted to an array
+        """
+        import numpy
+
+        if self._closed:
+            raise ValueError("The appender of array '{}' is closed".format(
+                self._name))
+        row = numpy.asarray(row)
+        if row.shape != self.row_shape:
+            raise ValueError("The elements appended to array '{}' must have "
+                             "shape {}, not {}".format(self._name,
+                                                       self.row_shape,
+                                                       row.shape))
+        if not numpy.can_cast(row.dtype, self.dtype, casting='same_kind'):
+            raise TypeError("Cannot append elements of type {} to array '{}' "
+                            "of type {}".format(row.dtype, self._name,
+                                                self.dtype))
+        return row
+
+    def extend(self, rows):
+        """
+        Append the elements of an iterable (e.g. the first axis of an array).
+        """
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        """
+        Write the buffered elements to disk.
+        """
+        if not self._buffered:
+            return
+        rows = self._buffer[:self._buffered]
+        if self._file is not None:
+            self._file.write(rows.tostring())
+        else:
+            with self._chunks_folder.open(str(self._num_chunks), 'wb') as f:
+                f.write(zlib.compress(rows.tostring(),
+                                      self._compression_level))
+            self._num_chunks += 1
+        self._num_rows += self._buffered
+        self._buffered = 0
+
+    def close(self):
+        """
+        Write the remaining elements and add the array to the node.
+        """
+        import numpy
+
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._buffer = None
+
+        node = self._node
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.write(self._get_npy_header(self._num_rows,
+                                                  self._header_size))
+            self._file.close()
+        else:
+            node._set_attr("{}{}".format(node.chunks_prefix, self._name), {
+                'dtype': numpy.lib.format.dtype_to_descr(self.dtype),
+                'chunk_rows': self._chunk_rows,
+                'compression': 'zlib',
+            })
+        node._set_attr("{}{}".format(node.array_prefix, self._name),
+                       [self._num_rows] + list(self.row_shape))
+
+    def discard(self):
+        """
+        Close the appender and remove the files written so far, without
+        adding the array to the node.
+        """
+        self._closed = True
+        self._buffer = None
+        if self._file is not None:
+            self._file.close()
+        self._node._remove_array_files(self._name)
@@ -10,6 +10,9 @@
 from aiida.orm.data.array import ArrayData
 from aiida.orm.calculation.inline import optional_inline
 
+# The size in bytes of the positions of the steps read at once when
+# iterating over the steps of a trajectory
+STEP_BATCH_BYTES = 16 * 1024 ** 2
 
 
 @optional_inline
@@ -177,20 +180,65 @@ class TrajectoryData(ArrayData):
         positions = numpy.array([[list(s.position) for s in x.sites] for x in structurelist])
         self.set_trajectory(stepids, cells, symbols, positions)
 
+    def get_trajectory_writer(self, symbols, times=False, velocities=False,
+                              storage=None):
+        """
+        Return a :py:class:`TrajectoryWriter` to set the trajectory one step
+        at a time, e.g. while parsing the output of a code, rather than
+        passing the whole arrays to :py:meth:`.set_trajectory`. The steps
+        are written to disk as they are appended, so that only a few of
+        them are in memory at any time::
+
+            with trajectory.get_trajectory_writer(symbols, times=True) as writer:
+                for stepid, time, cell, positions in parse_steps():
+                    writer.append_step(stepid, cell, positions, time=time)
+
+        The trajectory is set when the writer is closed (at the end of the
+        ``with`` block), replacing the previous one, if any.
+
+        :param symbols: the symbols of the sites, as in
+          :py:meth:`.set_trajectory`
+        :param times: whether a time is given for each step
+        :param velocities: whether velocities are given for each step
+        :param storage: 'npy' or 'chunked', by default the format set with
+          :py:meth:`.set_array_storage`
+        """
+        return TrajectoryWriter(self, symbols, times, velocities, storage)
+
+    def _get_array_placeholder(self, name):
+        """
+        Return an array with the shape and the type of a stored array, but
+        without reading its data (its elements are all zero), or None if the
+        array is not set.
+        """
+        import numpy
+
+        try:
+            shape = self.get_shape(name)
+        except AttributeError:
+            return None
+        return numpy.broadcast_to(
+            numpy.zeros((), dtype=self.get_array_dtype(name)), shape)
+
     def _validate(self):
         """
         Verify that the required arrays are present and that their type and
-        dimension are correct.
+        dimension are correct. Only the symbols are read: the type and the
+        shape of the other arrays are read from the headers of their files.
         """
         # check dimensions, types
         from aiida.common.exceptions import ValidationError
 
         try:
-            self._internal_validate(self.get_stepids(),
-                                    self.get_cells(),
-                                    self.get_symbols(), self.get_positions(),
-                                    self.get_times(),
-                                    self.get_velocities())
+            for name in ['steps', 'cells', 'positions']:
+                if self._get_array_placeholder(name) is None:
+                    raise KeyError("Array '{}' is missing".format(name))
+            self._internal_validate(self._get_array_placeholder('steps'),
+                                    self._get_array_placeholder('cells'),
+                                    self.get_symbols(),
+                                    self._get_array_placeholder('positions'),
+                                    self._get_array_placeholder('times'),
+                                    self._get_array_placeholder('velocities'))
         # Should catch TypeErrors, ValueErrors, and KeyErrors for missing arrays
         except Exception as e:
             raise ValidationError("The TrajectoryData did not validate. "
@@ -348,14 +396,57 @@ class TrajectoryData(ArrayData):
             raise IndexError("You have only {} steps, but you are looking beyond"
                              " (index={})".format(self.numsteps, index))
 
-        vel = self.get_velocities()
-        if vel is not None:
-            vel = vel[index, :, :]
-        time = self.get_times()
-        if time is not None:
-            time = time[index]
-        return (self.get_stepids()[index], time, self.get_cells()[index, :, :],
-                self.get_symbols(), self.get_positions()[index, :, :], vel)
+        return next(self.iter_step_data([index]))
+
+    def _get_step_indices(self, indices):
+        """
+        Return the array of the indices of the steps selected by indices
+        (None for all the steps, a list of indices, a slice or a boolean
+        mask).
+
+        :raises IndexError: if an index is beyond the limits.
+        """
+        import numpy
+
+        steps = numpy.arange(self.numsteps)
+        if indices is None:
+            return steps
+        return numpy.atleast_1d(steps[indices])
+
+    def _get_step_batches(self, indices):
+        """
+        Yield the indices of the selected steps in batches of about
+        STEP_BATCH_BYTES of positions.
+        """
+        indices = self._get_step_indices(indices)
+        batch_size = max(1, STEP_BATCH_BYTES // max(1, self.numsites * 3 * 8))
+        for start in xrange(0, len(indices), batch_size):
+            yield indices[start:start + batch_size]
+
+    def iter_step_data(self, indices=None):
+        """
+        Yield the data of the selected steps, in the format of
+        :py:meth:`.get_step_data`. The steps are read from the arrays in
+        batches, so that the whole trajectory is never loaded in memory.
+
+        :param indices: the indices of the steps (a list, a slice or a
+          boolean mask), by default all of them
+        :raises IndexError: if an index is beyond the limits.
+        """
+        names = set(self.get_arraynames())
+        symbols = self.get_symbols()
+        for batch in self._get_step_batches(indices):
+            stepids = self.get_array_slice('steps', batch)
+            cells = self.get_array_slice('cells', batch)
+            positions = self.get_array_slice('positions', batch)
+            times = (self.get_array_slice('times', batch)
+                     if 'times' in names else None)
+            velocities = (self.get_array_slice('velocities', batch)
+                          if 'velocities' in names else None)
+            for i in range(len(batch)):
+                yield (stepids[i], None if times is None else times[i],
+                       cells[i], symbols, positions[i],
+                       None if velocities is None else velocities[i])
 
 
     def step_to_structure(self, index, custom_kinds=None):
@@ -392,10 +483,52 @@ class TrajectoryData(ArrayData):
           meaning that the strings in the ``symbols`` array must be valid
           chemical symbols.
         """
-        from aiida.orm.data.structure import StructureData, Kind, Site
+        if index >= self.numsteps:
+            raise IndexError("You have only {} steps, but you are looking beyond"
+                             " (index={})".format(self.numsteps, index))
 
-        # ignore step, time, and velocities
-        _, _, cell, symbols, positions, _ = self.get_step_data(index)
+        return next(self.iter_step_structures([index],
+                                              custom_kinds=custom_kinds))
+
+    def get_step_structures(self, indices=None, custom_kinds=None):
+        """
+        Return a list of AiiDA
+        :py:class:`aiida.orm.data.structure.StructureData` nodes (not stored
+        yet!) with the coordinates of the selected steps, see
+        :py:meth:`.get_step_structure`. The arrays are read once for all
+        the steps, the custom kinds are validated once, and the sites of
+        each structure are set at once with
+        :py:meth:`aiida.orm.data.structure.StructureData.from_arrays`.
+
+        :param indices: the indices of the steps (a list, a slice such as
+          ``numpy.s_[::10]`` or a boolean mask), by default all of them
+        :param custom_kinds: (Optional) as in :py:meth:`.get_step_structure`
+        """
+        return list(self.iter_step_structures(indices,
+                                              custom_kinds=custom_kinds))
+
+    def iter_step_structures(self, indices=None, custom_kinds=None):
+        """
+        Yield the structures of the selected steps, as
+        :py:meth:`.get_step_structures`, but reading the steps in batches
+        and creating each structure only when it is needed.
+        """
+        from aiida.orm.data.structure import StructureData
+
+        symbols = self.get_symbols()
+        self._validate_custom_kinds(symbols, custom_kinds)
+        symbols = symbols.tolist()
+        for _, _, cell, _, positions, _ in self.iter_step_data(indices):
+            yield StructureData.from_arrays(cell, symbols, positions,
+                                            kinds=custom_kinds)
+
+    @staticmethod
+    def _validate_custom_kinds(symbols, custom_kinds):
+        """
+        Check that the custom kinds, if given, have one kind for each
+        symbol of the trajectory.
+        """
+        from aiida.orm.data.structure import Kind
 
         if custom_kinds is not None:
             kind_names = []
@@ -414,19 +547,6 @@ class TrajectoryData(ArrayData):
                                  "passed {}, but the symbols are {}".format(
                     sorted(kind_names), sorted(symbols)))
 
-        struc = StructureData(cell=cell)
-        if custom_kinds is not None:
-            for k in custom_kinds:
-                struc.append_kind(k)
-            for s, p in zip(symbols, positions):
-                struc.append_site(Site(kind_name=s, position=p))
-        else:
-            for s, p in zip(symbols, positions):
-                # Automatic species generation
-                struc.append_atom(symbols=s, position=p)
-
-        return struc
-
     def _prepare_xsf(self,index=None):
         """
         Write the given trajectory to a string of format XSF (for XCrySDen).
@@ -481,8 +601,7 @@ class TrajectoryData(ArrayData):
         indices = range(self.numsteps)
         if trajectory_index is not None:
             indices = [trajectory_index]
-        for idx in indices:
-            structure = self.get_step_structure(idx)
+        for structure in self.iter_step_structures(indices):
             ciffile = pycifrw_from_cif(cif_from_ase(structure.get_ase()),
                                        ase_loops)
             cif = cif + ciffile.WriteOut()
@@ -693,6 +812,33 @@ class TrajectoryData(ArrayData):
         )
 
 
+    def _get_heatmap_positions(self, mintime=None, maxtime=None, stepsize=1):
+        """
+        Return the positions shown by show_mpl_heatmap, i.e. those of every
+        stepsize-th step between mintime and maxtime, in angstrom.
+        """
+        import numpy as np
+
+        times = self.get_times()
+        if mintime is None:
+            minindex = 0
+        else:
+            minindex =  np.argmax(times>mintime)
+        if maxtime is None:
+            maxindex = len(times)
+        else:
+            maxindex = np.argmin(times < maxtime)
+        positions = self.get_positions()[minindex:maxindex:stepsize]
+
+        try:
+            if self.get_attr('units|positions') in ('bohr', 'atomic'):
+                from aiida.common.constants import bohr_to_ang
+                # Not in place: the arrays of stored nodes are read-only
+                positions = positions * bohr_to_ang
+        except KeyError:
+            pass
+        return positions
+
     def show_mpl_heatmap(self, **kwargs):
         import numpy as np
         from scipy import stats
@@ -724,24 +870,7 @@ class TrajectoryData(ArrayData):
         sampling_stepsize = int(kwargs.pop('sampling_stepsize', None) or 0)
 
 
-        times = self.get_times()
-        if mintime is None:
-            minindex = 0
-        else:
-            minindex =  np.argmax(times>mintime)
-        if maxtime is None:
-            maxindex = len(times)
-        else:
-            maxindex = np.argmin(times < maxtime)
-        positions = self.get_positions()[minindex:maxindex:stepsize]
-
-
-        try:
-            if self.get_attr('units|positions') in ('bohr', 'atomic'):
-                from aiida.common.constants import bohr_to_ang
-                positions *= bohr_to_ang
-        except KeyError:
-            pass
+        positions = self._get_heatmap_positions(mintime, maxtime, stepsize)
 
         symbols = self.get_symbols()
         if elements is None:
@@ -880,3 +1009,124 @@ def plot_positions_XYZ(
             yticks[0].label1.set_visible(False)
 
         plt.show(block=not(dont_block))
+
+
+class TrajectoryWriter(object):
+    """
+    Set the trajectory of an unstored TrajectoryData one step at a time (see
+    :py:meth:`TrajectoryData.get_trajectory_writer`).
+
+    Each step is validated when it is appended, and the arrays are written
+    to the folder of the node with an
+    :py:class:`aiida.orm.data.array.ArrayAppender` each, so that only a
+    buffer of a few steps is kept in memory. If the writer is not closed,
+    the node does not validate and cannot be stored.
+    """
+
+    def __init__(self, trajectory, symbols, times, velocities, storage):
+        import numpy
+
+        symbols = numpy.array(symbols)
+        if symbols.ndim != 1:
+            raise ValueError("TrajectoryData.symbols must be a 1d array")
+        if any([not isinstance(i, basestring) for i in symbols]):
+            raise TypeError("TrajectoryData.symbols must be a numpy array of strings")
+
+        self._trajectory = trajectory
+        self._appenders = {}
+        numsites = len(symbols)
+        shapes = [('steps', (), int), ('cells', (3, 3), float),
+                  ('positions', (numsites, 3), float)]
+        if times:
+            shapes.append(('times', (), float))
+        if velocities:
+            shapes.append(('velocities', (numsites, 3), float))
+
+        trajectory.set_array('symbols', symbols, storage=storage)
+        for name in ['times', 'velocities']:
+            if name not in [n for n, _, _ in shapes]:
+                # Delete the array of the previous trajectory, if present
+                try:
+                    trajectory.delete_array(name)
+                except KeyError:
+                    pass
+        try:
+            for name, shape, dtype in shapes:
+                self._appenders[name] = trajectory.get_array_appender(
+                    name, shape, dtype, storage=storage)
+        except Exception:
+            self.discard()
+            raise
+
+    @property
+    def numsteps(self):
+        """
+        The number of steps appended so far.
+        """
+        return len(self._appenders['steps'])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def append_step(self, stepid, cell, positions, time=None,
+                    velocities=None):
+        """
+        Append a step to the trajectory, after checking that the types and
+        the dimensions are correct (see :py:meth:`TrajectoryData.set_trajectory`
+        for their meaning).
+
+        :param stepid: the integer step id
+        :param cell: the 3x3 cell
+        :param positions: the positions of the n sites, with shape (n, 3)
+        :param time: the time, required if the writer was created with
+          times=True
+        :param velocities: the velocities of the n sites, required if the
+          writer was created with velocities=True
+        """
+        import numpy
+
+        if isinstance(stepid, bool) or not isinstance(
+                stepid, (int, long, numpy.integer)):
+            raise TypeError("TrajectoryData.stepids must be integers")
+
+        values = {'steps': stepid, 'cells': cell, 'positions': positions,
+                  'times': time, 'velocities': velocities}
+        for name in ['times', 'velocities']:
+            if (values[name] is None) == (name in self._appenders):
+                raise ValueError(
+                    "TrajectoryData.{} must be given for each step if and "
+                    "only if the writer was created with {}=True".format(
+                        name, name))
+
+        # Check all the values before appending any, so that the arrays
+        # keep the same length
+        rows = {}
+        for name, appender in self._appenders.iteritems():
+            try:
+                rows[name] = appender.check_row(values[name])
+            except (TypeError, ValueError) as e:
+                raise type(e)("Invalid TrajectoryData.{} in step {}: "
+                              "{}".format(name, self.numsteps, e.message))
+        for name, appender in self._appenders.iteritems():
+            appender.append(rows[name])
+
+    def close(self):
+        """
+        Write the remaining steps and set the arrays of the trajectory.
+        """
+        for appender in self._appenders.itervalues():
+            appender.close()
+
+    def discard(self):
+        """
+        Remove the steps written so far, leaving the trajectory without
+        arrays other than the symbols.
+        """
+        for appender in self._appenders.itervalues():
+            appender.discard()
@@ -197,22 +197,31 @@ class Bool(BaseType):
 
 
 class List(Data, collections.MutableSequence):
+    """
+    A list stored in the 'list' attribute.
+
+    The list is kept in memory: the changes of an unstored node are applied
+    to a copy of the list, which is written to the attribute only once, by
+    :py:meth:`flush` or when the node is stored, and the list of a stored
+    node is read from the database only once.
+    """
     _LIST_KEY = 'list'
 
+    def __init__(self, **kwargs):
+        # The in-memory list (see _get_list) and whether it has changes that
+        # are not in the attribute yet
+        self._list = None
+        self._list_modified = False
+        super(List, self).__init__(**kwargs)
+
     def __getitem__(self, item):
         return self._get_list()[item]
 
     def __setitem__(self, key, value):
-        l = self._get_list()
-        l[key] = value
-        if not self._using_list_reference():
-            self._set_list(l)
+        self._get_list_for_update()[key] = value
 
     def __delitem__(self, key):
-        l = self._get_list()
-        del l[key]
-        if not self._using_list_reference():
-            self._set_list(l)
+        del self._get_list_for_update()[key]
 
     def __len__(self):
         return len(self._get_list())
@@ -221,31 +230,19 @@ class List(Data, collections.MutableSequence):
         return self._get_list().__str__()
 
     def append(self, value):
-        l = self._get_list()
-        l.append(value)
-        if not self._using_list_reference():
-            self._set_list(l)
+        self._get_list_for_update().append(value)
 
     def extend(self, L):
-        l = self._get_list()
-        l.extend(L)
-        if not self._using_list_reference():
-            self._set_list(l)
+        self._get_list_for_update().extend(L)
 
     def insert(self, i, value):
-        l = self._get_list()
-        l.insert(i, value)
-        if not self._using_list_reference():
-            self._set_list(l)
+        self._get_list_for_update().insert(i, value)
 
     def remove(self, value):
         del self[value]
 
-    def pop(self, **kwargs):
-        l = self._get_list()
-        l.pop(**kwargs)
-        if not self._using_list_reference():
-            self._set_list(l)
+    def pop(self, index=-1):
+        return self._get_list_for_update().pop(index)
 
     def index(self, value):
         return self._get_list().index(value)
@@ -254,45 +251,75 @@ class List(Data, collections.MutableSequence):
         return self._get_list().count(value)
 
     def sort(self, cmp=None, key=None, reverse=False):
-        l = self._get_list()
-        l.sort(cmp, key, reverse)
-        if not self._using_list_reference():
-            self._set_list(l)
+        self._get_list_for_update().sort(cmp, key, reverse)
 
     def reverse(self):
-        l = self._get_list()
-        l.reverse()
-        if not self._using_list_reference():
-            self._set_list(l)
+        self._get_list_for_update().reverse()
+
+    def flush(self):
+        """
+        Write the changes of the list to the attribute of the node. This is
+        done automatically when the node is stored.
+        """
+        if self._list_modified:
+            self._set_list(self._list)
+            self._list_modified = False
+
+    def store(self, *args, **kwargs):
+        """
+        Store the node, writing first the changes of the list.
+        """
+        if not self.is_stored:
+            # Also set the attribute of a list that was never used
+            self._get_list()
+            self.flush()
+        return super(List, self).store(*args, **kwargs)
+
+    def copy(self):
+        self.flush()
+        return super(List, self).copy()
+
+    def _get_objects_to_hash(self):
+        self.flush()
+        return super(List, self)._get_objects_to_hash()
 
     def _get_list(self):
-        try:
-            return self.get_attr(self._LIST_KEY)
-        except AttributeError:
-            self._set_list(list())
-            return self.get_attr(self._LIST_KEY)
+        """
+        Return the in-memory list, reading it from the attribute the first
+        time; it should not be modified.
+        """
+        if self._list is None:
+            try:
+                self._list = self.get_attr(self._LIST_KEY)
+            except AttributeError:
+                self._list = []
+                self._list_modified = not self.is_stored
+        return self._list
+
+    def _get_list_for_update(self):
+        """
+        Return the in-memory list, to be modified. The list read from the
+        attribute is copied before the first change, so that the attribute
+        is only changed by :py:meth:`flush`.
+
+        :raise ModificationNotAllowed: if the node is stored
+        """
+        from aiida.common.exceptions import ModificationNotAllowed
+
+        if self.is_stored:
+            raise ModificationNotAllowed(
+                "Cannot modify the list of the stored node with "
+                "uuid={}".format(self.uuid))
+        if not self._list_modified:
+            self._list = list(self._get_list())
+            self._list_modified = True
+        return self._list
 
     def _set_list(self, list_):
         if not isinstance(list_, list):
             raise TypeError("Must supply list type")
         self._set_attr(self._LIST_KEY, list_)
 
-    def _using_list_reference(self):
-        """
-        This function tells the class if we are using a list reference.  This
-        means that calls to self.get_list return a reference rather than a copy
-        of the underlying list and therefore self._set_list need not be called.
-        This knwoledge is essential to make sure this class is performant.
-
-        Currently the implementation assumes that if the node needs to be
-        stored then it is using the attributes cache which is a reference.
-
-        :return: True if using self._get_list returns a reference to the
-            underlying sequence.  False otherwise.
-        :rtype: bool
-        """
-        return self._to_be_stored
-
 
 def get_true_node():
     """
@@ -7,6 +7,9 @@
 # For further information on the license, see the LICENSE.txt file        #
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
+import json
+import os
+
 from aiida.orm.data.singlefile import SinglefileData
 from aiida.orm.calculation.inline import optional_inline
 
@@ -336,6 +339,199 @@ def parse_formula(formula):
     return contents
 
 
+# Version of the format of the files of the parse cache: files written with
+# another version are ignored
+_PARSE_CACHE_VERSION = 1
+
+# Cached value of the cifdata.parse_cache property, read once rather than for
+# every CIF file
+_parse_cache_enabled = None
+
+_SPACEGROUP_TAGS = ["_space_group.it_number", "_space_group_it_number",
+                    "_symmetry_int_tables_number"]
+
+
+def get_datablocks_from_pycifrw(values):
+    """
+    Converts the datablocks of a PyCifRW CifFile to plain python objects.
+
+    :param values: a PyCifRW CifFile
+    :return: a list of (name, tags) pairs, one for each datablock, where tags
+        is a dictionary with the values of the tags (strings, or lists of
+        strings for the looped tags)
+    """
+    datablocks = []
+    for name in values.keys():
+        block = values[name]
+        datablocks.append((name, dict((tag, block[tag])
+                                      for tag in block.keys())))
+    return datablocks
+
+
+def _get_spacegroup_number(tags):
+    """
+    Returns the spacegroup international number of a datablock, or None.
+
+    :param tags: the dictionary of the tags of the datablock
+    """
+    correct_tags = [tag for tag in _SPACEGROUP_TAGS if tag in tags]
+    if correct_tags:
+        try:
+            return int(tags[correct_tags[0]])
+        except ValueError:
+            pass
+    return None
+
+
+def extract_metadata(datablocks):
+    """
+    Extracts the metadata stored in the attributes of
+    :py:class:`aiida.orm.data.cif.CifData` in a single pass over the
+    datablocks.
+
+    :param datablocks: the datablocks, as returned by
+        :py:func:`get_datablocks_from_pycifrw`
+    :return: a dictionary with the lists of the summary formulae
+        ('formulae') and of the spacegroup numbers ('spacegroup_numbers') of
+        the datablocks
+    """
+    formulae = []
+    spacegroup_numbers = []
+    for _, tags in datablocks:
+        formulae.append(tags.get('_chemical_formula_sum', None))
+        spacegroup_numbers.append(_get_spacegroup_number(tags))
+    return {'formulae': formulae, 'spacegroup_numbers': spacegroup_numbers}
+
+
+def is_parse_cache_enabled():
+    """
+    Returns whether the metadata parsed from CIF files are cached (the
+    cifdata.parse_cache property).
+    """
+    global _parse_cache_enabled
+    if _parse_cache_enabled is None:
+        from aiida.common.setup import get_property
+        _parse_cache_enabled = get_property('cifdata.parse_cache')
+    return _parse_cache_enabled
+
+
+def get_parse_cache_path(md5):
+    """
+    Returns the path of the file of the parse cache for the CIF files with
+    a given MD5 checksum, or None if the parse cache is disabled.
+    """
+    from aiida.common.exceptions import ConfigurationError
+    from aiida.common.utils import get_repository_folder
+
+    try:
+        if not is_parse_cache_enabled():
+            return None
+        cache_folder = get_repository_folder('cache')
+    except ConfigurationError:
+        return None
+    return os.path.join(cache_folder, 'cif', md5[:2], '{}.json'.format(md5))
+
+
+def _read_parse_cache(md5):
+    """
+    Returns the datablocks of the CIF files with a given MD5 checksum from
+    the parse cache, or None if they are not cached.
+    """
+    path = get_parse_cache_path(md5)
+    if path is None:
+        return None
+    try:
+        with open(path) as f:
+            content = json.load(f)
+    except (IOError, ValueError):
+        return None
+    if content.get('version', None) != _PARSE_CACHE_VERSION:
+        return None
+    return [tuple(datablock) for datablock in content['datablocks']]
+
+
+def _write_parse_cache(md5, datablocks):
+    """
+    Writes the datablocks of the CIF files with a given MD5 checksum to the
+    parse cache. The file is renamed in place once written, so that
+    concurrent readers never see a partial file.
+    """
+    import tempfile
+
+    path = get_parse_cache_path(md5)
+    if path is None:
+        return
+    try:
+        dirname = os.path.dirname(path)
+        if not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                # Created by a concurrent process in the meantime
+                if not os.path.isdir(dirname):
+                    raise
+        handle, tmp_path = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        with os.fdopen(handle, 'w') as f:
+            json.dump({'version': _PARSE_CACHE_VERSION,
+                       'datablocks': datablocks}, f)
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        # The cache is only an optimization: the file will be parsed again
+        pass
+
+
+def _cache_cif_file(filename):
+    """
+    Parses a CIF file into the parse cache, if it is not already cached.
+    Executed in the worker processes of :py:func:`cache_cif_files`.
+
+    :return: the MD5 checksum of the file, or None if it could not be parsed
+    """
+    import CifFile
+    from aiida.common.utils import md5_file
+
+    try:
+        md5 = md5_file(filename)
+        if get_parse_cache_path(md5) is not None and \
+                _read_parse_cache(md5) is None:
+            _write_parse_cache(md5, get_datablocks_from_pycifrw(
+                CifFile.ReadCif(filename)))
+        return md5
+    except Exception:
+        # The error is raised again when the CifData node is created from
+        # the file, in the main process
+        return None
+
+
+def cache_cif_files(filenames, processes=None):
+    """
+    Parses CIF files in parallel, in several processes, into the parse cache
+    (see the cifdata.parse_cache property). The CifData nodes created
+    afterwards from the same files take their datablocks and metadata from
+    the cache instead of parsing the files again.
+
+    :param filenames: a list of absolute paths of CIF files
+    :param processes: the number of processes, by default the number of
+        CPUs
+    :return: the list of the MD5 checksums of the files, with None for the
+        files that could not be parsed
+    """
+    import multiprocessing
+
+    if processes == 1 or len(filenames) < 2:
+        return [_cache_cif_file(filename) for filename in filenames]
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(_cache_cif_file, filenames,
+                        chunksize=max(1, len(filenames) // (4 * processes)))
+    finally:
+        pool.close()
+        pool.join()
+
+
 class CifData(SinglefileData):
     """
     Wrapper for Crystallographic Interchange File (CIF)
@@ -377,10 +573,7 @@ class CifData(SinglefileData):
         .. note:: the hash has to be stored in a ``_md5`` attribute,
             otherwise the CIF file will not be found.
         """
-        from aiida.orm.querybuilder import QueryBuilder
-        qb = QueryBuilder()
-        qb.append(cls, filters={'attributes.md5': {'==': md5}})
-        return [_ for [_] in qb.all()]
+        return cls.from_md5_many([md5])[md5]
 
     @classmethod
     def get_or_create(cls, filename, use_first=False, store_cif=True):
@@ -496,6 +689,7 @@ class CifData(SinglefileData):
         """
         super(CifData, self).__init__(**kwargs)
         self._values = None
+        self._datablocks = None
         self._ase = None
 
     def store(self, *args, **kwargs):
@@ -518,41 +712,51 @@ class CifData(SinglefileData):
             self.source = {}
         self._set_attr('md5', md5sum)
         self._values = None
+        self._datablocks = None
         self._ase = None
-        self._set_attr('formulae', self.get_formulae())
-        self._set_attr('spacegroup_numbers', self.get_spacegroup_numbers())
+        metadata = extract_metadata(self.get_datablocks())
+        self._set_attr('formulae', metadata['formulae'])
+        self._set_attr('spacegroup_numbers', metadata['spacegroup_numbers'])
+
+    def get_datablocks(self):
+        """
+        Get the datablocks of the CIF as plain python objects (see
+        :py:func:`get_datablocks_from_pycifrw`); the result should not be
+        modified.
+
+        The datablocks are read from the parse cache when the file was
+        already parsed, possibly by another node or process, so that
+        PyCifRW is not needed in this case.
+        """
+        if self._values is not None:
+            # Already parsed, and possibly modified in memory
+            return get_datablocks_from_pycifrw(self._values)
+        if self._datablocks is None:
+            md5 = self.get_attr('md5', None)
+            datablocks = None
+            if md5 is not None:
+                datablocks = _read_parse_cache(md5)
+            if datablocks is None:
+                datablocks = get_datablocks_from_pycifrw(self.values)
+                if md5 is not None:
+                    _write_parse_cache(md5, datablocks)
+            self._datablocks = datablocks
+        return self._datablocks
 
     def get_formulae(self, mode='sum'):
         """
         Get the formula.
         """
         formula_tag = "_chemical_formula_{}".format(mode)
-        formulae = []
-        for datablock in self.values.keys():
-            formula = None
-            if formula_tag in self.values[datablock].keys():
-                formula = self.values[datablock][formula_tag]
-            formulae.append(formula)
-        return formulae
+        return [tags.get(formula_tag, None)
+                for _, tags in self.get_datablocks()]
 
     def get_spacegroup_numbers(self):
         """
         Get the spacegroup international number.
         """
-        spg_tags = ["_space_group.it_number", "_space_group_it_number",
-                    "_symmetry_int_tables_number"]
-        spacegroup_numbers = []
-        for datablock in self.values.keys():
-            spacegroup_number = None
-            correct_tags = [tag for tag in spg_tags
-                            if tag in self.values[datablock].keys()]
-            if correct_tags:
-                try:
-                    spacegroup_number = int(self.values[datablock][correct_tags[0]])
-                except ValueError:
-                    pass
-            spacegroup_numbers.append(spacegroup_number)
-        return spacegroup_numbers
+        return [_get_spacegroup_number(tags)
+                for _, tags in self.get_datablocks()]
 
     def has_partial_occupancies(self):
         """
@@ -564,9 +768,9 @@ class CifData(SinglefileData):
         epsilon = 1e-6
         tag = "_atom_site_occupancy"
         partial_occupancies = False
-        for datablock in self.values.keys():
-            if tag in self.values[datablock].keys():
-                for site in self.values[datablock][tag]:
+        for _, tags in self.get_datablocks():
+            if tag in tags:
+                for site in tags[tag]:
                     # find the float number in the string
                     bracket = site.find('(')
                     if bracket == -1:
@@ -587,9 +791,9 @@ class CifData(SinglefileData):
         :return: True if there are attached hydrogens, False otherwise.
         """
         tag = '_atom_site_attached_hydrogens'
-        for datablock in self.values.keys():
-            if tag in self.values[datablock].keys():
-                for value in self.values[datablock][tag]:
+        for _, tags in self.get_datablocks():
+            if tag in tags:
+                for value in tags[tag]:
                     if value != '.' and value != '?' and value != '0':
                         return True
         return False
@@ -29,10 +29,11 @@ class ParameterData(Data):
 
         :param dict: The dictionary to set.
         """
-        import copy
         from aiida.common.exceptions import ModificationNotAllowed
 
-        old_dict = copy.deepcopy(self.get_dict())
+        # No deep copy is needed: the values are not changed by deleting the
+        # attributes, and setting them again copies them
+        old_dict = self.get_dict()
 
         try:
             # Delete existing attributes
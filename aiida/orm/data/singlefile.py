@@ -27,6 +27,8 @@ import os
 from aiida.orm.data import Data
 
 
+# Maximum number of checksums in the filter of a query of from_md5_many
+_MD5_QUERY_BATCH_SIZE = 1000
 
 
 class SinglefileData(Data):
@@ -39,6 +41,34 @@ class SinglefileData(Data):
     the filename in the 'filename' attribute.
     """
 
+    @classmethod
+    def from_md5_many(cls, md5s):
+        """
+        Return the nodes of this class whose file has one of the given MD5
+        checksums, looking them up together rather than one query per
+        checksum.
+
+        .. note:: the checksum has to be stored in the ``md5`` attribute
+            (as done e.g. by CifData and UpfData), which is indexed in the
+            database.
+
+        :param md5s: a list of MD5 checksums
+        :return: a dictionary with the list of the nodes for each checksum
+            (empty if no node was found)
+        """
+        from aiida.orm.querybuilder import QueryBuilder
+
+        md5s = list(set(md5s))
+        nodes = dict((md5, []) for md5 in md5s)
+        for start in range(0, len(md5s), _MD5_QUERY_BATCH_SIZE):
+            qb = QueryBuilder()
+            qb.append(cls, filters={'attributes.md5': {
+                'in': md5s[start:start + _MD5_QUERY_BATCH_SIZE]}},
+                      project=['*', 'attributes.md5'])
+            for node, md5 in qb.iterall():
+                nodes[md5].append(node)
+        return nodes
+
     @property
     def filename(self):
         """
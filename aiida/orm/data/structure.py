@@ -17,6 +17,7 @@ from aiida.common.utils import classproperty, xyz_parser_iterator
 from aiida.orm.calculation.inline import optional_inline
 import itertools
 import copy
+import os
 
 # Threshold used to check if the mass of two different Site objects is the same.
 
@@ -27,6 +28,13 @@ _sum_threshold = 1.e-6
 # Threshold used to check if the cell volume is not zero.
 _volume_threshold = 1.e-6
 
+# The formats in which the sites of a structure can be stored: as a list of
+# dictionaries in the 'sites' attribute, or as two arrays (the positions and
+# the indices of the kinds of the sites) in .npy files in the folder of the
+# node, which is much more compact for large structures
+SITES_IN_ATTRIBUTES = 'attributes'
+SITES_IN_ARRAYS = 'arrays'
+
 # Element table
 from aiida.common.constants import elements
 
@@ -725,6 +733,10 @@ class StructureData(Data):
                               ("pymatgen", "pymatgen_structure"),
                               ("pymatgen_molecule", "pymatgen_structure")]
 
+    # The files with the arrays of the sites, see set_site_storage
+    _site_kinds_filename = 'site_kinds.npy'
+    _site_positions_filename = 'site_positions.npy'
+
     @property
     def _set_defaults(self):
         parent_dict = super(StructureData, self)._set_defaults
@@ -838,26 +850,63 @@ class StructureData(Data):
                                       "instead of only one".format(
                     c, counts[c]))
 
-        try:
-            # This will try to create the sites objects
-            sites = self.sites
-        except ValueError as e:
-            raise ValidationError(
-                "Unable to validate the sites: {}".format(e.message))
-
-        for site in sites:
-            if site.kind_name not in [k.name for k in kinds]:
+        kind_names = set(k.name for k in kinds)
+        if self.get_site_storage() == SITES_IN_ARRAYS:
+            site_kind_names = self._validate_site_arrays(kinds)
+        else:
+            try:
+                # This will try to create the sites objects
+                sites = self.sites
+            except ValueError as e:
                 raise ValidationError(
-                    "A site has kind {}, but no specie with that name exists"
-                    "".format(site.kind_name))
+                    "Unable to validate the sites: {}".format(e.message))
+
+            for site in sites:
+                if site.kind_name not in kind_names:
+                    raise ValidationError(
+                        "A site has kind {}, but no specie with that name exists"
+                        "".format(site.kind_name))
+            site_kind_names = set(s.kind_name for s in sites)
 
-        kinds_without_sites = (
-            set(k.name for k in kinds) - set(s.kind_name for s in sites))
+        kinds_without_sites = kind_names - site_kind_names
         if kinds_without_sites:
             raise ValidationError("The following kinds are defined, but there "
                                   "are no sites with that kind: {}".format(
                 list(kinds_without_sites)))
 
+    def _validate_site_arrays(self, kinds):
+        """
+        Check the arrays of the sites, see :py:meth:`.set_site_storage`.
+
+        :return: the set of the kind names of the sites
+        """
+        import numpy
+        from aiida.common.exceptions import ValidationError
+
+        if self.get_attr('sites', None) is not None:
+            raise ValidationError("The sites are stored in arrays, but the "
+                                  "'sites' attribute is also set")
+        try:
+            kind_indices, positions = self._read_site_arrays()
+        except (IOError, OSError, ValueError) as e:
+            raise ValidationError(
+                "Unable to read the arrays of the sites: {}".format(e))
+        if (kind_indices.ndim != 1 or
+                positions.shape != (len(kind_indices), 3)):
+            raise ValidationError(
+                "The arrays of the sites have inconsistent shapes: {} and "
+                "{}".format(kind_indices.shape, positions.shape))
+        if kind_indices.dtype.kind not in 'iu':
+            raise ValidationError("The kind indices of the sites must be "
+                                  "integers")
+        if len(kind_indices) and (kind_indices.min() < 0 or
+                                  kind_indices.max() >= len(kinds)):
+            raise ValidationError("A site has a kind index out of the range "
+                                  "of the {} kinds".format(len(kinds)))
+        if not numpy.isfinite(positions).all():
+            raise ValidationError("The positions of the sites must be finite")
+        return set(kinds[i].name for i in numpy.unique(kind_indices))
+
     def _prepare_xsf(self):
         """
         Write the given structure to a string of format XSF (for XCrySDen).
@@ -866,21 +915,22 @@ class StructureData(Data):
             raise NotImplementedError("XSF for alloys or systems with "
                                       "vacancies not implemented.")
 
-        sites = self.sites
+        # I checked above that it is not an alloy, therefore I take the
+        # first symbol
+        atomic_numbers = {k.name: _atomic_numbers[k.symbols[0]]
+                          for k in self.kinds}
+        kind_names = self.get_site_kindnames()
+        positions = self.get_site_positions()
 
-        return_string = "CRYSTAL\nPRIMVEC 1\n"
+        lines = ["CRYSTAL", "PRIMVEC 1"]
         for cell_vector in self.cell:
-            return_string += " ".join(["%18.10f" % i for i in cell_vector])
-            return_string += "\n"
-        return_string += "PRIMCOORD 1\n"
-        return_string += "%d 1\n" % len(sites)
-        for site in sites:
-            # I checked above that it is not an alloy, therefore I take the
-            # first symbol
-            return_string += "%s " % _atomic_numbers[
-                self.get_kind(site.kind_name).symbols[0]]
-            return_string += "%18.10f %18.10f %18.10f\n" % tuple(site.position)
-        return return_string
+            lines.append(" ".join(["%18.10f" % i for i in cell_vector]))
+        lines.append("PRIMCOORD 1")
+        lines.append("%d 1" % len(kind_names))
+        for kind_name, position in zip(kind_names, positions.tolist()):
+            lines.append("%s %18.10f %18.10f %18.10f" % (
+                (atomic_numbers[kind_name],) + tuple(position)))
+        return "\n".join(lines) + "\n"
 
     def _prepare_cif(self):
         """
@@ -946,14 +996,13 @@ class StructureData(Data):
         self.set_pbc(pbc)
 
         # Calculating the minimal cell:
-        positions = np.array([site.position for site in self.sites])
+        positions = self.get_site_positions()
         position_min, position_max = get_extremas_from_positions(positions)
 
         # Translate the structure to the origin, such that the minimal values in each dimension
         # amount to (0,0,0)
         positions -= position_min
-        for index, site in enumerate(self.get_attr('sites')):
-            site['position'] = list(positions[index])
+        self.reset_sites_positions(positions)
 
         # The orthorhombic cell that (just) accomodates the whole structure is now given by the
         # extremas of position in each dimension:
@@ -1027,11 +1076,18 @@ class StructureData(Data):
             used to group and/or order the symbols in the formula
         """
 
-        symbol_list = [self.get_kind(s.kind_name).get_symbols_string()
-                       for s in self.sites]
+        symbol_list = self._get_site_symbols_strings()
 
         return get_formula(symbol_list, mode=mode, separator=separator)
 
+    def _get_site_symbols_strings(self):
+        """
+        Return the symbols string of the kind of each site, creating each
+        kind only once.
+        """
+        symbols_strings = {k.name: k.get_symbols_string() for k in self.kinds}
+        return [symbols_strings[n] for n in self.get_site_kindnames()]
+
     def get_site_kindnames(self):
         """
         Return a list with length equal to the number of sites of this structure,
@@ -1043,7 +1099,26 @@ class StructureData(Data):
 
         :return: a list of strings
         """
-        return [this_site.kind_name for this_site in self.sites]
+        if self.get_site_storage() == SITES_IN_ARRAYS:
+            kind_indices, _ = self._read_site_arrays()
+            kind_names = [k['name'] for k in self.get_attr('kinds', [])]
+            return [kind_names[i] for i in kind_indices.tolist()]
+        return [raw['kind_name'] for raw in self.get_attr('sites', [])]
+
+    def get_site_positions(self):
+        """
+        Return the positions of all the sites, in angstrom.
+
+        :return: a numpy array with shape (n, 3), with n the number of sites
+        """
+        import numpy
+
+        if self.get_site_storage() == SITES_IN_ARRAYS:
+            _, positions = self._read_site_arrays()
+            return numpy.array(positions)
+        return numpy.array([raw['position'] for raw in
+                            self.get_attr('sites', [])],
+                           dtype=float).reshape(-1, 3)
 
     def get_composition(self):
         """
@@ -1055,14 +1130,9 @@ class StructureData(Data):
 
         :returns: a dictionary with the composition
         """
-        symbols_list = [self.get_kind(s.kind_name).get_symbols_string()
-                        for s in self.sites]
-        composition = {
-            symbol: symbols_list.count(symbol)
-            for symbol
-            in set(symbols_list)
-            }
-        return composition
+        from collections import Counter
+
+        return dict(Counter(self._get_site_symbols_strings()))
 
     def get_ase(self):
         """
@@ -1166,15 +1236,16 @@ class StructureData(Data):
 
         new_site = Site(site=site)  # So we make a copy
 
-        if site.kind_name not in [k.name for k in self.kinds]:
+        # The names are read from the raw kinds, without creating the Kind
+        # objects
+        kind_names = [k['name'] for k in self.get_attr('kinds', [])]
+        if site.kind_name not in kind_names:
             raise ValueError("No kind with name '{}', available kinds are: "
-                             "{}".format(site.kind_name,
-                                         [k.name for k in self.kinds]))
+                             "{}".format(site.kind_name, kind_names))
 
         # If here, no exceptions have been raised, so I add the site.
         # I join two lists. Do not use .append, which would work in-place
-        self._set_attr('sites',
-                       self.get_attr('sites', []) + [new_site.get_raw()])
+        self._set_raw_sites(self._get_raw_sites() + [new_site.get_raw()])
 
     def append_atom(self, **kwargs):
         """
@@ -1374,13 +1445,245 @@ class StructureData(Data):
                 "The StructureData object cannot be modified, "
                 "it has already been stored")
 
-        self._set_attr('sites', [])
+        self._set_raw_sites([])
+
+    def get_site_storage(self):
+        """
+        Return the format in which the sites are stored, see
+        :py:meth:`.set_site_storage`.
+        """
+        return self.get_attr('site_storage', SITES_IN_ATTRIBUTES)
+
+    def set_site_storage(self, storage):
+        """
+        Set the format in which the sites are stored, converting the sites
+        already set. Can also be passed when creating the node, e.g.
+        ``StructureData(site_storage='arrays')``.
+
+        :param storage: 'attributes' (the default) to store each site as a
+            dictionary in the 'sites' attribute, or 'arrays' to store the
+            positions and the indices of the kinds of all the sites in two
+            arrays in the folder of the node. The latter is much more
+            compact for structures with thousands of sites, but the sites
+            cannot be used in queries, and :py:attr:`.sites` returns
+            read-only sites.
+        """
+        from aiida.common.exceptions import ModificationNotAllowed
+
+        if storage not in (SITES_IN_ATTRIBUTES, SITES_IN_ARRAYS):
+            raise ValueError("Unknown site storage '{}', valid values are "
+                             "'{}' and '{}'".format(storage,
+                                                    SITES_IN_ATTRIBUTES,
+                                                    SITES_IN_ARRAYS))
+        if self.is_stored:
+            raise ModificationNotAllowed(
+                "The StructureData object cannot be modified, "
+                "it has already been stored")
+        if storage == self.get_site_storage():
+            return
+
+        raw_sites = self._get_raw_sites()
+        if storage == SITES_IN_ARRAYS:
+            try:
+                self._del_attr('sites')
+            except AttributeError:
+                pass
+        else:
+            for filename in (self._site_kinds_filename,
+                             self._site_positions_filename):
+                if os.path.exists(self._get_folder_pathsubfolder.get_abs_path(
+                        filename)):
+                    self.remove_path(filename)
+            self._site_arrays = None
+            self._site_views = None
+        self._set_attr('site_storage', storage)
+        self._set_raw_sites(raw_sites)
+
+    def _get_raw_sites(self):
+        """
+        Return the list of the raw sites, in whatever format they are stored.
+        """
+        if self.get_site_storage() == SITES_IN_ARRAYS:
+            return [{'position': tuple(position), 'kind_name': kind_name}
+                    for kind_name, position in zip(
+                    self.get_site_kindnames(),
+                    self._read_site_arrays()[1].tolist())]
+        return self.get_attr('sites', [])
+
+    def _set_raw_sites(self, raw_sites):
+        """
+        Replace the sites with a list of raw sites, in the format in which
+        they are stored.
+        """
+        if self.get_site_storage() == SITES_IN_ARRAYS:
+            self._write_site_arrays([raw['kind_name'] for raw in raw_sites],
+                                    [raw['position'] for raw in raw_sites])
+        else:
+            self._set_attr('sites', raw_sites)
+
+    def _read_site_arrays(self):
+        """
+        Return the read-only arrays of the kind indices and of the positions
+        of the sites stored in arrays, reading them only once.
+        """
+        import numpy
+
+        site_arrays = getattr(self, '_site_arrays', None)
+        if site_arrays is None:
+            with self._open_file(self._site_kinds_filename) as f:
+                kind_indices = numpy.load(f)
+            with self._open_file(self._site_positions_filename) as f:
+                positions = numpy.load(f)
+            kind_indices.flags.writeable = False
+            positions.flags.writeable = False
+            site_arrays = (kind_indices, positions)
+            self._site_arrays = site_arrays
+        return site_arrays
+
+    def _write_site_arrays(self, kind_names, positions):
+        """
+        Write the arrays of the sites in the folder of the node.
+
+        :param kind_names: the kind name of each site
+        :param positions: the positions, with shape (n, 3)
+        """
+        import numpy
+
+        indices = {k['name']: i for i, k in
+                   enumerate(self.get_attr('kinds', []))}
+        try:
+            kind_indices = numpy.array([indices[n] for n in kind_names],
+                                       dtype=numpy.int32)
+        except KeyError as e:
+            raise ValueError("No kind with name '{}'".format(e.args[0]))
+        positions = numpy.array(positions, dtype=float).reshape(-1, 3)
+
+        folder = self._get_folder_pathsubfolder
+        with folder.open(self._site_kinds_filename, 'wb') as f:
+            numpy.save(f, kind_indices)
+        with folder.open(self._site_positions_filename, 'wb') as f:
+            numpy.save(f, positions)
+        self._site_arrays = None
+        self._site_views = None
+
+    def set_sites_bulk(self, symbols, positions, kinds=None):
+        """
+        Replace all the kinds and sites of the structure at once. The input
+        is validated once for all the sites and each attribute is written
+        once, rather than once per site as with
+        :py:meth:`.append_atom`, which makes this much faster for large
+        structures.
+
+        :param symbols: a list with the kind name of each site. If kinds is
+            not given, these must be chemical symbols, and one kind is
+            created for each of them, as :py:meth:`.append_atom` does
+        :param positions: the positions of the sites in angstrom, as an
+            array (or list of lists) with shape (n, 3)
+        :param kinds: (optional) a list of Kind objects, with one kind for
+            each name in symbols
+        :raise ModificationNotAllowed: if the structure is already stored
+        :raise ValueError: if the positions or the kinds are invalid
+        """
+        import numpy
+        from aiida.common.exceptions import ModificationNotAllowed
+
+        if self.is_stored:
+            raise ModificationNotAllowed(
+                "The StructureData object cannot be modified, "
+                "it has already been stored")
+
+        symbols = [str(s) for s in symbols]
+        try:
+            positions = numpy.array(positions, dtype=float)
+        except (ValueError, TypeError):
+            raise ValueError("Wrong format for the positions, must be a list "
+                             "of lists of three float numbers")
+        if positions.shape != (len(symbols), 3) and not (
+                positions.size == 0 and not symbols):
+            raise ValueError("The positions must have shape (n, 3), with n "
+                             "the number of symbols ({}), not {}".format(
+                len(symbols), positions.shape))
+        if not numpy.isfinite(positions).all():
+            raise ValueError("The positions must be finite numbers")
+
+        if kinds is None:
+            # One kind for each symbol, in the order of their first site
+            kinds = []
+            kind_names = set()
+            for symbol in symbols:
+                if symbol not in kind_names:
+                    kinds.append(Kind(symbols=symbol))
+                    kind_names.add(symbol)
+        else:
+            for k in kinds:
+                if not isinstance(k, Kind):
+                    raise TypeError("Each element of the kinds list must "
+                                    "be a Kind object")
+            kinds = [Kind(kind=k) for k in kinds]  # So we make a copy
+            kind_names = [k.name for k in kinds]
+            if len(kind_names) != len(set(kind_names)):
+                raise ValueError("Multiple kinds with the same name")
+            missing = set(symbols) - set(kind_names)
+            if missing:
+                raise ValueError("No kind with name {}, available kinds are: "
+                                 "{}".format(sorted(missing), kind_names))
+
+        self._set_attr('kinds', [k.get_raw() for k in kinds])
+        self._internal_kind_tags = dict(
+            (i, k._internal_tag) for i, k in enumerate(kinds))
+        if self.get_site_storage() == SITES_IN_ARRAYS:
+            self._write_site_arrays(symbols, positions)
+        else:
+            self._set_attr('sites', [
+                {'position': tuple(position), 'kind_name': symbol}
+                for symbol, position in zip(symbols, positions.tolist())])
+
+    @classmethod
+    def from_arrays(cls, cell, symbols, positions, pbc=None, kinds=None,
+                    site_storage=None):
+        """
+        Create a structure (not stored yet) from arrays, setting all the
+        sites at once, see :py:meth:`.set_sites_bulk`::
+
+            structure = StructureData.from_arrays(
+                cell, ['Si'] * len(positions), positions)
+
+        :param cell: the 3x3 cell
+        :param symbols: a list with the kind name of each site
+        :param positions: the positions of the sites, with shape (n, 3)
+        :param pbc: the periodic boundary conditions, by default True in
+            all three directions
+        :param kinds: (optional) a list of Kind objects, with one kind for
+            each name in symbols
+        :param site_storage: (optional) the format of the sites, see
+            :py:meth:`.set_site_storage`
+        """
+        structure = cls(cell=cell)
+        if pbc is not None:
+            structure.set_pbc(pbc)
+        if site_storage is not None:
+            structure.set_site_storage(site_storage)
+        structure.set_sites_bulk(symbols, positions, kinds=kinds)
+        return structure
 
     @property
     def sites(self):
         """
         Returns a list of sites.
-        """
+
+        .. note:: If the sites are stored in arrays (see
+            :py:meth:`.set_site_storage`), the sites are read-only and
+            shared by all the calls.
+        """
+        if self.get_site_storage() == SITES_IN_ARRAYS:
+            site_views = getattr(self, '_site_views', None)
+            if site_views is None:
+                site_views = [
+                    _SiteView(kind_name, position) for kind_name, position
+                    in zip(self.get_site_kindnames(),
+                           self._read_site_arrays()[1].tolist())]
+                self._site_views = site_views
+            return list(site_views)
         try:
             raw_sites = self.get_attr('sites')
         except AttributeError:
@@ -1504,7 +1807,8 @@ class StructureData(Data):
         else:
 
             # test consistency of th enew input
-            n_sites = len(self.sites)
+            raw_sites = self._get_raw_sites()
+            n_sites = len(raw_sites)
             if n_sites != len(new_positions) and conserve_particle:
                 raise ValueError(
                     "the new positions should be as many as the previous structure.")
@@ -1523,14 +1827,12 @@ class StructureData(Data):
                                      "found instead {}".format(len(this_pos)))
 
                 # now append this Site to the new_site list.
-                new_site = Site(site=self.sites[i])  # So we make a copy
+                new_site = Site(raw=raw_sites[i])  # So we make a copy
                 new_site.position = copy.deepcopy(this_pos)
-                new_sites.append(new_site)
+                new_sites.append(new_site.get_raw())
 
-            # now clear the old sites, and substitute with the new ones
-            self.clear_sites()
-            for this_new_site in new_sites:
-                self.append_site(this_new_site)
+            # now substitute the old sites with the new ones, at once
+            self._set_raw_sites(new_sites)
 
     @property
     def pbc(self):
@@ -1658,10 +1960,10 @@ class StructureData(Data):
         """
         from phonopy.structure.atoms import Atoms as PhonopyAtoms
 
-        atoms = PhonopyAtoms(symbols=[_.kind_name for _ in self.sites])
+        atoms = PhonopyAtoms(symbols=self.get_site_kindnames())
         # Phonopy internally uses scaled positions, so you must store cell first!
         atoms.set_cell(self.cell)
-        atoms.set_positions([_.position for _ in self.sites])
+        atoms.set_positions(self.get_site_positions())
 
         return atoms
 
@@ -1675,13 +1977,44 @@ class StructureData(Data):
         """
         import ase
 
-        asecell = ase.Atoms(cell=self.cell, pbc=self.pbc)
+        # The symbol, mass and tag of each kind are found once, rather than
+        # for each site
         _kinds = self.kinds
-
-        for site in self.sites:
-            asecell.append(site.get_ase(kinds=_kinds))
+        kind_atoms = {}
+        for kind, tag in zip(_kinds, _get_ase_kind_tags(_kinds)):
+            kind_atoms[kind.name] = (kind, tag)
+
+        symbols = []
+        masses = []
+        tags = []
+        for kind_name in self.get_site_kindnames():
+            try:
+                kind, tag = kind_atoms[kind_name]
+            except KeyError:
+                raise ValueError("No kind '{}' has been found in the list of "
+                                 "kinds".format(kind_name))
+            if kind.is_alloy() or kind.has_vacancies():
+                raise ValueError("Cannot convert to ASE if the kind "
+                                 "represents an alloy or it has vacancies.")
+            symbols.append(str(kind.symbols[0]))
+            masses.append(kind.mass)
+            tags.append(tag if tag is not None else 0)
+
+        asecell = ase.Atoms(symbols=symbols,
+                            positions=self.get_site_positions(),
+                            masses=masses, cell=self.cell, pbc=self.pbc)
+        if any(tags):
+            asecell.set_tags(tags)
         return asecell
 
+    def _get_pymatgen_species(self):
+        """
+        Return the species of each site, in the format of pymatgen.
+        """
+        kind_species = {k.name: {s: w for s, w in zip(k.symbols, k.weights)}
+                        for k in self.kinds}
+        return [kind_species[n] for n in self.get_site_kindnames()]
+
     def _get_object_pymatgen(self):
         """
         Converts
@@ -1720,12 +2053,8 @@ class StructureData(Data):
             raise ValueError("Periodic boundary conditions must apply in "
                              "all three dimensions of real space")
 
-        species = []
-        for s in self.sites:
-            k = self.get_kind(s.kind_name)
-            species.append({s: w for s, w in zip(k.symbols, k.weights)})
-
-        positions = [list(x.position) for x in self.sites]
+        species = self._get_pymatgen_species()
+        positions = self.get_site_positions().tolist()
         return Structure(self.cell, species, positions,
                          coords_are_cartesian=True)
 
@@ -1744,12 +2073,8 @@ class StructureData(Data):
         """
         from pymatgen.core.structure import Molecule
 
-        species = []
-        for s in self.sites:
-            k = self.get_kind(s.kind_name)
-            species.append({s: w for s, w in zip(k.symbols, k.weights)})
-
-        positions = [list(x.position) for x in self.sites]
+        species = self._get_pymatgen_species()
+        positions = self.get_site_positions().tolist()
         return Molecule(species, positions)
 
 
@@ -2236,47 +2561,9 @@ class Site(object):
         .. note:: If any site is an alloy or has vacancies, a ValueError
             is raised (from the site.get_ase() routine).
         """
-        from collections import defaultdict
         import ase
 
-        # I create the list of tags
-        tag_list = []
-        used_tags = defaultdict(list)
-        for k in kinds:
-            # Skip alloys and vacancies
-            if k.is_alloy() or k.has_vacancies():
-                tag_list.append(None)
-            # If the kind name is equal to the specie name,
-            # then no tag should be set
-            elif unicode(k.name) == unicode(k.symbols[0]):
-                tag_list.append(None)
-            else:
-                # Name is not the specie name
-                if k.name.startswith(k.symbols[0]):
-                    try:
-                        new_tag = int(k.name[len(k.symbols[0])])
-                        tag_list.append(new_tag)
-                        used_tags[k.symbols[0]].append(new_tag)
-                        continue
-                    except ValueError:
-                        pass
-                tag_list.append(k.symbols[0])  # I use a string as a placeholder
-
-        for i in range(len(tag_list)):
-            # If it is a string, it is the name of the element,
-            # and I have to generate a new integer for this element
-            # and replace tag_list[i] with this new integer
-            if isinstance(tag_list[i], basestring):
-                # I get a list of used tags for this element
-                existing_tags = used_tags[tag_list[i]]
-                if existing_tags:
-                    new_tag = max(existing_tags) + 1
-                else:  # empty list
-                    new_tag = 1
-                # I store it also as a used tag!
-                used_tags[tag_list[i]].append(new_tag)
-                # I update the tag
-                tag_list[i] = new_tag
+        tag_list = _get_ase_kind_tags(kinds)
 
         found = False
         for k, t in zip(kinds, tag_list):
@@ -2349,5 +2636,75 @@ class Site(object):
                                                   self.position[1],
                                                   self.position[2])
 
+
+class _SiteView(Site):
+    """
+    A read-only site, returned by :py:attr:`StructureData.sites` for the
+    structures whose sites are stored in arrays. The same objects are
+    returned by all the calls, rather than a new copy of each site.
+    """
+
+    def __init__(self, kind_name, position):
+        self._kind_name = unicode(kind_name)
+        self._position = tuple(position)
+
+    kind_name = property(Site.kind_name.fget)
+
+    @property
+    def position(self):
+        # The position is a tuple of floats, so it needs no copy
+        return self._position
+
+
+def _get_ase_kind_tags(kinds):
+    """
+    Return the ASE tag of the atoms of each kind (None for no tag), used to
+    distinguish the kinds of the same element.
+
+    :param kinds: the list of kinds from the StructureData object.
+    """
+    from collections import defaultdict
+
+    # I create the list of tags
+    tag_list = []
+    used_tags = defaultdict(list)
+    for k in kinds:
+        # Skip alloys and vacancies
+        if k.is_alloy() or k.has_vacancies():
+            tag_list.append(None)
+        # If the kind name is equal to the specie name,
+        # then no tag should be set
+        elif unicode(k.name) == unicode(k.symbols[0]):
+            tag_list.append(None)
+        else:
+            # Name is not the specie name
+            if k.name.startswith(k.symbols[0]):
+                try:
+                    new_tag = int(k.name[len(k.symbols[0])])
+                    tag_list.append(new_tag)
+                    used_tags[k.symbols[0]].append(new_tag)
+                    continue
+                except ValueError:
+                    pass
+            tag_list.append(k.symbols[0])  # I use a string as a placeholder
+
+    for i in range(len(tag_list)):
+        # If it is a string, it is the name of the element,
+        # and I have to generate a new integer for this element
+        # and replace tag_list[i] with this new integer
+        if isinstance(tag_list[i], basestring):
+            # I get a list of used tags for this element
+            existing_tags = used_tags[tag_list[i]]
+            if existing_tags:
+                new_tag = max(existing_tags) + 1
+            else:  # empty list
+                new_tag = 1
+            # I store it also as a used tag!
+            used_tags[tag_list[i]].append(new_tag)
+            # I update the tag
+            tag_list[i] = new_tag
+
+    return tag_list
+
 # get_structuredata_from_qeinput has been moved to:
 # aiida.tools.codespecific.quantumespresso.qeinputparser
@@ -44,28 +44,94 @@ _element_v2_regexp = re.compile(
    """, re.VERBOSE)
 
 
-def get_pseudos_from_structure(structure, family_name):
+# The element -> pk dictionaries of the families already used by this
+# process, with the pks of the nodes of the family when they were built. Only
+# pks are cached: the nodes are bound to a session, which may be closed or
+# belong to another process after a fork
+_family_pks_cache = {}
+
+
+def _get_family_element_pks(family_name):
     """
-    Given a family name (a UpfFamily group in the DB) and a AiiDA
-    structure, return a dictionary associating each kind name with its
-    UpfData object.
+    Return a dictionary associating each element with the pk of its UpfData
+    node in a family.
+
+    The dictionary is cached for each family, and is only built again when
+    the nodes of the family change: this is checked with a single query of
+    the pks of the nodes, which does not load them.
 
     :raise MultipleObjectsError: if more than one UPF for the same element is
        found in the group.
-    :raise NotExistent: if no UPF for an element in the group is
+    :raise NotExistent: if the family does not exist.
+    """
+    from aiida.common.exceptions import MultipleObjectsError
+    from aiida.orm import Group
+    from aiida.orm.querybuilder import QueryBuilder
+
+    def get_query(project):
+        qb = QueryBuilder()
+        qb.append(Group, tag='group',
+                  filters={'name': family_name, 'type': UPFGROUP_TYPE})
+        qb.append(UpfData, member_of='group', project=project)
+        return qb
+
+    pks = frozenset(pk for [pk] in get_query(['id']).all())
+    try:
+        cached_pks, element_pks = _family_pks_cache[family_name]
+        if cached_pks == pks:
+            return element_pks
+    except KeyError:
+        pass
+
+    if not pks:
+        # Raise NotExistent if the family does not exist
+        UpfData.get_upf_group(family_name)
+
+    element_pks = {}
+    for pk, element in get_query(['id', 'attributes.element']).all():
+        if element in element_pks:
+            raise MultipleObjectsError(
+                "More than one UPF for element {} found in "
+                "family {}".format(element, family_name))
+        element_pks[element] = pk
+    # The pks of the dictionary, in case the family changed in between
+    _family_pks_cache[family_name] = (frozenset(element_pks.itervalues()),
+                                      element_pks)
+    return element_pks
+
+
+def _get_family_pseudos(family_name, elements):
+    """
+    Return a dictionary associating each of the elements with its UpfData
+    object in a family, loaded with a single query. The elements that are
+    not in the family are left out.
+
+    :raise MultipleObjectsError: if more than one UPF for the same element is
        found in the group.
+    :raise NotExistent: if the family does not exist.
     """
-    from aiida.common.exceptions import NotExistent, MultipleObjectsError
-
-    family_pseudos = {}
-    family = UpfData.get_upf_group(family_name)
-    for node in family.nodes:
-        if isinstance(node, UpfData):
-            if node.element in family_pseudos:
-                raise MultipleObjectsError(
-                    "More than one UPF for element {} found in "
-                    "family {}".format(node.element, family_name))
-            family_pseudos[node.element] = node
+    from aiida.orm.querybuilder import QueryBuilder
+
+    element_pks = dict((element, pk) for element, pk
+                       in _get_family_element_pks(family_name).iteritems()
+                       if element in elements)
+    if not element_pks:
+        return {}
+
+    qb = QueryBuilder()
+    qb.append(UpfData, filters={'id': {'in': element_pks.values()}},
+              project=['*'])
+    nodes = dict((node.pk, node) for [node] in qb.all())
+    return dict((element, nodes[pk]) for element, pk
+                in element_pks.iteritems() if pk in nodes)
+
+
+def _get_kind_pseudos(structure, family_pseudos, family_name):
+    """
+    Return a dictionary associating each kind name of a structure with its
+    UpfData object from the dictionary of the pseudos of a family.
+    """
+    from aiida.common.exceptions import NotExistent
 
     pseudo_list = {}
     for kind in structure.kinds:
@@ -79,6 +145,41 @@ def get_pseudos_from_structure(structure, family_name):
     return pseudo_list
 
 
+def get_pseudos_from_structure(structure, family_name):
+    """
+    Given a family name (a UpfFamily group in the DB) and a AiiDA
+    structure, return a dictionary associating each kind name with its
+    UpfData object.
+
+    :raise MultipleObjectsError: if more than one UPF for the same element is
+       found in the group.
+    :raise NotExistent: if no UPF for an element in the group is
+       found in the group.
+    """
+    family_pseudos = _get_family_pseudos(
+        family_name, set(kind.symbol for kind in structure.kinds))
+    return _get_kind_pseudos(structure, family_pseudos, family_name)
+
+
+def get_pseudos_for_structures(structures, family_name):
+    """
+    Given a family name (a UpfFamily group in the DB) and a list of AiiDA
+    structures, return for each structure a dictionary associating each kind
+    name with its UpfData object. The family is resolved, and its pseudos
+    loaded, once for all the structures.
+
+    :raise MultipleObjectsError: if more than one UPF for the same element is
+       found in the group.
+    :raise NotExistent: if no UPF for an element in the group is
+       found in the group.
+    """
+    family_pseudos = _get_family_pseudos(
+        family_name, set(kind.symbol for structure in structures
+                         for kind in structure.kinds))
+    return [_get_kind_pseudos(structure, family_pseudos, family_name)
+            for structure in structures]
+
+
 def get_pseudos_dict(structure, family_name):
     """
     Get a dictionary of {kind: pseudo} for all the elements within the given
@@ -134,7 +235,7 @@ def upload_upf_family(folder, group_name, group_description,
     from aiida.orm import Group
     from aiida.common.exceptions import UniquenessError, NotExistent
     from aiida.backends.utils import get_automatic_user
-    from aiida.orm.querybuilder import QueryBuilder
+
     if not os.path.isdir(folder):
         raise ValueError("folder must be a directory")
 
@@ -168,22 +269,16 @@ def upload_upf_family(folder, group_name, group_description,
 
     pseudo_and_created = []
 
-    for f in files:
-        md5sum = aiida.common.utils.md5_file(f)
-        qb = QueryBuilder()
-        qb.append(UpfData, filters={'attributes.md5':{'==':md5sum}})
-        existing_upf = qb.first()
-
-        #~ existing_upf = UpfData.query(dbattributes__key="md5",
-                                     #~ dbattributes__tval=md5sum)
+    md5sums = [aiida.common.utils.md5_file(f) for f in files]
+    # Look up the existing pseudos of all the files at once
+    existing_upfs = UpfData.from_md5_many(md5sums)
 
-        if existing_upf is None:
+    for f, md5sum in zip(files, md5sums):
+        if not existing_upfs[md5sum]:
             # return the upfdata instances, not stored
-            pseudo, created = UpfData.get_or_create(f, use_first=True,
-                                                    store_upf=False)
             # to check whether only one upf per element exists
             # NOTE: actually, created has the meaning of "to_be_created"
-            pseudo_and_created.append((pseudo, created))
+            pseudo_and_created.append((UpfData(file=f), True))
         else:
             if stop_if_existing:
                 raise ValueError(
@@ -191,8 +286,7 @@ def upload_upf_family(folder, group_name, group_description,
                         " {} cannot be added with stop_if_existing"
                         "".format(f)
                     )
-            existing_upf = existing_upf[0]
-            pseudo_and_created.append((existing_upf, False))
+            pseudo_and_created.append((existing_upfs[md5sum][0], False))
 
     # check whether pseudo are unique per element
     elements = [(i[0].element, i[0].md5sum) for i in pseudo_and_created]
@@ -412,10 +506,7 @@ class UpfData(SinglefileData):
         Note that the hash has to be stored in a _md5 attribute, otherwise
         the pseudo will not be found.
         """
-        from aiida.orm.querybuilder import QueryBuilder
-        qb = QueryBuilder()
-        qb.append(cls, filters={'attributes.md5': {'==': md5}})
-        return [_ for [_] in qb.all()]
+        return cls.from_md5_many([md5])[md5]
 
     def set_file(self, filename):
         """
@@ -76,6 +76,8 @@ class JobCalculation(AbstractJobCalculation, Calculation):
         if state != calc_states.IMPORTED:
             self._set_attr('state', state)
 
+        self._notify_state_change(state)
+
     def get_state(self, from_attribute=False):
         """
         Get the state of the calculation.
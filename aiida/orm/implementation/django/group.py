@@ -10,7 +10,8 @@
 
 import collections
 
-from aiida.orm.implementation.general.group import AbstractGroup
+from aiida.orm.implementation.general.group import (
+    AbstractGroup, GroupNodesIterator, get_node_pks, GROUP_NODES_BATCH_SIZE)
 
 from aiida.common.exceptions import (ModificationNotAllowed, UniquenessError,
                                      NotExistent)
@@ -138,56 +139,25 @@ class Group(AbstractGroup):
             raise ModificationNotAllowed("Cannot add nodes to a group before "
                                          "storing")
 
-        # First convert to a list
-        if isinstance(nodes, (Node, DbNode)):
-            nodes = [nodes]
-
-        if isinstance(nodes, basestring) or not isinstance(
-                nodes, collections.Iterable):
-            raise TypeError("Invalid type passed as the 'nodes' parameter to "
-                            "add_nodes, can only be a Node, DbNode, or a list "
-                            "of such objects, it is instead {}".format(
-                str(type(nodes))))
-
-        list_pk = []
-        for node in nodes:
-            if not isinstance(node, (Node, DbNode)):
-                raise TypeError("Invalid type of one of the elements passed "
-                                "to add_nodes, it should be either a Node or "
-                                "a DbNode, it is instead {}".format(
-                    str(type(node))))
-            if node.pk is None:
-                raise ValueError("At least one of the provided nodes is "
-                                 "unstored, stopping...")
-            list_pk.append(node.pk)
-
-        self.dbgroup.dbnodes.add(*list_pk)
+        list_pk = get_node_pks(nodes, (Node, DbNode), 'add_nodes')
 
-    @property
-    def nodes(self):
-        class iterator(object):
-            def __init__(self, dbnodes):
-                self.dbnodes = dbnodes
-                self.generator = self._genfunction()
-
-            def _genfunction(self):
-                for n in self.dbnodes:
-                    yield n.get_aiida_class()
-
-            def __iter__(self):
-                return self
+        # Django only inserts the pairs that are not in the table yet, with
+        # one SELECT and one bulk INSERT for each batch
+        with transaction.atomic():
+            for i in range(0, len(list_pk), GROUP_NODES_BATCH_SIZE):
+                self.dbgroup.dbnodes.add(
+                    *list_pk[i:i + GROUP_NODES_BATCH_SIZE])
 
-            def __len__(self):
-                return self.dbnodes.count()
+    def count(self):
+        return self.dbgroup.dbnodes.count()
 
-            # For future python-3 compatibility
-            def __next__(self):
-                return self.next()
-
-            def next(self):
-                return next(self.generator)
+    @property
+    def nodes(self):
+        def get_batch(last_pk, batch_size):
+            return list(self.dbgroup.dbnodes.filter(
+                pk__gt=last_pk).order_by('pk')[:batch_size])
 
-        return iterator(self.dbgroup.dbnodes.all())
+        return GroupNodesIterator(get_batch, self.count)
 
     def remove_nodes(self, nodes):
         from aiida.backends.djsite.db.models import DbNode
@@ -195,30 +165,12 @@ class Group(AbstractGroup):
             raise ModificationNotAllowed("Cannot remove nodes from a group "
                                          "before storing")
 
-        # First convert to a list
-        if isinstance(nodes, (Node, DbNode)):
-            nodes = [nodes]
-
-        if isinstance(nodes, basestring) or not isinstance(
-                nodes, collections.Iterable):
-            raise TypeError("Invalid type passed as the 'nodes' parameter to "
-                            "remove_nodes, can only be a Node, DbNode, or a "
-                            "list of such objects, it is instead {}".format(
-                str(type(nodes))))
-
-        list_pk = []
-        for node in nodes:
-            if not isinstance(node, (Node, DbNode)):
-                raise TypeError("Invalid type of one of the elements passed "
-                                "to add_nodes, it should be either a Node or "
-                                "a DbNode, it is instead {}".format(
-                    str(type(node))))
-            if node.pk is None:
-                raise ValueError("At least one of the provided nodes is "
-                                 "unstored, stopping...")
-            list_pk.append(node.pk)
-
-        self.dbgroup.dbnodes.remove(*list_pk)
+        list_pk = get_node_pks(nodes, (Node, DbNode), 'remove_nodes')
+
+        with transaction.atomic():
+            for i in range(0, len(list_pk), GROUP_NODES_BATCH_SIZE):
+                self.dbgroup.dbnodes.remove(
+                    *list_pk[i:i + GROUP_NODES_BATCH_SIZE])
 
     @classmethod
     def query(cls, name=None, type_string="", pk=None, uuid=None, nodes=None,
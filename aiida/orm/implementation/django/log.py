@@ -10,6 +10,9 @@
 import json
 from aiida.orm.log import Log, LogEntry
 from aiida.orm.log import OrderSpecifier, ASCENDING, DESCENDING
+from aiida.orm.log import (compress_text, compress_metadata,
+                           decompress_text, decompress_metadata,
+                           get_compress_threshold)
 from aiida.backends.djsite.db.models import DbLog
 from aiida.utils import timezone
 
@@ -38,6 +41,24 @@ class DjangoLog(Log):
 
         return entry
 
+    def create_entries(self, entries):
+        """
+        Create many log entries with a single bulk insert, skipping the ones
+        without objpk or objname
+        """
+        DbLog.objects.bulk_create([
+            DbLog(
+                time=entry['time'],
+                loggername=entry['loggername'],
+                levelname=entry['levelname'],
+                objname=entry['objname'],
+                objpk=entry['objpk'],
+                message=entry.get('message', ""),
+                metadata=json.dumps(entry.get('metadata', None))
+            ) for entry in entries
+            if entry.get('objpk', None) is not None and
+               entry.get('objname', None) is not None])
+
     def find(self, filter_by=None, order_by=None, limit=None):
         """
         Find all entries in the Log collection that confirm to the filter and
@@ -80,6 +101,60 @@ class DjangoLog(Log):
                 "Only deleting all by passing an empty filer dictionary is "
                 "currently supported")
 
+    def _fetch_all(self, sql, params):
+        from django.db import connection
+
+        cursor = connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _execute_and_commit(self, sql, params):
+        from django.db import connection, transaction
+
+        with transaction.atomic():
+            cursor = connection.cursor()
+            try:
+                cursor.execute(sql, params)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
+    def compress_entries(self, threshold=None, batch_size=1000):
+        """
+        Compress the long messages and metadata values of the existing
+        entries, in batches
+        """
+        from django.db import transaction
+
+        if threshold is None:
+            threshold = get_compress_threshold()
+        if not threshold:
+            return 0
+
+        compressed = 0
+        last_id = 0
+        while True:
+            entries = list(DbLog.objects.filter(id__gt=last_id).extra(
+                where=["(length(message) > %s OR length(metadata) > %s)"],
+                params=[threshold, threshold]).order_by('id')[:batch_size])
+            if not entries:
+                return compressed
+
+            with transaction.atomic():
+                for entry in entries:
+                    message = compress_text(entry.message, threshold)
+                    metadata = json.loads(entry.metadata)
+                    new_metadata = compress_metadata(metadata, threshold)
+                    if message != entry.message or new_metadata != metadata:
+                        DbLog.objects.filter(id=entry.id).update(
+                            message=message,
+                            metadata=json.dumps(new_metadata))
+                        compressed += 1
+            last_id = entries[-1].id
+
 
 class DjangoLogEntry(LogEntry):
     def __init__(self, model):
@@ -135,14 +210,14 @@ class DjangoLogEntry(LogEntry):
         """
         Get the message corresponding to the entry
         """
-        return self._model.message
+        return decompress_text(self._model.message)
 
     @property
     def metadata(self):
         """
         Get the metadata corresponding to the entry
         """
-        return json.loads(self._model.metadata)
+        return decompress_metadata(json.loads(self._model.metadata))
 
     def save(self):
         """
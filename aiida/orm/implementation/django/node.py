@@ -765,8 +765,12 @@ class Node(AbstractNode):
             # I assume that if a node exists in the DB, its folder is in place.
             # On the other hand, periodically the user might need to run some
             # bookkeeping utility to check for lone folders.
-            self._repository_folder.replace_with_folder(
-                self._get_temp_folder().abspath, move=True, overwrite=True)
+            # Nodes without files get no folder in the repository.
+            temp_folder = self._temp_folder
+            has_files = self._has_temp_files()
+            if has_files:
+                self._repository_folder.replace_with_folder(
+                    temp_folder.abspath, move=True, overwrite=True)
 
             # I do the transaction only during storage on DB to avoid timeout
             # problems, especially with SQLite
@@ -795,10 +799,19 @@ class Node(AbstractNode):
             except:
                 # I put back the files in the sandbox folder since the
                 # transaction did not succeed
-                self._get_temp_folder().replace_with_folder(
-                    self._repository_folder.abspath, move=True, overwrite=True)
+                self._temp_folder = temp_folder
+                if has_files:
+                    temp_folder.replace_with_folder(
+                        self._repository_folder.abspath, move=True,
+                        overwrite=True)
                 raise
 
+            if temp_folder is not None and not has_files:
+                temp_folder.erase()
+
+            # Store the hash, used to find identical nodes for caching
+            self._store_hash()
+
             # Set up autogrouping used be verdi run
             autogroup = aiida.orm.autogroup.current_autogroup
             grouptype = aiida.orm.autogroup.VERDIAUTOGROUP_TYPE
@@ -85,6 +85,13 @@ class AbstractCalculation(SealableWithUpdatableAttributes):
     # A tuple with attributes that can be updated even after
     # the call of the store() method
 
+    # Attributes that are not taken into account when computing the hash
+    _hash_ignored_attributes = (SealableWithUpdatableAttributes.SEALED_KEY,)
+
+    # The name of the extra with the UUID of the calculation whose outputs
+    # were reused, if this calculation was not run because of caching
+    _CACHED_FROM_EXTRA_KEY = '_aiida_cached_from'
+
     # Nodes that can be added as input using the use_* methods
     @classproperty
     def _use_methods(cls):
@@ -316,6 +323,37 @@ class AbstractCalculation(SealableWithUpdatableAttributes):
         return super(AbstractCalculation, self)._replace_link_from(
             src, label, link_type)
 
+    def _get_objects_to_hash(self):
+        """
+        Add the hashes of the input nodes to the objects to hash, so that two
+        calculations are identical only if their inputs are identical.
+        """
+        objects = super(AbstractCalculation, self)._get_objects_to_hash()
+        inputs = {}
+        for label, node in self.get_inputs(also_labels=True,
+                                           link_type=LinkType.INPUT):
+            hash_ = None
+            if node.is_stored:
+                hash_ = node.get_extra(node._HASH_EXTRA_KEY, None)
+            if hash_ is None:
+                hash_ = node.get_hash(ignore_errors=False)
+            inputs[label] = hash_
+        objects.append(inputs)
+        return objects
+
+    def get_cached_from(self):
+        """
+        Return the calculation whose outputs were reused for this one.
+
+        :return: the calculation, or None if this calculation was not cached
+        """
+        from aiida.orm import load_node
+
+        uuid = self.get_extra(self._CACHED_FROM_EXTRA_KEY, None)
+        if uuid is None:
+            return None
+        return load_node(uuid=uuid)
+
     def get_code(self):
         """
         Return the code for this calculation, or None if the code
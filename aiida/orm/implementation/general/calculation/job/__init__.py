@@ -30,6 +30,16 @@ from aiida.common.pluginloader import from_type_to_pluginclassname
 
 _input_subfolder = 'raw_input'
 
+# The states in which a calculation is considered to be running
+_RUNNING_STATES = (
+    calc_states.TOSUBMIT,
+    calc_states.SUBMITTING,
+    calc_states.WITHSCHEDULER,
+    calc_states.COMPUTED,
+    calc_states.RETRIEVING,
+    calc_states.PARSING,
+)
+
 
 class AbstractJobCalculation(object):
     """
@@ -197,6 +207,9 @@ class AbstractJobCalculation(object):
             _input_subfolder, create=True)
         _raw_input_folder.replace_with_folder(
             folder_path, move=False, overwrite=True)
+        # The calculation is already stored: record the new files in the
+        # object store, if it is used
+        self._repository_folder.update_manifest()
 
     @property
     def _raw_input_folder(self):
@@ -618,14 +631,20 @@ class AbstractJobCalculation(object):
 
         :return: a boolean
         """
-        return self.get_state() in [
-            calc_states.TOSUBMIT,
-            calc_states.SUBMITTING,
-            calc_states.WITHSCHEDULER,
-            calc_states.COMPUTED,
-            calc_states.RETRIEVING,
-            calc_states.PARSING
-        ]
+        return self.get_state() in _RUNNING_STATES
+
+    def _notify_state_change(self, state):
+        """
+        Notify the processes that may be waiting on this calculation, when it
+        reaches a state in which it is no longer running. This is called by
+        the backend implementations of ``_set_state``.
+
+        :param state: the state that was just set
+        """
+        from aiida.work.dependency_index import notify, NODE
+
+        if state not in _RUNNING_STATES:
+            notify(NODE, self.pk)
 
     def has_finished(self):
         """
@@ -1211,9 +1230,13 @@ class AbstractJobCalculation(object):
         """
         Puts the calculation in the TOSUBMIT status.
 
-        Actual submission is performed by the daemon.
+        Actual submission is performed by the daemon. If caching is enabled
+        for this class (see :mod:`aiida.common.caching`) and an identical
+        calculation already finished, its outputs are cloned instead and the
+        calculation is put directly in the FINISHED status.
         """
         from aiida.common.exceptions import InvalidOperation
+        from aiida.common.caching import get_use_cache
 
         current_state = self.get_state()
         if current_state != calc_states.NEW:
@@ -1221,8 +1244,40 @@ class AbstractJobCalculation(object):
                                    "state (the current state is {})"
                                    .format(calc_states.NEW, current_state))
 
+        if get_use_cache(self.__class__):
+            # The inputs may have changed since the calculation was stored
+            self._store_hash()
+            cached = self._get_same_node()
+            if cached is not None:
+                self._use_cache(cached)
+                return
+
         self._set_state(calc_states.TOSUBMIT)
 
+    def _is_valid_cache(self):
+        return self.has_finished_ok()
+
+    def _use_cache(self, cached):
+        """
+        Finish the calculation by cloning the outputs of an identical
+        calculation that already finished, instead of submitting it.
+
+        :param cached: the finished calculation, as returned by
+            :meth:`_get_same_node`
+        """
+        # Outputs can only be added while retrieving or parsing
+        self._set_state(calc_states.PARSING)
+        for label, node in cached.get_outputs(also_labels=True,
+                                              link_type=LinkType.CREATE):
+            new_node = node.copy()
+            new_node.add_link_from(self, label=label, link_type=LinkType.CREATE)
+            new_node.store()
+
+        self.set_extra(self._CACHED_FROM_EXTRA_KEY, cached.uuid)
+        self.logger.info("Reused the outputs of calculation {} instead of "
+                         "submitting".format(cached.pk))
+        self._set_state(calc_states.FINISHED)
+
     def set_parser_name(self, parser):
         """
         Set a string for the output parser
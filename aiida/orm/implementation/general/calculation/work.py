@@ -17,4 +17,22 @@ class WorkCalculation(Calculation):
     Used to represent a calculation generated by a Process from the new
     workflows system.
     """
-    pass
\ No newline at end of file
+    # The name of the attribute that is set when the process finished
+    # successfully
+    FINISHED_KEY = '_finished'
+
+    # The source file and the position of a function in it don't change what
+    # the function computes, only its name and source code do
+    _hash_ignored_attributes = Calculation._hash_ignored_attributes + (
+        FINISHED_KEY, 'source_file', 'first_line_source_code')
+
+    def has_finished_ok(self):
+        """
+        Get whether the process of the calculation finished successfully.
+
+        :return: a boolean
+        """
+        return self.get_attr(self.FINISHED_KEY, False)
+
+    def _is_valid_cache(self):
+        return self.has_finished_ok()
@@ -8,10 +8,14 @@
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
 
+import collections
 from abc import ABCMeta, abstractmethod, abstractproperty
 
 from aiida.common.exceptions import UniquenessError, NotExistent, MultipleObjectsError
 
+# Number of nodes added or removed in each statement by add_nodes and
+# remove_nodes, and loaded at a time when iterating over the nodes of a group
+GROUP_NODES_BATCH_SIZE = 10000
 
 
 def get_group_type_mapping():
@@ -33,6 +37,90 @@ def get_group_type_mapping():
             'autogroup.run': VERDIAUTOGROUP_TYPE}
 
 
+def get_node_pks(nodes, node_classes, method_name):
+    """
+    Return the sorted pks of the nodes passed to add_nodes or remove_nodes,
+    without duplicates.
+
+    :param nodes: a node, a DbNode or a pk, or an iterable of them
+    :param node_classes: the tuple of the valid node classes
+    :param method_name: the name of the method, used in the error messages
+    :raise TypeError: if an invalid object is passed
+    :raise ValueError: if one of the nodes is not stored
+    """
+    if isinstance(nodes, node_classes + (int, long)):
+        nodes = [nodes]
+
+    if isinstance(nodes, basestring) or not isinstance(
+            nodes, collections.Iterable):
+        raise TypeError("Invalid type passed as the 'nodes' parameter to "
+                        "{}, can only be a Node, DbNode, pk, or a list "
+                        "of such objects, it is instead {}".format(
+            method_name, str(type(nodes))))
+
+    pks = set()
+    for node in nodes:
+        if isinstance(node, (int, long)) and not isinstance(node, bool):
+            pks.add(node)
+            continue
+        if not isinstance(node, node_classes):
+            raise TypeError("Invalid type of one of the elements passed "
+                            "to {}, it should be either a Node, a DbNode "
+                            "or a pk, it is instead {}".format(
+                method_name, str(type(node))))
+        if node.pk is None:
+            raise ValueError("At least one of the provided nodes is "
+                             "unstored, stopping...")
+        pks.add(node.pk)
+
+    return sorted(pks)
+
+
+class GroupNodesIterator(object):
+    """
+    Iterator over the nodes of a group, in order of pk, that loads the nodes
+    from the database in batches rather than all at once. len() returns the
+    number of nodes in the group.
+    """
+
+    def __init__(self, get_batch, count, batch_size=None):
+        """
+        :param get_batch: a function that, given a pk and a batch size,
+            returns the list of the next DbNodes of the group with a larger
+            pk, ordered by pk
+        :param count: a function returning the number of nodes in the group
+        :param batch_size: the number of nodes loaded at a time, by default
+            GROUP_NODES_BATCH_SIZE
+        """
+        self._get_batch = get_batch
+        self._count = count
+        self._batch_size = batch_size or GROUP_NODES_BATCH_SIZE
+        self.generator = self._genfunction()
+
+    def _genfunction(self):
+        last_pk = -1
+        while True:
+            dbnodes = self._get_batch(last_pk, self._batch_size)
+            for dbnode in dbnodes:
+                yield dbnode.get_aiida_class()
+            if len(dbnodes) < self._batch_size:
+                return
+            last_pk = dbnodes[-1].pk
+
+    def __iter__(self):
+        return self
+
+    def __len__(self):
+        return self._count()
+
+    # For future python-3 compatibility
+    def __next__(self):
+        return self.next()
+
+    def next(self):
+        return next(self.generator)
+
+
 class AbstractGroup(object):
     """
     An AiiDA ORM implementation of group of nodes.
@@ -181,37 +269,48 @@ class AbstractGroup(object):
     @abstractmethod
     def add_nodes(self, nodes):
         """
-        Add a node or a set of nodes to the group.
+        Add a node or a set of nodes to the group. The nodes that are already
+        in the group are ignored, and the nodes are added with a few bulk
+        statements, without loading the nodes of the group.
 
         :note: The group must be already stored.
 
         :note: each of the nodes passed to add_nodes must be already stored.
 
-        :param nodes: a Node or DbNode object to add to the group, or
-          a list of Nodes or DbNodes to add.
+        :param nodes: a Node or DbNode object or a pk to add to the group, or
+          a list of Nodes, DbNodes or pks to add.
         """
         pass
 
     @abstractproperty
     def nodes(self):
         """
-        Return a generator/iterator that iterates over all nodes and returns
-        the respective AiiDA subclasses of Node, and also allows to ask for
-        the number of nodes in the group using len().
+        Return a generator/iterator that iterates over all nodes, in order of
+        pk, and returns the respective AiiDA subclasses of Node, and also
+        allows to ask for the number of nodes in the group using len().
+        The nodes are loaded from the database in batches while iterating.
+        """
+        pass
+
+    @abstractmethod
+    def count(self):
+        """
+        Return the number of nodes in the group, without loading them.
         """
         pass
 
     @abstractmethod
     def remove_nodes(self, nodes):
         """
-        Remove a node or a set of nodes to the group.
+        Remove a node or a set of nodes to the group. The nodes that are not
+        in the group are ignored.
 
         :note: The group must be already stored.
 
         :note: each of the nodes passed to add_nodes must be already stored.
 
-        :param nodes: a Node or DbNode object to add to the group, or
-          a list of Nodes or DbNodes to add.
+        :param nodes: a Node or DbNode object or a pk to remove from the
+          group, or a list of Nodes, DbNodes or pks to remove.
         """
         pass
 
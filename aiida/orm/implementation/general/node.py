@@ -9,6 +9,7 @@
 ###########################################################################
 from abc import ABCMeta, abstractmethod, abstractproperty
 
+import errno
 import os
 import logging
 import collections
@@ -96,6 +97,13 @@ class AbstractNode(object):
     # See documentation in the set() method.
     _set_incompatibilities = []
 
+    # The name of the extra in which the hash of the node is stored
+    _HASH_EXTRA_KEY = '_aiida_hash'
+
+    # A tuple with attributes that are not taken into account when computing
+    # the hash of the node
+    _hash_ignored_attributes = tuple()
+
     @staticmethod
     def get_db_columns():
         """
@@ -936,6 +944,106 @@ class AbstractNode(object):
         """
         pass
 
+    def get_hash(self, ignore_errors=True):
+        """
+        Make a hash of the node from its type, attributes, repository files
+        and computer. Two nodes with the same hash are considered identical.
+
+        :param ignore_errors: if True, return None instead of raising when
+            the node contains something that cannot be hashed
+        :return: a string with the hash, or None
+        """
+        from aiida.common.hashing import make_hash
+
+        try:
+            return make_hash(self._get_objects_to_hash())
+        except Exception:
+            if ignore_errors:
+                return None
+            raise
+
+    def _get_objects_to_hash(self):
+        """
+        Return the list of objects that are used to compute the hash of the
+        node. Subclasses can extend it, e.g. with the hashes of their inputs.
+        """
+        ignored = set(self._hash_ignored_attributes)
+        ignored.update(getattr(self, '_updatable_attributes', ()))
+        computer = self.get_computer()
+
+        # Nodes without files have no folder (see _has_folder), so an empty
+        # folder is hashed in the same way as a missing one
+        folder = self._get_folder_pathsubfolder if self._has_folder() else None
+        if folder is not None and not folder.get_content_list():
+            folder = None
+
+        return [
+            self._plugin_type_string,
+            {k: v for k, v in self.iterattrs() if k not in ignored},
+            folder,
+            computer.uuid if computer is not None else None,
+        ]
+
+    def _get_hash_to_store(self, force=False):
+        """
+        Return the hash to store in the extras of the node, or None if caching
+        is not enabled for the class of the node (see
+        :mod:`aiida.common.caching`): the stored hash is only used to find the
+        nodes to reuse, so it is not computed for every node.
+
+        :param force: return the hash even if caching is not enabled
+        """
+        from aiida.common.caching import get_use_cache
+
+        if not force and not get_use_cache(type(self)):
+            return None
+        return self.get_hash()
+
+    def _store_hash(self, force=False):
+        """
+        Store the hash of the node in its extras, so that identical nodes can
+        be found with a query on the hash.
+
+        :param force: store the hash even if caching is not enabled for the
+            class of the node
+        """
+        hash_ = self._get_hash_to_store(force=force)
+        if hash_ is not None:
+            self.set_extra(self._HASH_EXTRA_KEY, hash_)
+
+    def _get_same_node(self):
+        """
+        Find a stored node of the same class that has the same hash as this
+        one and that can be used as a cache (see :meth:`_is_valid_cache`).
+
+        :return: the oldest such node, or None if there is none
+        """
+        from aiida.orm.querybuilder import QueryBuilder
+
+        hash_ = self.get_hash()
+        if hash_ is None:
+            return None
+
+        filters = {'extras.{}'.format(self._HASH_EXTRA_KEY): hash_}
+        if self.is_stored:
+            filters['id'] = {'!==': self.pk}
+
+        qb = QueryBuilder()
+        qb.append(self.__class__, filters=filters, project='*',
+                  subclassing=False, tag='node')
+        qb.order_by({'node': ['id']})
+        for node, in qb.iterall():
+            if node._is_valid_cache():
+                return node
+        return None
+
+    def _is_valid_cache(self):
+        """
+        Return whether this node can be used as the source of a cached node.
+        Subclasses can override it, e.g. to exclude failed calculations.
+        """
+        return True
+
     @property
     @abstractmethod
     def uuid(self):
@@ -1014,8 +1122,56 @@ class AbstractNode(object):
         :param subfolder: get the list of a subfolder
         :return: a list of strings.
         """
+        if self.is_stored:
+            # Served from the manifest if the folder is in the object store
+            content_list = self._repository_folder.\
+                get_content_list_from_manifest(
+                    os.path.join(self._path_subfolder_name, subfolder))
+            if content_list is not None:
+                return content_list
+        if not self._has_folder():
+            if os.path.normpath(subfolder) == os.curdir:
+                return []
+            raise OSError(errno.ENOENT, "No such directory", subfolder)
         return self._get_folder_pathsubfolder.get_subfolder(subfolder).get_content_list()
 
+    def _has_folder(self):
+        """
+        Return whether the node has a folder for its files. The folder is only
+        created when the first file is added, and nodes that are stored
+        without files get no folder in the repository.
+        """
+        if not self.is_stored:
+            return self._temp_folder is not None
+        return self._get_folder_pathsubfolder.exists()
+
+    def _has_temp_files(self):
+        """
+        Return whether any file or directory was added to the sandbox folder
+        of the node, which is moved to the repository when storing.
+        """
+        if self._temp_folder is None:
+            return False
+        return self._temp_folder.get_content_list() != \
+            [self._path_subfolder_name] or \
+            bool(self._get_folder_pathsubfolder.get_content_list())
+
+    def _open_file(self, path):
+        """
+        Open a file of the repository of the node for reading, in binary
+        mode. If the node is stored in the object store, the file is read
+        from the store without checking out the folder of the node.
+
+        :param str path: the path of the file, relative to the 'path' section
+        :return: a file-like object
+        """
+        if self.is_stored:
+            handle = self._repository_folder.open_from_manifest(
+                os.path.join(self._path_subfolder_name, path))
+            if handle is not None:
+                return handle
+        return open(self.get_abs_path(path), 'rb')
+
     def _get_temp_folder(self):
         """
         Get the folder of the Node in the temporary repository.
@@ -1086,6 +1242,10 @@ class AbstractNode(object):
             return self.folder.abspath
         if section is None:
             section = self._path_subfolder_name
+            if not self.is_stored and self._temp_folder is None:
+                # Don't create a sandbox folder just to find that it's empty
+                raise OSError("{} does not exist, no file was added to the "
+                              "node".format(path))
         # TODO: For the moment works only for one kind of files,
         #      'path' (internal files)
         if os.path.isabs(path):
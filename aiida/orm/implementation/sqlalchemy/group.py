@@ -12,6 +12,7 @@ import collections
 
 from copy import copy
 
+from sqlalchemy import and_, func, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm.session import make_transient
 
@@ -23,7 +24,8 @@ from aiida.backends.utils import get_automatic_user
 from aiida.common.exceptions import (ModificationNotAllowed, UniquenessError,
                                      NotExistent)
 
-from aiida.orm.implementation.general.group import AbstractGroup
+from aiida.orm.implementation.general.group import (
+    AbstractGroup, GroupNodesIterator, get_node_pks, GROUP_NODES_BATCH_SIZE)
 
 from aiida.orm.implementation.sqlalchemy.utils import get_db_columns
 
@@ -138,67 +140,40 @@ class Group(AbstractGroup):
             raise ModificationNotAllowed("Cannot add nodes to a group before "
                                          "storing")
         from aiida.orm.implementation.sqlalchemy.node import Node
-        from aiida.backends.sqlalchemy import get_scoped_session
-        session = get_scoped_session()
-
-        # First convert to a list
-        if isinstance(nodes, (Node, DbNode)):
-            nodes = [nodes]
-
-        if isinstance(nodes, basestring) or not isinstance(
-                nodes, collections.Iterable):
-            raise TypeError("Invalid type passed as the 'nodes' parameter to "
-                            "add_nodes, can only be a Node, DbNode, or a list "
-                            "of such objects, it is instead {}".format(
-                str(type(nodes))))
-
-        list_nodes = []
-        for node in nodes:
-            if not isinstance(node, (Node, DbNode)):
-                raise TypeError("Invalid type of one of the elements passed "
-                                "to add_nodes, it should be either a Node or "
-                                "a DbNode, it is instead {}".format(
-                    str(type(node))))
-
-            if node.id is None:
-                raise ValueError("At least one of the provided nodes is "
-                                 "unstored, stopping...")
-            if isinstance(node, Node):
-                to_add = node.dbnode
-            else:
-                to_add = node
+        session = sa.get_scoped_session()
 
-            if to_add not in self._dbgroup.dbnodes:
-                # ~ list_nodes.append(to_add)
-                self._dbgroup.dbnodes.append(to_add)
+        pks = get_node_pks(nodes, (Node, DbNode), 'add_nodes')
+
+        # A single statement per batch, that skips the nodes already in the
+        # group. The table has no unique constraint in the databases created
+        # before it was added to the model, so ON CONFLICT cannot be used.
+        for i in range(0, len(pks), GROUP_NODES_BATCH_SIZE):
+            session.execute(text(
+                "INSERT INTO db_dbgroup_dbnodes (dbgroup_id, dbnode_id) "
+                "SELECT :group_id, pk "
+                "FROM unnest(CAST(:pks AS integer[])) AS pk "
+                "WHERE NOT EXISTS (SELECT 1 FROM db_dbgroup_dbnodes "
+                "WHERE dbgroup_id = :group_id AND dbnode_id = pk)"),
+                {'group_id': self.pk,
+                 'pks': pks[i:i + GROUP_NODES_BATCH_SIZE]})
         session.commit()
-        # ~ self._dbgroup.dbnodes.extend(list_nodes)
+
+    def count(self):
+        session = sa.get_scoped_session()
+        return session.query(func.count(table_groups_nodes.c.dbnode_id)).filter(
+            table_groups_nodes.c.dbgroup_id == self.pk).scalar()
 
     @property
     def nodes(self):
-        class iterator(object):
-            def __init__(self, dbnodes):
-                self.dbnodes = dbnodes
-                self.generator = self._genfunction()
-
-            def _genfunction(self):
-                for n in self.dbnodes:
-                    yield n.get_aiida_class()
-
-            def __iter__(self):
-                return self
-
-            def __len__(self):
-                return len(self.dbnodes)
+        def get_batch(last_pk, batch_size):
+            return DbNode.query.join(
+                table_groups_nodes,
+                table_groups_nodes.c.dbnode_id == DbNode.id).filter(
+                table_groups_nodes.c.dbgroup_id == self.pk,
+                DbNode.id > last_pk).order_by(DbNode.id).limit(
+                batch_size).all()
 
-            # For future python-3 compatibility
-            def __next__(self):
-                return self.next()
-
-            def next(self):
-                return next(self.generator)
-
-        return iterator(self._dbgroup.dbnodes.all())
+        return GroupNodesIterator(get_batch, self.count)
 
     def remove_nodes(self, nodes):
         if not self.is_stored:
@@ -206,38 +181,16 @@ class Group(AbstractGroup):
                                          "before storing")
 
         from aiida.orm.implementation.sqlalchemy.node import Node
-        # First convert to a list
-        if isinstance(nodes, (Node, DbNode)):
-            nodes = [nodes]
-
-        if isinstance(nodes, basestring) or not isinstance(
-                nodes, collections.Iterable):
-            raise TypeError("Invalid type passed as the 'nodes' parameter to "
-                            "remove_nodes, can only be a Node, DbNode, or a "
-                            "list of such objects, it is instead {}".format(
-                str(type(nodes))))
-
-        list_nodes = []
-        for node in nodes:
-            if not isinstance(node, (Node, DbNode)):
-                raise TypeError("Invalid type of one of the elements passed "
-                                "to add_nodes, it should be either a Node or "
-                                "a DbNode, it is instead {}".format(
-                    str(type(node))))
-            if node.id is None:
-                raise ValueError("At least one of the provided nodes is "
-                                 "unstored, stopping...")
-            if isinstance(node, Node):
-                node = node.dbnode
-            # If we don't check first, SqlA might issue a DELETE statement for
-            # an unexisting key, resulting in an error
-            if node in self._dbgroup.dbnodes:
-                list_nodes.append(node)
-
-        for node in list_nodes:
-            self._dbgroup.dbnodes.remove(node)
-
-        sa.get_scoped_session().commit()
+        session = sa.get_scoped_session()
+
+        pks = get_node_pks(nodes, (Node, DbNode), 'remove_nodes')
+
+        for i in range(0, len(pks), GROUP_NODES_BATCH_SIZE):
+            session.execute(table_groups_nodes.delete().where(and_(
+                table_groups_nodes.c.dbgroup_id == self.pk,
+                table_groups_nodes.c.dbnode_id.in_(
+                    pks[i:i + GROUP_NODES_BATCH_SIZE]))))
+        session.commit()
 
     @classmethod
     def query(cls, name=None, type_string="", pk=None, uuid=None, nodes=None,
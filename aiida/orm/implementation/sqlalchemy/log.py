@@ -9,6 +9,9 @@
 ###########################################################################
 from aiida.orm.log import Log, LogEntry
 from aiida.orm.log import OrderSpecifier, ASCENDING, DESCENDING
+from aiida.orm.log import (compress_text, compress_metadata,
+                           decompress_text, decompress_metadata,
+                           get_compress_threshold)
 from aiida.backends.sqlalchemy import get_scoped_session
 session = get_scoped_session()
 from aiida.backends.sqlalchemy.models.log import DbLog
@@ -39,6 +42,35 @@ class SqlaLog(Log):
 
         return entry
 
+    def create_entries(self, entries):
+        """
+        Create many log entries with a single bulk insert and commit,
+        skipping the ones without objpk or objname
+        """
+        rows = [{
+            'time': entry['time'],
+            'loggername': entry['loggername'],
+            'levelname': entry['levelname'],
+            'objname': entry['objname'],
+            'objpk': entry['objpk'],
+            'message': entry.get('message', ""),
+            'metadata': entry.get('metadata', None) or {}
+        } for entry in entries
+            if entry.get('objpk', None) is not None and
+               entry.get('objname', None) is not None]
+        if not rows:
+            return
+
+        # The session of the current thread: the entries can be created from
+        # the thread of a buffered log handler
+        thread_session = get_scoped_session()
+        try:
+            thread_session.execute(DbLog.__table__.insert(), rows)
+            thread_session.commit()
+        except:
+            thread_session.rollback()
+            raise
+
     def find(self, filter_by=None, order_by=None, limit=None):
         """
         Find all entries in the Log collection that confirm to the filter and
@@ -88,6 +120,57 @@ class SqlaLog(Log):
                 "Only deleting all by passing an empty filer dictionary is "
                 "currently supported")
 
+    def _fetch_all(self, sql, params):
+        # The connection takes the parameters of plain strings in the
+        # pyformat style of psycopg2
+        return get_scoped_session().connection().execute(
+            sql, params).fetchall()
+
+    def _execute_and_commit(self, sql, params):
+        thread_session = get_scoped_session()
+        try:
+            result = thread_session.connection().execute(sql, params)
+            thread_session.commit()
+        except:
+            thread_session.rollback()
+            raise
+        return result.rowcount
+
+    def compress_entries(self, threshold=None, batch_size=1000):
+        """
+        Compress the long messages and metadata values of the existing
+        entries, in batches
+        """
+        from sqlalchemy import cast, func, or_
+        from sqlalchemy.types import Text
+
+        if threshold is None:
+            threshold = get_compress_threshold()
+        if not threshold:
+            return 0
+
+        thread_session = get_scoped_session()
+        compressed = 0
+        last_id = 0
+        while True:
+            entries = thread_session.query(DbLog).filter(
+                DbLog.id > last_id,
+                or_(func.length(DbLog.message) > threshold,
+                    func.length(cast(DbLog._metadata, Text)) > threshold)
+            ).order_by(DbLog.id).limit(batch_size).all()
+            if not entries:
+                return compressed
+
+            for entry in entries:
+                message = compress_text(entry.message, threshold)
+                metadata = compress_metadata(entry._metadata, threshold)
+                if message != entry.message or metadata != entry._metadata:
+                    entry.message = message
+                    entry._metadata = metadata
+                    compressed += 1
+            last_id = entries[-1].id
+            thread_session.commit()
+
 
 class SqlaLogEntry(LogEntry):
     def __init__(self, model):
@@ -143,14 +226,14 @@ class SqlaLogEntry(LogEntry):
         """
         Get the message corresponding to the entry
         """
-        return self._model.message
+        return decompress_text(self._model.message)
 
     @property
     def metadata(self):
         """
         Get the metadata corresponding to the entry
         """
-        return self._model._metadata
+        return decompress_metadata(self._model._metadata)
 
     def save(self):
         """
@@ -11,7 +11,7 @@ from __future__ import absolute_import
 
 import copy
 
-from sqlalchemy import literal
+from sqlalchemy import literal, inspect, func
 from sqlalchemy.exc import SQLAlchemyError, ProgrammingError
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.orm.attributes import flag_modified
@@ -51,6 +51,9 @@ class Node(AbstractNode):
 
         dbnode = kwargs.pop('dbnode', None)
 
+        self._attrs_deferred = False
+        self._deferred_attrs_cache = {}
+
         # Set the internal parameters
         # Can be redefined in the subclasses
         self._init_internal_params()
@@ -70,6 +73,11 @@ class Node(AbstractNode):
 
             self._dbnode = dbnode
 
+            # The attributes are not loaded if the query that loaded the
+            # node deferred them (see QueryBuilder.set_defer_attributes):
+            # in this case, get_attr only fetches the requested keys
+            self._attrs_deferred = 'attributes' in inspect(dbnode).unloaded
+
             # If this is changed, fix also the importer
             self._repo_folder = RepositoryFolder(section=self._section_name,
                                                  uuid=self._dbnode.uuid)
@@ -339,6 +347,7 @@ class Node(AbstractNode):
             self._attrs_cache[key] = copy.deepcopy(value)
         else:
             self.dbnode.set_attr(key, value)
+            self._deferred_attrs_cache.clear()
             self._increment_version_number_db()
 
     def _del_attr(self, key):
@@ -350,8 +359,33 @@ class Node(AbstractNode):
                     "Attribute {} does not exist".format(key))
         else:
             self.dbnode.del_attr(key)
+            self._deferred_attrs_cache.clear()
             self._increment_version_number_db()
 
+    def _get_deferred_attr(self, key):
+        """
+        Return an attribute of a node whose attributes were not loaded,
+        fetching from the database only the value at the path given by the
+        key, and caching it.
+
+        :raise KeyError: if the attribute does not exist
+        """
+        from aiida.backends.sqlalchemy import get_scoped_session
+
+        if key not in self._deferred_attrs_cache:
+            path_in_json = DbNode.attributes[tuple(key.split('.'))]
+            # The JSON type of the value is NULL only if the path does not
+            # exist, while the value is also None for JSON null values
+            value, json_type = get_scoped_session().query(
+                path_in_json, func.jsonb_typeof(path_in_json)).filter(
+                DbNode.id == self._dbnode.id).one()
+            self._deferred_attrs_cache[key] = (json_type is not None, value)
+
+        exists, value = self._deferred_attrs_cache[key]
+        if not exists:
+            raise KeyError(key)
+        return value
+
     def get_attr(self, key, default=_NO_DEFAULT):
         exception = AttributeError("Attribute '{}' does not exist".format(key))
 
@@ -365,6 +399,9 @@ class Node(AbstractNode):
                 raise exception
         else:
             try:
+                if (self._attrs_deferred and
+                        'attributes' in inspect(self._dbnode).unloaded):
+                    return self._get_deferred_attr(key)
                 return get_attr(self.dbnode.attributes, key)
             except (KeyError, IndexError):
                 if has_default:
@@ -718,8 +755,12 @@ class Node(AbstractNode):
             # I assume that if a node exists in the DB, its folder is in place.
             # On the other hand, periodically the user might need to run some
             # bookkeeping utility to check for lone folders.
-            self._repository_folder.replace_with_folder(
-                self._get_temp_folder().abspath, move=True, overwrite=True)
+            # Nodes without files get no folder in the repository.
+            temp_folder = self._temp_folder
+            has_files = self._has_temp_files()
+            if has_files:
+                self._repository_folder.replace_with_folder(
+                    temp_folder.abspath, move=True, overwrite=True)
 
         #    import aiida.backends.sqlalchemy
             try:
@@ -740,6 +781,12 @@ class Node(AbstractNode):
                 # that are between stored nodes.
                 self._store_cached_input_links(with_transaction=False)
 
+                # Store the hash, used to find identical nodes for caching,
+                # within the same transaction as the node
+                hash_ = self._get_hash_to_store()
+                if hash_ is not None:
+                    self.dbnode.set_extra(self._HASH_EXTRA_KEY, hash_)
+
                 if with_transaction:
                     try:
                         # aiida.backends.sqlalchemy.get_scoped_session().commit()
@@ -755,10 +802,16 @@ class Node(AbstractNode):
             except:
                 # I put back the files in the sandbox folder since the
                 # transaction did not succeed
-                self._get_temp_folder().replace_with_folder(
-                    self._repository_folder.abspath, move=True, overwrite=True)
+                self._temp_folder = temp_folder
+                if has_files:
+                    temp_folder.replace_with_folder(
+                        self._repository_folder.abspath, move=True,
+                        overwrite=True)
                 raise
 
+            if temp_folder is not None and not has_files:
+                temp_folder.erase()
+
             # Set up autogrouping used be verdi run
             autogroup = aiida.orm.autogroup.current_autogroup
             grouptype = aiida.orm.autogroup.VERDIAUTOGROUP_TYPE
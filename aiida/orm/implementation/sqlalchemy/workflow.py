@@ -409,7 +409,11 @@ class Workflow(AbstractWorkflow):
         Set the Workflow's state
         :param name: a state from wf_states in aiida.common.datastructures
         """
+        from aiida.work.dependency_index import notify, WORKFLOW
+
         self.dbworkflowinstance.set_state(state)
+        if state in (wf_states.FINISHED, wf_states.ERROR):
+            notify(WORKFLOW, self.pk)
 
     def is_new(self):
         """
@@ -2320,9 +2320,13 @@ def export_tree_sqla(what, folder, also_parents = True, also_calc_outputs=True,
             reset_limit=True)
         # In this way, I copy the content of the folder, and not the folder
         # itself
-        thisnodefolder.insert_path(src=RepositoryFolder(
-            section=Node._section_name, uuid=uuid).abspath,
-                                   dest_name='.')
+        src = RepositoryFolder(section=Node._section_name, uuid=uuid)
+        if src.exists():
+            thisnodefolder.insert_path(src=src.abspath, dest_name='.')
+        else:
+            # Nodes without files have no folder in the repository, but the
+            # import expects one for every node
+            thisnodefolder.get_subfolder(Node._path_subfolder_name).create()
 
 
 def check_licences(node_licenses, allowed_licenses, forbidden_licenses):
@@ -2694,9 +2698,13 @@ def export_tree_dj(what, folder, also_parents = True, also_calc_outputs=True,
             reset_limit=True)
         # In this way, I copy the content of the folder, and not the folder
         # itself
-        thisnodefolder.insert_path(src=RepositoryFolder(
-            section=Node._section_name, uuid=uuid).abspath,
-                                   dest_name='.')
+        src = RepositoryFolder(section=Node._section_name, uuid=uuid)
+        if src.exists():
+            thisnodefolder.insert_path(src=src.abspath, dest_name='.')
+        else:
+            # Nodes without files have no folder in the repository, but the
+            # import expects one for every node
+            thisnodefolder.get_subfolder(Node._path_subfolder_name).create()
 
 
 class MyWritingZipFile(object):
@@ -2800,6 +2808,11 @@ class ZipFolder(object):
         subfolder = ZipFolder(self, subfolder=subfolder)
         return subfolder
 
+    def create(self):
+        # Add an entry for the directory, so that it is extracted even if it
+        # stays empty
+        self._zipfile.writestr(self._get_internal_path('.') + '/', '')
+
     def insert_path(self, src, dest_name=None, overwrite=True):
         import os
 
@@ -7,6 +7,8 @@
 # For further information on the license, see the LICENSE.txt file        #
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
+import base64
+import zlib
 from abc import abstractmethod, abstractproperty, ABCMeta
 from collections import namedtuple
 from aiida.utils import timezone
@@ -16,6 +18,81 @@ DESCENDING = -1
 
 OrderSpecifier = namedtuple("OrderSpecifier", ['field', 'direction'])
 
+# Prefix of the messages and metadata values stored compressed
+COMPRESSED_PREFIX = 'zlib+base64:'
+
+# Cached value of the logging.db_compress_threshold property, read once
+# rather than for every log message
+_compress_threshold = None
+
+
+def get_compress_threshold():
+    """
+    Return the length above which messages and metadata values of new log
+    entries are compressed, or 0 if they are never compressed.
+    """
+    global _compress_threshold
+    if _compress_threshold is None:
+        from aiida.common.setup import get_property
+        _compress_threshold = get_property('logging.db_compress_threshold')
+    return _compress_threshold
+
+
+def compress_text(text, threshold=None):
+    """
+    Return the text compressed with zlib and encoded in base64 with the
+    COMPRESSED_PREFIX, if it is longer than the threshold and compressing it
+    saves space, or the text itself otherwise.
+
+    :param threshold: the minimum length of the compressed texts, by
+        default the logging.db_compress_threshold property
+    """
+    if threshold is None:
+        threshold = get_compress_threshold()
+    if (not threshold or not isinstance(text, basestring) or
+            len(text) <= threshold or text.startswith(COMPRESSED_PREFIX)):
+        return text
+
+    if isinstance(text, unicode):
+        text = text.encode('utf-8')
+    compressed = COMPRESSED_PREFIX + base64.b64encode(zlib.compress(text, 9))
+    if len(compressed) >= len(text):
+        return text
+    return compressed
+
+
+def decompress_text(text):
+    """
+    Return the original text of a text returned by compress_text.
+    """
+    if not isinstance(text, basestring) or \
+            not text.startswith(COMPRESSED_PREFIX):
+        return text
+    return zlib.decompress(base64.b64decode(
+        text[len(COMPRESSED_PREFIX):])).decode('utf-8')
+
+
+def compress_metadata(metadata, threshold=None):
+    """
+    Return a copy of the metadata of a log entry where the long strings
+    (e.g. the tracebacks) are compressed with compress_text.
+    """
+    if not isinstance(metadata, dict):
+        return metadata
+    return {key: compress_text(value, threshold)
+            for key, value in metadata.iteritems()}
+
+
+def decompress_metadata(metadata):
+    """
+    Return a copy of the metadata returned by compress_metadata with the
+    original strings.
+    """
+    if not isinstance(metadata, dict):
+        return metadata
+    return {key: decompress_text(value)
+            for key, value in metadata.iteritems()}
+
 
 class Log(object):
     __metaclass__ = ABCMeta
@@ -45,15 +122,27 @@ class Log(object):
         """
         pass
 
-    def create_entry_from_record(self, record):
+    def create_entries(self, entries):
         """
-        Helper function to create a log entry from a record created as by the
-        python logging lobrary
+        Create many log entries at once. The backends can override this to
+        store them with a single bulk insert and commit.
+
+        :param entries: A list of dictionaries with the parameters of
+            :py:meth:`create_entry`
+        """
+        for entry in entries:
+            self.create_entry(**entry)
+
+    @staticmethod
+    def get_entry_from_record(record):
+        """
+        Get the parameters of :py:meth:`create_entry` for a record created by
+        the python logging library
 
         :param record: The record created by the logging module
         :type record: :class:`logging.record`
-        :return: An object implementing the log entry interface
-        :rtype: :class:`aiida.orm.log.LogEntry`
+        :return: A dictionary with the parameters, or None if the record is
+            not attached to an object and should not be stored
         """
         from datetime import datetime
 
@@ -64,15 +153,31 @@ class Log(object):
         if objpk is None or objname is None:
             return None
 
-        return self.create_entry(
-            time=timezone.make_aware(datetime.fromtimestamp(record.created)),
-            loggername=record.name,
-            levelname=record.levelname,
-            objname=objname,
-            objpk=objpk,
-            message=record.getMessage(),
-            metadata=record.__dict__
-        )
+        return {
+            'time': timezone.make_aware(datetime.fromtimestamp(record.created)),
+            'loggername': record.name,
+            'levelname': record.levelname,
+            'objname': objname,
+            'objpk': objpk,
+            'message': compress_text(record.getMessage()),
+            'metadata': compress_metadata(record.__dict__)
+        }
+
+    def create_entry_from_record(self, record):
+        """
+        Helper function to create a log entry from a record created as by the
+        python logging lobrary
+
+        :param record: The record created by the logging module
+        :type record: :class:`logging.record`
+        :return: An object implementing the log entry interface
+        :rtype: :class:`aiida.orm.log.LogEntry`
+        """
+        entry = self.get_entry_from_record(record)
+        if entry is None:
+            return None
+
+        return self.create_entry(**entry)
 
     @abstractmethod
     def find(self, filter_by=None, order_by=None, limit=None):
@@ -97,6 +202,131 @@ class Log(object):
         """
         pass
 
+    @abstractmethod
+    def _fetch_all(self, sql, params):
+        """
+        Execute a query and return all the rows
+
+        :param sql: The query, with parameters in the pyformat style
+        :param params: A dictionary with the parameters
+        """
+        pass
+
+    @abstractmethod
+    def _execute_and_commit(self, sql, params):
+        """
+        Execute a statement in its own transaction
+
+        :param sql: The statement, with parameters in the pyformat style
+        :param params: A dictionary with the parameters
+        :return: The number of affected rows
+        """
+        pass
+
+    def _delete_batches(self, select_sql, params, batch_size):
+        """
+        Delete the entries whose id is returned by a query, in batches of
+        batch_size entries. Each batch is deleted in a short transaction that
+        only locks its rows, so the daemon can keep logging meanwhile.
+
+        :param select_sql: A query returning the ids of at most
+            %(batch_size)s entries to delete, and no entry when there is
+            nothing left to delete
+        :return: The number of deleted entries
+        """
+        params = dict(params, batch_size=batch_size)
+        deleted = 0
+        while True:
+            ids = tuple(row[0] for row in self._fetch_all(select_sql, params))
+            if not ids:
+                return deleted
+            deleted += self._execute_and_commit(
+                "DELETE FROM db_dblog WHERE id IN %(ids)s", {'ids': ids})
+
+    def prune(self, older_than=None, below_level=None, max_per_object=None,
+              batch_size=1000):
+        """
+        Delete log entries according to a retention policy, in batches.
+
+        The entries older than older_than days and with a level lower than
+        below_level are deleted (if only one of them is given, only that
+        condition is used); then, only the newest max_per_object entries of
+        each object are kept.
+
+        :param older_than: The age in days of the entries to delete
+        :param below_level: The name of a log level, e.g. 'WARNING'
+        :param max_per_object: The number of entries to keep for each object
+        :param batch_size: The number of entries deleted in each transaction
+        :return: The number of deleted entries
+        """
+        import datetime
+        from aiida.utils.logger import LOG_LEVELS
+
+        if older_than is None and below_level is None and \
+                max_per_object is None:
+            raise ValueError("Specify at least one retention policy")
+
+        deleted = 0
+        conditions = []
+        params = {}
+        if older_than is not None:
+            conditions.append("time < %(time)s")
+            params['time'] = timezone.now() - datetime.timedelta(
+                days=older_than)
+        if below_level is not None:
+            try:
+                level = LOG_LEVELS[below_level]
+            except KeyError:
+                raise ValueError("Unknown log level '{}', valid levels are: "
+                                 "{}".format(below_level,
+                                             ", ".join(LOG_LEVELS)))
+            params['levels'] = tuple(name for name, value
+                                     in LOG_LEVELS.iteritems()
+                                     if value < level)
+            if params['levels']:
+                conditions.append("levelname IN %(levels)s")
+            else:
+                # Nothing is below the lowest level
+                conditions.append("FALSE")
+
+        if conditions:
+            # The entries are selected in order of id, so that each batch
+            # starts from the beginning of the table
+            deleted += self._delete_batches(
+                "SELECT id FROM db_dblog WHERE {} "
+                "ORDER BY id LIMIT %(batch_size)s".format(
+                    " AND ".join(conditions)), params, batch_size)
+
+        if max_per_object is not None:
+            objects = self._fetch_all(
+                "SELECT objname, objpk FROM db_dblog "
+                "WHERE objpk IS NOT NULL GROUP BY objname, objpk "
+                "HAVING count(*) > %(max_per_object)s",
+                {'max_per_object': max_per_object})
+            for objname, objpk in objects:
+                deleted += self._delete_batches(
+                    "SELECT id FROM db_dblog "
+                    "WHERE objname = %(objname)s AND objpk = %(objpk)s "
+                    "ORDER BY time DESC, id DESC "
+                    "OFFSET %(max_per_object)s LIMIT %(batch_size)s",
+                    {'objname': objname, 'objpk': objpk,
+                     'max_per_object': max_per_object}, batch_size)
+
+        return deleted
+
+    @abstractmethod
+    def compress_entries(self, threshold=None, batch_size=1000):
+        """
+        Compress the long messages and metadata values of the existing
+        entries, as is done for the new entries (see compress_text).
+
+        :param threshold: The minimum length of the compressed texts, by
+            default the logging.db_compress_threshold property
+        :param batch_size: The number of entries updated in each transaction
+        :return: The number of compressed entries
+        """
+        pass
+
 
 class LogEntry(object):
     __metaclass__ = ABCMeta
@@ -39,6 +39,37 @@ from aiida.common.exceptions import InputValidationError, ConfigurationError
 from aiida.backends.utils import _get_column
 
 
+# Cached value of the querybuilder.log_filters property, read once rather
+# than for every filter
+_log_filters = None
+
+
+def get_log_filters():
+    """
+    Return whether the filters on the attributes and extras of the nodes are
+    logged (the querybuilder.log_filters property).
+    """
+    global _log_filters
+    if _log_filters is None:
+        from aiida.common.setup import get_property
+        _log_filters = get_property('querybuilder.log_filters')
+    return _log_filters
+
+
+def get_filter_log_path():
+    """
+    Return the path of the file where the filters on the attributes and
+    extras of the nodes are logged for the current profile, if the
+    querybuilder.log_filters property is set.
+    """
+    import os
+    from aiida.backends import settings
+    from aiida.common.setup import AIIDA_CONFIG_FOLDER, LOG_SUBDIR
+
+    return os.path.join(os.path.expanduser(AIIDA_CONFIG_FOLDER), LOG_SUBDIR,
+                        'querybuilder_filters_{}.log'.format(
+                            settings.AIIDADB_PROFILE))
+
 
 class QueryBuilder(object):
     """
@@ -78,6 +109,10 @@ class QueryBuilder(object):
             ancestor-descendant relationships. This can cause the query to be much slower,
             which is why it's optional.
             Check :func:`QueryBuilder.set_expand_path` for details
+        :param bool defer_attributes:
+            If set to True (default is False) the attributes of the nodes are loaded only
+            when needed, and then only the requested keys.
+            Check :func:`QueryBuilder.set_defer_attributes` for details
         :param bool debug:
             Turn on debug mode. This feature prints information on the screen about the stages
             of the QueryBuilder. Does not affect results.
@@ -185,6 +220,8 @@ class QueryBuilder(object):
         self.set_with_dbpath(kwargs.pop('with_dbpath', True))
         # Whether expanding the path when using recursive functionality
         self.set_expand_path(kwargs.pop('expand_path',False))
+        # Whether loading the attributes of the projected nodes is deferred
+        self.set_defer_attributes(kwargs.pop('defer_attributes', False))
 
 
         # One can apply the path as a keyword. Allows for jsons to be given to the QueryBuilder.
@@ -970,6 +1007,8 @@ class QueryBuilder(object):
                         "I suggest you apply functions on a column, e.g. ('id')\n"
                     )
             self._query = self._query.add_entity(alias)
+            if self._defer_attributes:
+                self._query = self._impl.defer_attributes(self._query, alias)
         else:
             entity_to_project = self._get_projectable_entity(
                     alias, column_name, attr_key,
@@ -1131,6 +1170,35 @@ class QueryBuilder(object):
                 "Set with_dbpath to False to use that functionality")
         return self
 
+    def set_defer_attributes(self, l_defer_attributes):
+        """
+        Turn this feature on to defer loading the attributes of the nodes that
+        are projected as a whole, e.g. when listing many nodes with large
+        attributes (bands, kpoints, trajectories, ...). The attributes are
+        then loaded when first needed, and
+        :func:`~aiida.orm.implementation.general.node.AbstractNode.get_attr`
+        fetches only the requested key until then::
+
+            qb = QueryBuilder(defer_attributes=True)
+            qb.append(BandsData)
+            for bands, in qb.iterall():
+                # Only the units are read from the database
+                print bands.get_attr('units', None)
+
+        ..note:
+            The attributes are always loaded when needed with the Django
+            backend, that stores them in a separate table.
+
+        :param bool l_defer_attributes: True to defer loading the attributes
+        """
+        if not isinstance(l_defer_attributes, bool):
+            raise InputValidationError("I expect a boolean")
+
+        self._defer_attributes = l_defer_attributes
+        # The query has to be built again
+        self._hash = None
+        return self
+
     def limit(self, limit):
         """
         Set the limit (nr of rows to return)
@@ -1213,8 +1281,56 @@ class QueryBuilder(object):
                     for operator, value
                     in filter_operation_dict.items()
                 ]
+                if attr_key:
+                    self._log_attribute_filters(
+                        alias, column_name, attr_key, filter_operation_dict,
+                        filter_spec.get('type', None))
         return and_(*expressions)
 
+    @staticmethod
+    def _log_attribute_filters(alias, column_name, attr_key,
+                               filter_operation_dict, type_spec):
+        """
+        Append the filters on an attribute or extra of the nodes to the filter
+        log, if enabled with the querybuilder.log_filters property. The log is
+        used by 'verdi database index' to suggest the indexes to create.
+
+        :param type_spec: the filter on the type of the nodes, if any
+        """
+        import json
+        from sqlalchemy import inspect
+
+        if not get_log_filters():
+            return
+        if inspect(alias).mapper.local_table.name != 'db_dbnode':
+            return
+
+        if isinstance(type_spec, dict):
+            node_type = type_spec.get('like', type_spec.get('==', None))
+        else:
+            node_type = type_spec
+        if node_type == '%':
+            node_type = None
+
+        def get_entries(operation_dict):
+            for operator, value in operation_dict.items():
+                operator = operator.lstrip('~!')
+                if operator in ('and', 'or'):
+                    for sub_operation_dict in value:
+                        for entry in get_entries(sub_operation_dict):
+                            yield entry
+                    continue
+                if operator == 'in' and value:
+                    value = value[0]
+                yield json.dumps({
+                    'column': column_name, 'path': attr_key,
+                    'operator': operator, 'value_type': type(value).__name__,
+                    'node_type': node_type})
+
+        with open(get_filter_log_path(), 'a') as f:
+            f.write(''.join(
+                '{}\n'.format(_) for _ in get_entries(filter_operation_dict)))
+
 
 
     @staticmethod
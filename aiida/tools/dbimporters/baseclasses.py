@@ -134,6 +134,47 @@ class DbSearchResults(object):
             results.append(entry)
         return results
 
+    def iter_cif_nodes(self, store=False, processes=None, batch_size=1000):
+        """
+        Creates the CIF nodes of all the results with the get_cif_node
+        method of each entry, parsing the CIF files of each batch of results
+        in parallel in several processes beforehand (see
+        :py:func:`aiida.orm.data.cif.cache_cif_files`).
+
+        :param store: if True, the nodes are stored
+        :param processes: the number of processes, by default the number of
+            CPUs
+        :param batch_size: the number of CIF files downloaded and parsed
+            together
+        :return: an iterator over the :py:class:`aiida.orm.data.cif.CifData`
+            objects, in the order of the results
+        """
+        import os
+        import shutil
+        import tempfile
+        from aiida.orm.data.cif import cache_cif_files
+
+        for start in range(0, len(self), batch_size):
+            entries = [self.at(position) for position in
+                       range(start, min(start + batch_size, len(self)))]
+            folder = tempfile.mkdtemp()
+            try:
+                filenames = []
+                for entry in entries:
+                    handle, filename = tempfile.mkstemp(dir=folder)
+                    with os.fdopen(handle, 'w') as f:
+                        f.write(entry.cif)
+                    filenames.append(filename)
+                cache_cif_files(filenames, processes=processes)
+            finally:
+                shutil.rmtree(folder)
+            for entry in entries:
+                # The metadata of the node are read from the parse cache
+                cifnode = entry.get_cif_node()
+                if store:
+                    cifnode.store()
+                yield cifnode
+
     def next(self):
         """
         Returns the next result of the query (instance of
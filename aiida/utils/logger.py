@@ -9,6 +9,12 @@
 ###########################################################################
 
 import logging
+import os
+import threading
+import time
+from collections import Counter
+from multiprocessing.util import Finalize
+
 from aiida import LOG_LEVEL_REPORT
 from aiida.backends.utils import is_dbenv_loaded
 
@@ -64,4 +70,193 @@ class DBLogHandler(logging.Handler):
             # Hopefully, though, this should not happen!
             import traceback
 
-            traceback.print_exc()
\ No newline at end of file
+            traceback.print_exc()
+
+class BufferedDBLogHandler(DBLogHandler):
+    """
+    A DBLogHandler that keeps the records in memory and writes them to the
+    database in batches from a background thread, so that logging does not
+    cost a transaction per message.
+
+    The buffer is written when it contains buffer_size entries, at least every
+    flush_interval seconds, when the handler is flushed or closed (the
+    logging module does it at exit) and when a process forked by
+    multiprocessing or by billiard (the celery workers) exits. When the buffer contains max_buffered
+    entries, further messages are dropped and a single warning entry per
+    object reports how many were lost.
+    """
+
+    def __init__(self, level=logging.NOTSET, buffer_size=None,
+                 flush_interval=None, max_buffered=None):
+        from aiida.common.setup import get_property
+
+        super(BufferedDBLogHandler, self).__init__(level)
+
+        if buffer_size is None:
+            buffer_size = get_property('logging.db_buffer_size')
+        if flush_interval is None:
+            flush_interval = get_property('logging.db_flush_interval')
+        if max_buffered is None:
+            max_buffered = get_property('logging.db_max_buffered')
+
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._start()
+
+    def _start(self):
+        """
+        Initialize the buffer and start the thread writing it
+        """
+        self._pid = os.getpid()
+        self._entries = []
+        self._dropped = Counter()
+        self._condition = threading.Condition()
+        # Serializes the writes of the thread and of flush()
+        self._write_lock = threading.Lock()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run,
+                                        name='BufferedDBLogHandler')
+        self._thread.daemon = True
+        self._thread.start()
+        # The processes forked by multiprocessing (e.g. the workers of the
+        # daemon pool) exit with os._exit, without closing the handlers, but
+        # run the multiprocessing finalizers first
+        Finalize(self, self.flush, exitpriority=0)
+        # The prefork workers of celery are forked by billiard, which runs
+        # its own finalizers instead
+        try:
+            from billiard.util import Finalize as BilliardFinalize
+        except ImportError:
+            pass
+        else:
+            BilliardFinalize(self, self.flush, exitpriority=0)
+
+    def emit(self, record):
+        if not is_dbenv_loaded():
+            return
+
+        from aiida.orm.log import Log
+
+        entry = Log.get_entry_from_record(record)
+        if entry is None:
+            return
+
+        if os.getpid() != self._pid:
+            # The process was forked (e.g. by celery): the thread was not
+            # copied, and the parent writes the entries buffered so far
+            self._start()
+
+        # Copy the metadata, the record may be changed by other handlers
+        entry['metadata'] = dict(entry['metadata'])
+
+        with self._condition:
+            if len(self._entries) >= self.max_buffered:
+                self._dropped[(entry['objname'], entry['objpk'])] += 1
+                return
+            self._entries.append(entry)
+            if len(self._entries) >= self.buffer_size:
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                deadline = time.time() + self.flush_interval
+                while (not self._stopped and
+                       len(self._entries) < self.buffer_size):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                stopped = self._stopped
+            self._write()
+            if stopped:
+                return
+
+    def _write(self):
+        """
+        Write the buffered entries and the summary of the dropped ones
+        """
+        with self._write_lock:
+            with self._condition:
+                entries, self._entries = self._entries, []
+                dropped, self._dropped = self._dropped, Counter()
+            if not entries and not dropped:
+                return
+
+            entries.extend(self._get_dropped_entries(dropped))
+
+            from aiida.orm.backend import construct
+
+            log = construct().log
+            try:
+                log.create_entries(entries)
+            except Exception:
+                # Probably one entry cannot be stored (e.g. metadata that
+                # cannot be serialized): store the others one by one
+                for entry in entries:
+                    try:
+                        log.create_entries([entry])
+                    except Exception:
+                        # To avoid loops with the error handler, I just print
+                        import traceback
+
+                        traceback.print_exc()
+
+    @staticmethod
+    def _get_dropped_entries(dropped):
+        """
+        Return a warning entry for each object whose messages were dropped
+        """
+        from aiida.utils import timezone
+
+        return [{
+            'time': timezone.now(),
+            'loggername': __name__,
+            'levelname': logging.getLevelName(logging.WARNING),
+            'objname': objname,
+            'objpk': objpk,
+            'message': "{} log messages were dropped because the log buffer "
+                       "was full".format(count),
+            'metadata': {},
+        } for (objname, objpk), count in dropped.iteritems()]
+
+    def flush(self):
+        """
+        Write the buffered entries to the database now
+        """
+        if os.getpid() == self._pid and is_dbenv_loaded():
+            self._write()
+
+    def close(self):
+        """
+        Stop the thread after it writes the remaining entries
+        """
+        if os.getpid() == self._pid and self._thread.is_alive():
+            with self._condition:
+                self._stopped = True
+                self._condition.notify()
+            self._thread.join()
+        super(BufferedDBLogHandler, self).close()
+
+
+def enable_db_log_buffering():
+    """
+    Replace the DBLogHandler of the 'aiida' logger with a
+    BufferedDBLogHandler with the same level, if the logging.db_buffered
+    property is set. Called by the daemon, where most log messages are
+    emitted.
+    """
+    from aiida.common.setup import get_property
+
+    if not get_property('logging.db_buffered'):
+        return
+
+    logger = logging.getLogger('aiida')
+    for handler in list(logger.handlers):
+        if type(handler) is DBLogHandler:
+            buffered_handler = BufferedDBLogHandler(level=handler.level)
+            buffered_handler.setFormatter(handler.formatter)
+            logger.removeHandler(handler)
+            logger.addHandler(buffered_handler)
+            handler.close()
@@ -13,59 +13,218 @@ from aiida.backends.utils import load_dbenv, is_dbenv_loaded
 if not is_dbenv_loaded():
     load_dbenv()
 
+import errno
+import fcntl
+import os
 import traceback
+from collections import namedtuple
 import aiida.work.defaults as defaults
 from plum.process import ProcessState
+from aiida.work.dependency_index import get_dependencies
 from aiida.work.process import Process
 import aiida.work.persistence
 
 
+# The possible outcomes of ticking a process
+LOCKED = 'locked'
+NOT_LOADED = 'not_loaded'
+FAILED = 'failed'
+FINISHED = 'finished'
+WAITING = 'waiting'
+
+TickResult = namedtuple("TickResult", ["pid", "status", "dependencies"])
+
+_POOL_ENGINES = {}
+
 
 def tick_workflow_engine(storage=None, print_exceptions=True):
+    """
+    Tick the processes in the storage that have work to do.
+
+    Only the processes whose dependencies have changed since the last tick
+    (as recorded in the dependency index of the storage) are loaded and
+    ticked, together with new processes and those waiting on something the
+    index does not know about.  If ``aiida.work.defaults.daemon_workers`` is
+    not zero the processes are ticked in parallel by a pool of worker
+    processes.
+
+    :param storage: The storage to take the processes from, defaults to the
+        daemon storage
+    :param print_exceptions: Print the traceback of processes that fail
+    :return: True if there are processes that have not finished yet
+    """
     if storage is None:
         storage = aiida.work.persistence.get_default()
 
+    index = storage.dependency_index
+    pids = index.get_pids_to_tick(storage.get_running_pids())
+
+    if defaults.daemon_workers != 0 and len(pids) > 1:
+        results = _get_pool_engine(storage).tick(pids, print_exceptions)
+    else:
+        results = [tick_process(storage, pid, print_exceptions) for pid in pids]
+
     more_work = False
+    for result in results:
+        if result.status == WAITING:
+            index.set_dependencies(result.pid, result.dependencies)
+        elif result.status == LOCKED:
+            # Someone else is ticking it
+            more_work = True
+        else:
+            index.remove(result.pid)
+
+    index.save()
+
+    # Everything left in the index is still waiting
+    return more_work or len(index) > 0
+
 
-    for proc in _load_all_processes(storage):
-        storage.persist_process(proc)
-        is_waiting = proc.get_waiting_on()
+def tick_process(storage, pid, print_exceptions=True):
+    """
+    Load a process from its checkpoint and tick it once.
+
+    While the process is ticked its lock file is held, so that the same
+    process is never ticked by two daemon workers at the same time.  The
+    updated checkpoint is written back to the storage before the lock is
+    released.  The lock file is left in place, removing it here would let
+    another worker lock a new file while this one is still ticking: the lock
+    files of the processes that are no longer running are removed by
+    :func:`prune_lock_files`.
+
+    :param storage: The storage the process is in
+    :param pid: The process id
+    :param print_exceptions: Print the traceback if the process fails
+    :return: The outcome of the tick
+    :rtype: :class:`TickResult`
+    """
+    lock_path = storage.get_lock_path(pid)
+    try:
+        os.makedirs(os.path.dirname(lock_path))
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+    with open(lock_path, 'a') as lock:
         try:
-            # Get the Process till the point it is about to do some work
-            if is_waiting is not None:
-                proc.run_until(ProcessState.WAITING)
-            else:
-                proc.run_until(ProcessState.STARTED)
-
-            proc.tick()
-
-            # Now stop the process and let it finish running through the states
-            # until it is destroyed
-            proc.stop()
-            proc.run_until(ProcessState.DESTROYED)
-        except BaseException:
-            if print_exceptions:
-                traceback.print_exc()
-            continue
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except IOError as e:
+            if e.errno in (errno.EAGAIN, errno.EACCES):
+                return TickResult(pid, LOCKED, None)
+            raise
+
+        try:
+            return _tick_process(storage, pid, print_exceptions)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
 
-        # Check if the process finished or was stopped early
-        if not proc.has_finished():
-            more_work = True
 
-    return more_work
+def prune_lock_files(storage=None):
+    """
+    Remove the lock files of the processes that are no longer running.
 
+    A lock file is only removed while it is locked and once the running
+    checkpoint of its process is gone: the process has finished and its pid
+    is never ticked again, so no worker can be waiting on the removed file.
 
-def _load_all_processes(storage):
-    procs = []
-    for cp in storage.load_all_checkpoints():
+    :param storage: The storage whose lock files are pruned, defaults to the
+        daemon storage
+    :return: The number of lock files removed
+    """
+    if storage is None:
+        storage = aiida.work.persistence.get_default()
+
+    removed = 0
+    for lock_path in storage.get_lock_paths():
+        pid = os.path.basename(lock_path)[:-len(".lock")]
+        if os.path.isfile(storage.get_running_path(pid)):
+            continue
         try:
-            procs.append(Process.create_from(cp))
-        except KeyboardInterrupt:
+            # Without creating the file again if it was just removed
+            lock = os.open(lock_path, os.O_WRONLY)
+        except OSError as e:
+            if e.errno == errno.ENOENT:
+                continue
             raise
-        except BaseException:
-            # TODO: Log exception
-            pass
-    return procs
+        try:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except IOError as e:
+                if e.errno in (errno.EAGAIN, errno.EACCES):
+                    # Still being ticked
+                    continue
+                raise
+            if not os.path.isfile(storage.get_running_path(pid)):
+                try:
+                    os.remove(lock_path)
+                except OSError as e:
+                    # Removed by another call in the meantime
+                    if e.errno != errno.ENOENT:
+                        raise
+                else:
+                    removed += 1
+        finally:
+            os.close(lock)
+    return removed
+
+
+def _tick_process(storage, pid, print_exceptions):
+    proc = _load_process(storage, pid)
+    if proc is None:
+        return TickResult(pid, NOT_LOADED, None)
+
+    storage.persist_process(proc)
+    is_waiting = proc.get_waiting_on()
+    try:
+        # Get the Process till the point it is about to do some work
+        if is_waiting is not None:
+            proc.run_until(ProcessState.WAITING)
+        else:
+            proc.run_until(ProcessState.STARTED)
+
+        proc.tick()
+        # Stopping the process clears what it is waiting on
+        dependencies = get_dependencies(proc.get_waiting_on())
+
+        # Now stop the process and let it finish running through the states
+        # until it is destroyed
+        proc.stop()
+        proc.run_until(ProcessState.DESTROYED)
+    except BaseException:
+        if print_exceptions:
+            traceback.print_exc()
+        return TickResult(pid, FAILED, None)
+
+    # Check if the process finished or was stopped early
+    if proc.has_finished():
+        return TickResult(pid, FINISHED, None)
+    else:
+        return TickResult(pid, WAITING, dependencies)
+
+
+def _load_process(storage, pid):
+    try:
+        # Only load running checkpoints, the process may have finished since
+        # the pid was handed out
+        return Process.create_from(storage.load_checkpoint_from_file(
+            storage.get_running_path(pid)))
+    except KeyboardInterrupt:
+        raise
+    except BaseException:
+        # TODO: Log exception
+        return None
+
+
+def _get_pool_engine(storage):
+    from aiida.work.execution_engine import ProcessPoolExecutionEngine
+
+    key = storage.store_directory
+    if key not in _POOL_ENGINES:
+        _POOL_ENGINES[key] = ProcessPoolExecutionEngine(
+            storage, workers=defaults.daemon_workers,
+            chunksize=defaults.daemon_chunksize,
+            max_ticks_per_worker=defaults.daemon_max_ticks_per_worker)
+    return _POOL_ENGINES[key]
 
 
 if __name__ == "__main__":
@@ -31,3 +31,14 @@ class_loader = plum.class_loader.ClassLoader(ClassLoader())
 registry = _kb
 parallel_engine = MultithreadedEngine()
 serial_engine = SerialEngine()
+
+# Settings of the pool of worker processes the daemon uses to tick processes,
+# see aiida.work.execution_engine.ProcessPoolExecutionEngine
+# The number of worker processes: 0 ticks all processes serially in the daemon
+# itself, None uses one worker per CPU
+daemon_workers = 0
+# The number of processes handed to a worker at once
+daemon_chunksize = 1
+# The number of process ticks after which a worker is replaced by a fresh one,
+# None to keep workers for the lifetime of the pool
+daemon_max_ticks_per_worker = 100
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+A reverse index from the things that waiting processes depend on (calculation
+nodes and legacy workflows) to the pids of the processes waiting on them.
+
+The daemon uses the index to only load and tick those processes whose
+dependencies have changed since the last tick, rather than re-checking every
+waiting process.  Changes are fed to the index through a journal file: every
+time a calculation reaches a terminal state (or a process finishes) a line is
+appended to the journal, which is consumed by the next tick.
+"""
+
+import collections
+import errno
+import os
+import tempfile
+import time
+import weakref
+import cPickle as pickle
+
+from plum.wait_ons import Checkpoint, WaitOnProcess, WaitOnAll, WaitOnAny
+
+# The kinds of keys that can be used in the index
+NODE = 'node'
+WORKFLOW = 'workflow'
+
+# Processes that have not been ticked for this number of seconds will be
+# ticked anyway, as a safety net for notifications that may have been missed
+# (e.g. states set directly on the database models, or by other tools)
+DEFAULT_MAX_IDLE = 600
+
+_JOURNAL_FILENAME = 'journal'
+_INDEX_FILENAME = 'index.pickle'
+
+# All the indices that are alive in this interpreter, so that notifications
+# also reach indices that are not in the default location (e.g. in tests)
+_INDICES = weakref.WeakSet()
+
+
+def get_dependencies(wait_on):
+    """
+    Get the keys of the things that a wait on depends on.
+
+    :param wait_on: The wait on (of type plum.wait.WaitOn)
+    :return: A frozenset of (kind, pk) tuples or None if the dependencies of
+        the wait on are not known, in which case the waiting process has to be
+        ticked every time.
+    """
+    if wait_on is None or isinstance(wait_on, Checkpoint):
+        return None
+
+    try:
+        get = wait_on.get_dependencies
+    except AttributeError:
+        pass
+    else:
+        return get()
+
+    if isinstance(wait_on, WaitOnProcess):
+        # The pid of an AiiDA process is the pk of its calculation node,
+        # unless the provenance was not stored in which case it's a UUID
+        pid = wait_on._pid
+        if isinstance(pid, (int, long)):
+            return frozenset([(NODE, pid)])
+        return None
+
+    if isinstance(wait_on, (WaitOnAll, WaitOnAny)):
+        keys = set()
+        for child in wait_on._wait_list:
+            child_keys = get_dependencies(child)
+            if child_keys is None:
+                return None
+            keys.update(child_keys)
+        return frozenset(keys)
+
+    return None
+
+
+def notify(kind, pk):
+    """
+    Notify all the dependency indices that the state of something processes
+    may be waiting on has changed.
+
+    This is cheap enough to be called on every state transition: it appends
+    one line to the journal of each index, and does nothing for directories
+    that have not been set up by a daemon.
+
+    :param kind: The kind of the key, either NODE or WORKFLOW
+    :param pk: The pk of the node or workflow
+    """
+    if pk is None:
+        return
+
+    directories = set(index.directory for index in _INDICES)
+    default_directory = get_default_directory()
+    if default_directory is not None:
+        directories.add(default_directory)
+
+    line = "{} {}\n".format(kind, pk)
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        # Appends of a single short line are atomic, so concurrent writers
+        # don't need to be synchronised
+        with open(os.path.join(directory, _JOURNAL_FILENAME), 'a') as journal:
+            journal.write(line)
+
+
+def get_default_directory():
+    """
+    Get the directory of the index used by the default storage of the daemon.
+
+    :return: The absolute path or None if the repository is not on a local
+        filesystem.
+    """
+    from aiida.work.persistence import get_workflows_directory
+
+    workflows_dir = get_workflows_directory()
+    if workflows_dir is None:
+        return None
+    return os.path.join(workflows_dir, 'dependencies')
+
+
+class DependencyIndex(object):
+    """
+    The persistent index of waiting processes for a particular storage.
+    """
+
+    def __init__(self, directory, max_idle=DEFAULT_MAX_IDLE):
+        """
+        :param directory: The directory to store the index and journal in.
+            It will be created if it doesn't exist.
+        :param max_idle: The maximum number of seconds a waiting process can
+            go without being ticked.  If None, processes are only ticked when
+            notified.
+        """
+        self._directory = directory
+        self._max_idle = max_idle
+        # pid -> frozenset of keys (or None if unknown)
+        self._dependencies = {}
+        # key -> set of pids
+        self._waiting = collections.defaultdict(set)
+        # pid -> timestamp
+        self._last_ticked = {}
+
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        self._load()
+        _INDICES.add(self)
+
+    def __len__(self):
+        return len(self._dependencies)
+
+    def __contains__(self, pid):
+        return pid in self._dependencies
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def get_waiting_pids(self, kind, pk):
+        """
+        Get the pids of the processes waiting on a node or workflow.
+
+        :param kind: The kind of the key, either NODE or WORKFLOW
+        :param pk: The pk of the node or workflow
+        :return: A set of pids
+        """
+        return set(self._waiting.get((kind, pk), ()))
+
+    def get_pids_to_tick(self, running_pids, now=None):
+        """
+        Consume the journal and determine which of the running processes
+        have to be ticked.  These are the processes that are not in the
+        index yet, those whose dependencies are unknown, those that were
+        notified and those that have been idle for too long.
+
+        Processes in the index that are no longer running are removed.
+
+        :param running_pids: The pids of all the processes in the storage
+        :param now: The current time, defaults to time.time()
+        :return: A list of pids
+        """
+        if now is None:
+            now = time.time()
+
+        running_pids = set(running_pids)
+        for pid in set(self._dependencies) - running_pids:
+            self.remove(pid)
+
+        to_tick = set()
+        for key in self._pop_journal():
+            to_tick.update(self._waiting.get(key, ()))
+
+        for pid in running_pids:
+            if pid not in self._dependencies or \
+                    self._dependencies[pid] is None:
+                to_tick.add(pid)
+            elif self._max_idle is not None and \
+                    now - self._last_ticked[pid] > self._max_idle:
+                to_tick.add(pid)
+
+        return sorted(to_tick)
+
+    def update(self, pid, wait_on, now=None):
+        """
+        Record what a process is waiting on after it has been ticked.
+
+        :param pid: The process id
+        :param wait_on: The wait on of the process (of type plum.wait.WaitOn)
+        :param now: The current time, defaults to time.time()
+        """
+        self.set_dependencies(pid, get_dependencies(wait_on), now)
+
+    def set_dependencies(self, pid, keys, now=None):
+        """
+        Record the keys a process is waiting on, as returned by
+        :func:`get_dependencies`.
+
+        :param pid: The process id
+        :param keys: A frozenset of (kind, pk) tuples or None if unknown
+        :param now: The current time, defaults to time.time()
+        """
+        self.remove(pid)
+
+        self._dependencies[pid] = keys
+        self._last_ticked[pid] = time.time() if now is None else now
+        if keys is not None:
+            for key in keys:
+                self._waiting[key].add(pid)
+
+    def remove(self, pid):
+        """
+        Remove a process from the index, if present.
+
+        :param pid: The process id
+        """
+        keys = self._dependencies.pop(pid, None)
+        self._last_ticked.pop(pid, None)
+        if keys is not None:
+            for key in keys:
+                pids = self._waiting[key]
+                pids.discard(pid)
+                if not pids:
+                    del self._waiting[key]
+
+    def save(self):
+        """
+        Write the index to disk.  The file is replaced atomically so that a
+        crash can't leave a half-written index behind.
+        """
+        state = {
+            'dependencies': self._dependencies,
+            'last_ticked': self._last_ticked,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, self._index_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @property
+    def _index_path(self):
+        return os.path.join(self._directory, _INDEX_FILENAME)
+
+    def _load(self):
+        try:
+            with open(self._index_path, 'rb') as f:
+                state = pickle.load(f)
+        except (IOError, EOFError, pickle.UnpicklingError):
+            # No index yet (or a corrupt one), every process will be ticked
+            # and registered again
+            return
+
+        self._last_ticked = state['last_ticked']
+        for pid, keys in state['dependencies'].iteritems():
+            self._dependencies[pid] = keys
+            if keys is not None:
+                for key in keys:
+                    self._waiting[key].add(pid)
+
+    def _pop_journal(self):
+        """
+        Atomically take the current journal and parse the keys in it.
+
+        :return: A set of (kind, pk) tuples
+        """
+        journal_path = os.path.join(self._directory, _JOURNAL_FILENAME)
+        processing_path = "{}.{}".format(journal_path, os.getpid())
+        try:
+            os.rename(journal_path, processing_path)
+        except OSError as e:
+            if e.errno == errno.ENOENT:
+                return set()
+            raise
+
+        keys = set()
+        try:
+            with open(processing_path, 'r') as journal:
+                for line in journal:
+                    try:
+                        kind, pk = line.split()
+                        keys.add((kind, int(pk)))
+                    except ValueError:
+                        # A partially written line, ignore it
+                        continue
+        finally:
+            os.remove(processing_path)
+
+        return keys
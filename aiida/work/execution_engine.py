@@ -8,6 +8,8 @@
 # For further information please visit http://www.aiida.net               #
 ###########################################################################
 
+import multiprocessing
+
 import plum.engine.parallel
 
 
@@ -16,3 +18,124 @@ class ExecutionEngine(plum.engine.parallel.MultithreadedEngine):
     pass
 
 
+class ProcessPoolExecutionEngine(object):
+    """
+    An engine that ticks checkpointed processes in a pool of worker processes,
+    so that CPU heavy steps of independent processes run in parallel rather
+    than being serialised by the GIL.
+
+    Processes are handed to the workers by pid: each worker loads the
+    checkpoint from the storage, ticks the process and writes the checkpoint
+    back (see :func:`aiida.work.daemon.tick_process`).  Each worker drops
+    the database connections inherited from the parent and opens its own
+    ones, also when it replaces a worker after `max_ticks_per_worker` ticks.
+    """
+
+    def __init__(self, storage, workers=None, chunksize=1,
+                 max_ticks_per_worker=None):
+        """
+        :param storage: The storage of the processes
+        :type storage: :class:`aiida.work.persistence.Persistence`
+        :param workers: The number of worker processes, None for one per CPU
+        :param chunksize: The number of processes handed to a worker at once
+        :param max_ticks_per_worker: The number of ticks after which a worker
+            is replaced by a fresh one, None to keep them forever
+        """
+        self._storage_kwargs = {
+            'running_directory': storage.store_directory,
+            'finished_directory': storage.finished_directory,
+            'failed_directory': storage.failed_directory,
+        }
+        self._chunksize = chunksize
+
+        _close_db_connections()
+        self._pool = multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(self._storage_kwargs,),
+            maxtasksperchild=max_ticks_per_worker)
+
+    def tick(self, pids, print_exceptions=True):
+        """
+        Tick each of the processes once.
+
+        :param pids: The pids of the processes to tick
+        :param print_exceptions: Print the traceback of processes that fail
+        :return: A list with the outcome of each tick
+        :rtype: list of :class:`aiida.work.daemon.TickResult`
+        """
+        args = [(pid, print_exceptions) for pid in pids]
+        return self._pool.map(_tick_in_worker, args, self._chunksize)
+
+    def shutdown(self):
+        self._pool.close()
+        self._pool.join()
+
+
+# The storage of a worker process, set by the pool initializer
+_WORKER_STORAGE = None
+
+
+# The database connections inherited from the parent, see
+# _drop_inherited_db_connections
+_INHERITED_DB_CONNECTIONS = []
+
+
+def _init_worker(storage_kwargs):
+    from aiida.work.persistence import Persistence
+    global _WORKER_STORAGE
+
+    _drop_inherited_db_connections()
+    _WORKER_STORAGE = Persistence(auto_persist=False, **storage_kwargs)
+
+
+def _tick_in_worker(args):
+    from aiida.work.daemon import tick_process
+
+    pid, print_exceptions = args
+    return tick_process(_WORKER_STORAGE, pid, print_exceptions)
+
+
+def _close_db_connections():
+    """
+    Close the database connections of this process before forking, otherwise
+    the children would share the same connections with the parent.  They
+    will be reopened transparently when needed.
+    """
+    from aiida.backends import settings
+    from aiida.backends.profile import BACKEND_DJANGO, BACKEND_SQLA
+
+    if settings.BACKEND == BACKEND_DJANGO:
+        from django.db import connections
+        for connection in connections.all():
+            connection.close()
+    elif settings.BACKEND == BACKEND_SQLA:
+        import aiida.backends.sqlalchemy as sa
+        session = sa.get_scoped_session()
+        if session is not None:
+            session.close()
+        if sa.engine is not None:
+            sa.engine.dispose()
+
+
+def _drop_inherited_db_connections():
+    """
+    Make a worker open its own database connections.  The workers that
+    replace the recycled ones are forked while the parent has open
+    connections again, and these share their sockets with the parent: they
+    must not be closed in the worker (which would also close them for the
+    parent), so they are only detached and kept referenced until the worker
+    exits.
+
+    The connections of the SQLAlchemy engine are replaced by the after-fork
+    hook of :mod:`aiida.backends.sqlalchemy.utils`.
+    """
+    from aiida.backends import settings
+    from aiida.backends.profile import BACKEND_DJANGO
+
+    if settings.BACKEND == BACKEND_DJANGO:
+        from django.db import connections
+        for connection in connections.all():
+            if connection.connection is not None:
+                _INHERITED_DB_CONNECTIONS.append(connection.connection)
+                connection.connection = None
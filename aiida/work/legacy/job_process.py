@@ -93,6 +93,16 @@ class JobProcess(Process):
         for label, node in self.calc.get_outputs_dict().iteritems():
             self.out(label, node)
 
+    @override
+    def _is_ephemeral_run(self, inputs):
+        # A job calculation can't run without its node
+        return False
+
+    @override
+    def _can_fast_forward(self, inputs):
+        # Caching of job calculations is done by JobCalculation.submit()
+        return False
+
     @override
     def create_db_record(self):
         return self._CALC_CLASS()
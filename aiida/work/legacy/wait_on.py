@@ -31,6 +31,10 @@ class WaitOnJobCalculation(WaitOn):
     def is_ready(self, registry=None):
         return not load_node(pk=self._pk)._is_running()
 
+    def get_dependencies(self):
+        from aiida.work.dependency_index import NODE
+        return frozenset([(NODE, self._pk)])
+
     @override
     def save_instance_state(self, out_state):
         super(WaitOnJobCalculation, self).save_instance_state(out_state)
@@ -58,6 +62,10 @@ class WaitOnWorkflow(WaitOn):
         else:
             return False
 
+    def get_dependencies(self):
+        from aiida.work.dependency_index import WORKFLOW
+        return frozenset([(WORKFLOW, self._pk)])
+
     @override
     def save_instance_state(self, out_state):
         super(WaitOnWorkflow, self).save_instance_state(out_state)
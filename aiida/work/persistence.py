@@ -9,8 +9,12 @@
 ###########################################################################
 
 import collections
+import glob
 import uritools
+import os
 import os.path
+import pickle
+import tempfile
 
 import plum.persistence.pickle_persistence
 from plum.process import Process
@@ -19,6 +23,91 @@ from aiida.work.defaults import class_loader
 
 
 class Persistence(plum.persistence.pickle_persistence.PicklePersistence):
+    def __init__(self, dependency_directory=None, **kwargs):
+        """
+        :param dependency_directory: The directory used for the
+            :class:`~aiida.work.dependency_index.DependencyIndex` of the
+            waiting processes.  Defaults to a hidden subdirectory of the
+            running directory.
+        """
+        super(Persistence, self).__init__(**kwargs)
+        if dependency_directory is None:
+            dependency_directory = os.path.join(
+                self.store_directory, '.dependencies')
+        self._dependency_directory = dependency_directory
+        self._dependency_index = None
+
+    @property
+    def dependency_index(self):
+        """
+        The index of what the processes in this storage are waiting on.
+
+        :rtype: :class:`aiida.work.dependency_index.DependencyIndex`
+        """
+        from aiida.work.dependency_index import DependencyIndex
+
+        if self._dependency_index is None:
+            self._dependency_index = \
+                DependencyIndex(self._dependency_directory)
+        return self._dependency_index
+
+    def get_running_pids(self):
+        """
+        Get the pids of all the running processes without loading their
+        checkpoints.
+
+        :return: A list of pids
+        """
+        pids = []
+        for f in glob.glob(os.path.join(self.store_directory, "*.pickle")):
+            pid = os.path.basename(f)[:-len(".pickle")]
+            try:
+                pids.append(int(pid))
+            except ValueError:
+                # Processes that don't store provenance use a UUID as pid
+                pids.append(pid)
+        return pids
+
+    @override
+    def save(self, process):
+        """
+        Save the checkpoint of a process.  The checkpoint is first written to
+        a temporary file that is then moved in place, so that other processes
+        (e.g. daemon workers) never see a partially written checkpoint.
+        """
+        checkpoint = self.create_bundle(process)
+        self._ensure_directory(self.store_directory)
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(checkpoint, f)
+            os.rename(tmp_path, self.get_running_path(process.pid))
+        except BaseException:
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_lock_path(self, pid):
+        """
+        Get the path of the file that is locked while a process is being
+        ticked, see :func:`aiida.work.daemon.tick_process`.
+
+        :param pid: The process pid
+        :return: The absolute path of the lock file
+        """
+        return os.path.join(
+            self.store_directory, '.locks', "{}.lock".format(pid))
+
+    def get_lock_paths(self):
+        """
+        Get the paths of all the lock files, including those of processes
+        that are no longer running, see
+        :func:`aiida.work.daemon.prune_lock_files`.
+
+        :return: A list of absolute paths
+        """
+        return glob.glob(self.get_lock_path('*'))
+
     @override
     def load_checkpoint_from_file(self, filepath):
         cp = super(Persistence, self).load_checkpoint_from_file(filepath)
@@ -93,18 +182,32 @@ def get_default():
     return _DEFAULT_STORAGE
 
 
-def _create_storage():
+def get_workflows_directory():
+    """
+    Get the directory where the default storage keeps the process checkpoints.
+
+    :return: The absolute path or None if the repository is not on a local
+        filesystem.
+    """
     import aiida.common.setup as setup
     import aiida.settings as settings
-    global _DEFAULT_STORAGE
 
     parts = uritools.urisplit(settings.REPOSITORY_URI)
     if parts.scheme == u'file':
-        WORKFLOWS_DIR = os.path.expanduser(
+        return os.path.expanduser(
             os.path.join(parts.path, setup.WORKFLOWS_SUBDIR))
+    return None
+
+
+def _create_storage():
+    from aiida.work.dependency_index import get_default_directory
+    global _DEFAULT_STORAGE
 
+    WORKFLOWS_DIR = get_workflows_directory()
+    if WORKFLOWS_DIR is not None:
         _DEFAULT_STORAGE = Persistence(
             auto_persist=False,
             running_directory=os.path.join(WORKFLOWS_DIR, 'running'),
             finished_directory=os.path.join(WORKFLOWS_DIR, 'finished'),
-            failed_directory=os.path.join(WORKFLOWS_DIR, 'failed'))
+            failed_directory=os.path.join(WORKFLOWS_DIR, 'failed'),
+            dependency_directory=get_default_directory())
@@ -127,6 +127,7 @@ class Process(plum.process.Process):
         """
         CALC_ID = 'calc_id'
         PARENT_CALC_PID = 'parent_calc_pid'
+        EPHEMERAL = 'ephemeral'
 
     @classmethod
     def define(cls, spec):
@@ -135,6 +136,9 @@ class Process(plum.process.Process):
 
         spec.input("_store_provenance", valid_type=bool, default=True,
                    required=False)
+        # Run without creating any node (see Process.is_ephemeral)
+        spec.input("_ephemeral", valid_type=bool, default=False,
+                   required=False)
         spec.input("_description", valid_type=basestring, required=False)
         spec.input("_label", valid_type=basestring, required=False)
 
@@ -167,19 +171,39 @@ class Process(plum.process.Process):
         super(Process, self).__init__()
         self._calc = None
         self._parent_pid = None
+        self._cached_calc = None
+        self._ephemeral = False
 
     @property
     def calc(self):
         return self._calc
 
+    @property
+    def is_ephemeral(self):
+        """
+        Whether the process runs in ephemeral mode.  An ephemeral process
+        does not create any node: there is no calculation node (calc is
+        None), no links and no provenance at all.  Inputs and outputs are
+        passed through the ports as they are, without type checks, so they
+        can also be plain python values.  Processes started by an ephemeral
+        process are ephemeral too.
+
+        This is meant for tight loops of small workfunctions or workchains,
+        where creating the nodes would cost much more than the work itself.
+        Request it with the ``_ephemeral=True`` input.
+        """
+        return self._ephemeral
+
     @override
     def save_instance_state(self, bundle):
         super(Process, self).save_instance_state(bundle)
 
-        if self.inputs._store_provenance:
-            assert self.calc.is_stored
-
-        bundle[self.SaveKeys.CALC_ID.value] = self.pid
+        if self._ephemeral:
+            bundle[self.SaveKeys.EPHEMERAL.value] = True
+        else:
+            if self.inputs._store_provenance:
+                assert self.calc.is_stored
+            bundle[self.SaveKeys.CALC_ID.value] = self.pid
         bundle.set_class_loader(class_loader)
 
     def run_after_queueing(self, wait_on):
@@ -194,8 +218,13 @@ class Process(plum.process.Process):
         if value is None:
             # In this case assume that output_port is the actual value and there
             # is just one return value
-            return super(Process, self).out(self.SINGLE_RETURN_LINKNAME,
-                                            output_port)
+            output_port, value = self.SINGLE_RETURN_LINKNAME, output_port
+
+        if self._ephemeral:
+            # Pass the value through without checking its type
+            self._outputs[output_port] = value
+            self._on_output_emitted(
+                output_port, value, not self.spec().has_output(output_port))
         else:
             return super(Process, self).out(output_port, value)
 
@@ -212,9 +241,13 @@ class Process(plum.process.Process):
             except IndexError:
                 pass
 
-            self._pid = self._create_and_setup_db_record()
+            # An ephemeral process keeps the pid given to it
+            if not self._ephemeral:
+                self._pid = self._create_and_setup_db_record()
         else:
-            if self.SaveKeys.CALC_ID.value in saved_instance_state:
+            if self.SaveKeys.EPHEMERAL.value in saved_instance_state:
+                self._ephemeral = True
+            elif self.SaveKeys.CALC_ID.value in saved_instance_state:
                 self._calc = load_node(saved_instance_state[self.SaveKeys.CALC_ID.value])
                 self._pid = self.calc.pk
             else:
@@ -224,7 +257,7 @@ class Process(plum.process.Process):
                 self._parent_pid = saved_instance_state[
                     self.SaveKeys.PARENT_CALC_PID.value]
 
-        if self._logger is None:
+        if self._logger is None and self.calc is not None:
             self.set_logger(self.calc.logger)
 
     @override
@@ -234,8 +267,15 @@ class Process(plum.process.Process):
 
     @override
     def on_finish(self):
+        from aiida.work.dependency_index import notify, NODE
+        from aiida.orm.calculation.work import WorkCalculation
         super(Process, self).on_finish()
+        if self._ephemeral:
+            return
+        if isinstance(self.calc, WorkCalculation):
+            self.calc._set_attr(WorkCalculation.FINISHED_KEY, True)
         self.calc.seal()
+        notify(NODE, self.calc.pk)
 
     @override
     def _on_output_emitted(self, output_port, value, dynamic):
@@ -249,6 +289,9 @@ class Process(plum.process.Process):
         """
         from aiida.orm import Data
         super(Process, self)._on_output_emitted(output_port, value, dynamic)
+        if self._ephemeral:
+            return
+
         assert isinstance(value, Data), \
             "Values outputted from process must be instances of AiiDA Data" \
             "types.  Got: {}".format(value.__class__)
@@ -264,6 +307,8 @@ class Process(plum.process.Process):
     def do_run(self):
         # Exclude all private inputs
         ins = {k: v for k, v in self.inputs.iteritems() if not k.startswith('_')}
+        if self._can_fast_forward(ins):
+            return self._fast_forward()
         return self._run(**ins)
 
     @protected
@@ -303,11 +348,43 @@ class Process(plum.process.Process):
     #             del parsed[name]
     #     return parsed
 
+    @override
+    def _check_inputs(self, inputs):
+        self._ephemeral = self._is_ephemeral_run(inputs)
+        # Ephemeral processes pass plain values through the ports
+        if not self._ephemeral:
+            super(Process, self)._check_inputs(inputs)
+
+    @override
+    def _check_outputs(self):
+        if not self._ephemeral:
+            super(Process, self)._check_outputs()
+
+    def _is_ephemeral_run(self, inputs):
+        """
+        Determine if the process should run in ephemeral mode, i.e. if it was
+        requested with the inputs or if the calling process is ephemeral.
+
+        :param inputs: The inputs the process was created with
+        :return: A boolean
+        """
+        if inputs is not None and inputs.get('_ephemeral', False):
+            return True
+        try:
+            return aiida.work.util.ProcessStack.top().is_ephemeral
+        except IndexError:
+            return False
+
     def _create_and_setup_db_record(self):
         self._calc = self.create_db_record()
         self._setup_db_record()
         if self.inputs._store_provenance:
             self.calc.store_all()
+            # Identical processes find this one by the hash of its node, also
+            # when caching is not enabled for the class of the node
+            if self._use_cache() and self.calc.get_extra(
+                    self.calc._HASH_EXTRA_KEY, None) is None:
+                self.calc._store_hash(force=True)
 
         if self.calc.pk is not None:
             return self.calc.pk
@@ -370,12 +447,61 @@ class Process(plum.process.Process):
                 self.calc.label = self.raw_inputs._label
 
     def _can_fast_forward(self, inputs):
-        return False
+        """
+        Check if an identical process already finished, so that its outputs
+        can be reused instead of running this one.  This is the case if the
+        process is fast-forwardable, or caching is enabled for its class (see
+        :mod:`aiida.common.caching`), and a calculation with the same hash is
+        found.
+
+        :param inputs: The inputs the process would be run with
+        :return: True if the process can be fast-forwarded, False otherwise
+        """
+        if self._ephemeral or not self.inputs._store_provenance:
+            return False
+        if not self._use_cache():
+            return False
+
+        self._cached_calc = self.calc._get_same_node()
+        return self._cached_calc is not None
+
+    def _use_cache(self):
+        """
+        Return whether the outputs of an identical process can be reused,
+        i.e. whether the process is fast-forwardable or caching is enabled for
+        its class.
+        """
+        from aiida.common.caching import get_use_cache
+
+        return self.spec().is_fastforwardable() or \
+            get_use_cache(self.__class__)
 
     def _fast_forward(self):
-        node = None  # Here we should find the old node
-        for k, v in node.get_output_dict():
-            self.out(k, v)
+        """
+        Emit the outputs of the identical calculation found by
+        :meth:`_can_fast_forward`.
+
+        If the process is fast-forwardable (e.g. a workfunction with
+        ``cache=True``) the existing outputs are returned as they are.
+        Otherwise the outputs that were created by that calculation are
+        copied, so that they are created by this one, while the others (e.g.
+        inputs that were returned) are returned as they are.
+        """
+        cached = self._cached_calc
+        if self.spec().is_fastforwardable():
+            created = set()
+        else:
+            created = set(node.pk for node in
+                          cached.get_outputs(link_type=LinkType.CREATE))
+
+        for label, node in cached.get_outputs(also_labels=True,
+                                              link_type=LinkType.RETURN):
+            if node.pk in created:
+                node = node.copy()
+            self.out(label, node)
+
+        self.calc.set_extra(self.calc._CACHED_FROM_EXTRA_KEY, cached.uuid)
+        self.report("Reused the outputs of calculation {}".format(cached.pk))
 
 
 class FunctionProcess(Process):
@@ -419,7 +545,10 @@ class FunctionProcess(Process):
                 kwargs.pop(args[i], None)
 
             for k, v in kwargs.iteritems():
-                spec.input(k)
+                # Don't replace the ports of the private inputs, e.g.
+                # _store_provenance or _ephemeral
+                if not spec.has_input(k):
+                    spec.input(k)
 
             # If the function support kwargs then allow dynamic inputs,
             # otherwise disallow
@@ -463,7 +592,9 @@ class FunctionProcess(Process):
             args.append(kwargs.pop(arg))
         outs = self._func(*args, **kwargs)
         if outs is not None:
-            if isinstance(outs, Data):
+            if isinstance(outs, Data) or (
+                    self._ephemeral and
+                    not isinstance(outs, collections.Mapping)):
                 self.out(self.SINGLE_RETURN_LINKNAME, outs)
             elif isinstance(outs, collections.Mapping):
                 for name, value in outs.iteritems():
@@ -490,12 +621,18 @@ class _ProcessFinaliser(plum.process_monitor.ProcessMonitorListener):
     @override
     def on_monitored_process_failed(self, pid):
         from aiida.orm import load_node
+        from aiida.work.dependency_index import notify, NODE
         try:
+            # Ephemeral processes (and those that don't store provenance)
+            # have a UUID as pid and no stored node
+            if not isinstance(pid, (int, long)):
+                raise ValueError("No node for process {}".format(pid))
             calc_node = load_node(pk=pid)
         except ValueError:
             pass
         else:
             calc_node.seal()
+            notify(NODE, calc_node.pk)
         aiida.work.util.ProcessStack.pop(pid=pid)
 
 
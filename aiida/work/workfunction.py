@@ -18,7 +18,7 @@ import functools
 
 
 
-def workfunction(func):
+def workfunction(func=None, cache=False):
     """
     A decorator to turn a standard python function into a workfunction.
     Example usage:
@@ -39,7 +39,18 @@ def workfunction(func):
     >>> r.get_inputs_dict()['_return'].get_inputs()
     [4, 5]
 
+    Pure functions can be memoized with ``@workfunction(cache=True)``: if the
+    function was already run with inputs that have the same hashes, the
+    outputs of that run are returned (and linked to the new calculation)
+    instead of running the function again. The cached runs can be inspected
+    and invalidated with ``verdi work cache``.
+
+    :param func: The function to decorate
+    :param cache: If True, reuse the outputs of identical previous calls
     """
+    if func is None:
+        return functools.partial(workfunction, cache=cache)
+
     @functools.wraps(func)
     def wrapped_function(*args, **kwargs):
         """
@@ -51,6 +62,8 @@ def workfunction(func):
 
         # Build up the Process representing this function
         FuncProc = FunctionProcess.build(func, **kwargs)
+        if cache:
+            FuncProc.spec().fastforwardable()
 
         inputs = {}
         if kwargs:
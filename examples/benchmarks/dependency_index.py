@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Benchmark of the dependency index used by the daemon to decide which waiting
+processes to tick: 10000 processes each wait on a calculation, and 10 of
+these calculations finish every tick.
+
+Without the index every tick loads all the waiting processes and does one
+database round-trip per process to check if it is ready.  With the index only
+the processes whose calculation finished are loaded.
+"""
+from aiida.backends.utils import load_dbenv, is_dbenv_loaded
+
+if not is_dbenv_loaded():
+    load_dbenv()
+
+import shutil
+import tempfile
+import time
+
+from aiida.work.dependency_index import DependencyIndex, notify, NODE
+from aiida.work.legacy.wait_on import WaitOnJobCalculation
+
+NUM_WAITING = 10000
+FINISHED_PER_TICK = 10
+NUM_TICKS = 100
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        index = DependencyIndex(directory, max_idle=None)
+
+        # Process i waits on calculation NUM_WAITING + i
+        running = set(range(NUM_WAITING))
+        start = time.time()
+        for pid in running:
+            index.update(pid, WaitOnJobCalculation('finished', NUM_WAITING + pid))
+        index.save()
+        print "Registered {} waiting processes in {:.3f} s".format(
+            NUM_WAITING, time.time() - start)
+
+        ticked = 0
+        start = time.time()
+        for tick in range(NUM_TICKS):
+            for i in range(FINISHED_PER_TICK):
+                notify(NODE, NUM_WAITING + tick * FINISHED_PER_TICK + i)
+
+            to_tick = index.get_pids_to_tick(running)
+            ticked += len(to_tick)
+            for pid in to_tick:
+                # The process finished
+                index.remove(pid)
+                running.remove(pid)
+            index.save()
+        elapsed = time.time() - start
+
+        print "{} ticks in {:.3f} s ({:.2f} ms per tick)".format(
+            NUM_TICKS, elapsed, 1000. * elapsed / NUM_TICKS)
+        print "Processes loaded per tick: {:.1f} (without index: {})".format(
+            float(ticked) / NUM_TICKS, NUM_WAITING)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
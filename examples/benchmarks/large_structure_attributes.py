@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Benchmark of storing and loading large structures with the Django backend,
+with the 'sites' and 'kinds' attributes either unpacked into one row per
+element of the EAV table or stored as a single json row.
+"""
+from aiida.backends.utils import load_dbenv, is_dbenv_loaded
+
+if not is_dbenv_loaded():
+    load_dbenv()
+
+import time
+
+from aiida.backends.djsite.db.models import DbAttribute
+from aiida.orm import load_node
+from aiida.orm.data.structure import StructureData
+
+NUM_SITES = 5000
+
+
+def create_structure():
+    structure = StructureData(cell=[[100., 0., 0.], [0., 100., 0.],
+                                    [0., 0., 100.]])
+    for i in range(NUM_SITES):
+        structure.append_atom(position=(i % 100, i // 100, 0.),
+                              symbols='Si' if i % 2 else 'O')
+    return structure
+
+
+def benchmark(name, threshold):
+    DbAttribute._json_threshold = threshold
+    structure = create_structure()
+
+    start = time.time()
+    structure.store()
+    stored = time.time() - start
+
+    start = time.time()
+    sites = load_node(structure.pk).sites
+    loaded = time.time() - start
+
+    rows = DbAttribute.objects.filter(dbnode_id=structure.pk).count()
+    print "{:10s} {} sites: store {:.2f} s, load {:.2f} s, {} attribute rows".format(
+        name, len(sites), stored, loaded, rows)
+
+
+def main():
+    threshold = DbAttribute._json_threshold
+    try:
+        benchmark('unpacked', None)
+        benchmark('json', threshold)
+    finally:
+        DbAttribute._json_threshold = threshold
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Benchmark of building List and ParameterData nodes element by element, then
+storing and reading them back. The time per element should not grow with the
+number of elements.
+"""
+from aiida.backends.utils import load_dbenv, is_dbenv_loaded
+
+if not is_dbenv_loaded():
+    load_dbenv()
+
+import time
+
+from aiida.orm import load_node
+from aiida.orm.data.base import List
+from aiida.orm.data.parameter import ParameterData
+
+
+def build_list(size):
+    node = List()
+    for i in range(size):
+        node.append(i)
+    return node
+
+
+def read_list(node):
+    return sum(node[i] for i in range(len(node)))
+
+
+def build_parameters(size):
+    node = ParameterData()
+    for i in range(size):
+        node.update_dict({'key{}'.format(i): i})
+    return node
+
+
+def read_parameters(node):
+    return sum(node.get_dict().itervalues())
+
+
+def benchmark(size, name, build, read):
+    start = time.time()
+    node = build(size)
+    built = time.time() - start
+
+    start = time.time()
+    node.store()
+    stored = time.time() - start
+
+    start = time.time()
+    read(load_node(node.pk))
+    read_time = time.time() - start
+
+    print ("{:14s} {:7d} elements: build {:6.2f} us, store {:6.2f} us, "
+           "read {:6.2f} us per element".format(
+               name, size, built / size * 1e6, stored / size * 1e6,
+               read_time / size * 1e6))
+
+
+def main():
+    for size in [1000, 10000, 100000]:
+        benchmark(size, 'List', build_list, read_list)
+        benchmark(size, 'ParameterData', build_parameters, read_parameters)
+
+
+if __name__ == '__main__':
+    main()
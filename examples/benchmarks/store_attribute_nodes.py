@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Benchmark of the throughput of storing nodes that only have attributes
+(ParameterData and base types), which get no folder in the repository.
+
+Also reports the number of folders created in the repository, which was one
+(plus the 'path' subfolder) per node before folders were created lazily.
+"""
+from aiida.backends.utils import load_dbenv, is_dbenv_loaded
+
+if not is_dbenv_loaded():
+    load_dbenv()
+
+import os
+import time
+
+from aiida.common.utils import get_repository_folder
+from aiida.orm.data.base import Int, Str
+from aiida.orm.data.parameter import ParameterData
+
+NUM_NODES = 2000
+
+
+def count_folders():
+    node_folder = os.path.join(get_repository_folder('repository'), 'node')
+    return sum(len(dirnames) for _, dirnames, _ in os.walk(node_folder))
+
+
+def benchmark(name, create):
+    folders = count_folders()
+    start = time.time()
+    for i in range(NUM_NODES):
+        create(i).store()
+    elapsed = time.time() - start
+    print "{:15s} {} nodes in {:.2f} s ({:.0f} nodes/s), {} new folders".format(
+        name, NUM_NODES, elapsed, NUM_NODES / elapsed,
+        count_folders() - folders)
+
+
+def main():
+    benchmark('Int', lambda i: Int(i))
+    benchmark('Str', lambda i: Str(str(i)))
+    benchmark('ParameterData',
+              lambda i: ParameterData(dict={'index': i, 'values': [1., 2.]}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Benchmark of building, storing and exporting supercells of up to 10000
+atoms, either appending the atoms one by one or setting all of them at once
+with StructureData.from_arrays, with the sites stored in the attributes or
+in arrays.
+"""
+from aiida.backends.utils import load_dbenv, is_dbenv_loaded
+
+if not is_dbenv_loaded():
+    load_dbenv()
+
+import time
+
+import numpy
+
+from aiida.orm import load_node
+from aiida.orm.data.structure import StructureData
+
+# Rock-salt conventional cell
+LATTICE = 4.2
+BASIS = numpy.array([[0., 0., 0.], [0., .5, .5], [.5, 0., .5], [.5, .5, 0.],
+                     [.5, 0., 0.], [0., .5, 0.], [0., 0., .5], [.5, .5, .5]])
+BASIS_SYMBOLS = ['Mg'] * 4 + ['O'] * 4
+
+
+def get_supercell(size):
+    """
+    Return the cell, the symbols and the positions of a size x size x size
+    supercell (8 * size ** 3 atoms).
+    """
+    shifts = numpy.array([[i, j, k] for i in range(size)
+                          for j in range(size) for k in range(size)])
+    positions = ((shifts[:, numpy.newaxis, :] + BASIS[numpy.newaxis, :, :])
+                 .reshape(-1, 3) * LATTICE)
+    return (numpy.eye(3) * LATTICE * size, BASIS_SYMBOLS * len(shifts),
+            positions)
+
+
+def append_atoms(cell, symbols, positions):
+    structure = StructureData(cell=cell)
+    for symbol, position in zip(symbols, positions):
+        structure.append_atom(symbols=symbol, position=position)
+    return structure
+
+
+def benchmark(size, name, build):
+    cell, symbols, positions = get_supercell(size)
+
+    start = time.time()
+    structure = build(cell, symbols, positions)
+    built = time.time() - start
+
+    start = time.time()
+    structure.store()
+    stored = time.time() - start
+
+    start = time.time()
+    load_node(structure.pk)._prepare_xsf()
+    exported = time.time() - start
+
+    print ("{:20s} {:6d} atoms: build {:8.3f} s, store {:6.2f} s, "
+           "export {:6.2f} s".format(name, len(symbols), built, stored,
+                                     exported))
+
+
+def main():
+    # 512, 4096 and 10648 atoms
+    for size in [4, 8, 11]:
+        benchmark(size, 'from_arrays', StructureData.from_arrays)
+        benchmark(size, 'from_arrays (arrays)',
+                  lambda cell, symbols, positions: StructureData.from_arrays(
+                      cell, symbols, positions, site_storage='arrays'))
+        benchmark(size, 'append_atom', append_atoms)
+
+
+if __name__ == '__main__':
+    main()
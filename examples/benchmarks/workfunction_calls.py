@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+###########################################################################
+# Copyright (c), The AiiDA team. All rights reserved.                     #
+# This file is part of the AiiDA code.                                    #
+#                                                                         #
+# The code is hosted on GitHub at https://github.com/aiidateam/aiida_core #
+# For further information on the license, see the LICENSE.txt file        #
+# For further information please visit http://www.aiida.net               #
+###########################################################################
+"""
+Benchmark of the number of calls per second of a trivial workfunction, with
+full provenance, with _store_provenance=False (the nodes are created but not
+stored) and in ephemeral mode (no nodes at all), compared to a plain python
+function call.
+"""
+from aiida.backends.utils import load_dbenv, is_dbenv_loaded
+
+if not is_dbenv_loaded():
+    load_dbenv()
+
+import time
+
+from aiida.orm.data.base import Int
+from aiida.work.workfunction import workfunction
+
+NUM_CALLS = 200
+
+
+def add(a, b):
+    return a + b
+
+
+wf_add = workfunction(add)
+
+
+def calls_per_second(func, *args, **kwargs):
+    start = time.time()
+    for _ in range(NUM_CALLS):
+        func(*args, **kwargs)
+    return NUM_CALLS / (time.time() - start)
+
+
+def main():
+    results = [
+        ("Provenance", calls_per_second(wf_add, Int(1), Int(2))),
+        ("No stored provenance", calls_per_second(
+            wf_add, Int(1), Int(2), _store_provenance=False)),
+        ("Ephemeral (nodes)", calls_per_second(
+            wf_add, Int(1), Int(2), _ephemeral=True)),
+        ("Ephemeral (plain values)", calls_per_second(
+            wf_add, 1, 2, _ephemeral=True)),
+        ("Python function", calls_per_second(add, 1, 2)),
+    ]
+
+    for name, rate in results:
+        print "{:<26} {:>12.1f} calls/s".format(name, rate)
+
+
+if __name__ == '__main__':
+    main()